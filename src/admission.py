@@ -0,0 +1,158 @@
+"""
+               GLWT(Good Luck With That) Public License
+                 Copyright (c) Everyone, except Author
+
+Everyone is permitted to copy, distribute, modify, merge, sell, publish,
+sublicense or whatever they want with this software but at their OWN RISK.
+
+                            Preamble
+
+The author has absolutely no clue what the code in this project does.
+It might just work or not, there is no third option.
+
+
+                GOOD LUCK WITH THAT PUBLIC LICENSE
+   TERMS AND CONDITIONS FOR COPYING, DISTRIBUTION, AND MODIFICATION
+
+  0. You just DO WHATEVER YOU WANT TO as long as you NEVER LEAVE A
+TRACE TO TRACK THE AUTHOR of the original product to blame for or hold
+responsible.
+
+IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+
+Good luck and Godspeed.
+"""
+
+"""
+Module `src/admission.py` bounds the amount of updates handled at once and sheds load beyond it.
+---
+aiogram starts a task for every update without limit. During a traffic spike thousands of handlers
+compete for the event loop and the engine executors, every one of them gets slower, and all users time out together.
+
+`AdmissionController` is an update middleware in front of all handlers:
+    1. At most `max_in_flight` updates are handled at once.
+    2. Up to `max_pending` more updates wait for a free slot, in order of arrival (FIFO).
+    3. Updates arriving when the queue is full are rejected right away with a cheap "bot is busy" answer,
+        without reading sessions or running engines.
+So under overload admitted users keep normal latency, and the rest learn immediately that they should retry.
+When updates of a chat are serialized (see `src/sequencer.py`), the controller must be registered after the sequencer:
+otherwise updates waiting for their chat's lock hold slots, and a single chat sending many messages
+fills all of them while the engine stays idle.
+Link: https://en.wikipedia.org/wiki/Admission_control
+Link: https://docs.aiogram.dev/en/v3.22.0/dispatcher/middlewares.html
+
+Typical usage example:
+```
+dp.update.outer_middleware(ChatSequencer())
+dp.update.outer_middleware(AdmissionController(max_in_flight=64, max_pending=1024))
+```
+"""
+
+import asyncio
+import typing as tp
+from collections import deque
+
+from typing_extensions import override
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.types import Chat, TelegramObject, Update
+
+from outbound import low_priority
+
+# Answer to rejected updates.
+BUSY_TEXT = "The bot is busy right now, please try again in a moment."
+
+
+# Update middleware limiting concurrent handlers, with a bounded queue and load shedding.
+class AdmissionController(BaseMiddleware):
+    """
+    Update middleware limiting concurrent handlers, with a bounded queue and load shedding.
+    See module documentation.
+
+    Attributes:
+        max_in_flight: maximum amount of updates handled at once.
+        max_pending: maximum amount of updates waiting for a slot.
+        admitted: amount of handled updates.
+        shed: amount of rejected updates.
+    """
+
+    def __init__(self, max_in_flight: int = 64, max_pending: int = 1024):
+        if max_in_flight < 1 or max_pending < 0:
+            raise ValueError("max_in_flight must be positive and max_pending must not be negative")
+        self.max_in_flight = max_in_flight
+        self.max_pending = max_pending
+        self.admitted = 0
+        self.shed = 0
+        self._in_flight = 0
+        # Futures of waiting updates. A free slot is handed to the first one that is not cancelled.
+        self._waiters: deque[asyncio.Future] = deque()
+
+    def stats(self) -> dict[str, int]:
+        """
+        Returns counters: admitted, shed, and amount of updates in flight and pending.
+        """
+        return {
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "in_flight": self._in_flight,
+            "pending": len(self._waiters),
+        }
+
+    @override
+    async def __call__(
+        self,
+        handler: tp.Callable[[TelegramObject, dict[str, tp.Any]], tp.Awaitable[tp.Any]],
+        event: TelegramObject,
+        data: dict[str, tp.Any],
+    ) -> tp.Any:
+        if self._in_flight < self.max_in_flight:
+            self._in_flight += 1
+        elif len(self._waiters) < self.max_pending:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter  # The slot is handed over by `_release`, `_in_flight` stays the same.
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    self._release()  # Slot was handed over just before cancellation.
+                raise
+        else:
+            self.shed += 1
+            await _reject(event, data)
+            return None
+
+        self.admitted += 1
+        try:
+            return await handler(event, data)
+        finally:
+            self._release()
+
+    def _release(self):
+        """
+        Hands the slot of a finished update to the first waiting update, or frees it.
+        Time complexity: amortized O(1)
+        """
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._in_flight -= 1
+
+
+async def _reject(event: TelegramObject, data: dict[str, tp.Any]):
+    """
+    Answers a rejected update with BUSY_TEXT: a notification for a button press, a message otherwise.
+    Updates without a chat are dropped silently.
+    """
+    bot: Bot = data["bot"]
+    if isinstance(event, Update) and event.callback_query is not None:
+        await bot.answer_callback_query(event.callback_query.id, text=BUSY_TEXT)
+        return
+    chat: tp.Optional[Chat] = data.get("event_chat")
+    if chat is not None:
+        with low_priority():
+            await bot.send_message(chat.id, BUSY_TEXT)
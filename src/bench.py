@@ -0,0 +1,297 @@
+"""
+               GLWT(Good Luck With That) Public License
+                 Copyright (c) Everyone, except Author
+
+Everyone is permitted to copy, distribute, modify, merge, sell, publish,
+sublicense or whatever they want with this software but at their OWN RISK.
+
+                            Preamble
+
+The author has absolutely no clue what the code in this project does.
+It might just work or not, there is no third option.
+
+
+                GOOD LUCK WITH THAT PUBLIC LICENSE
+   TERMS AND CONDITIONS FOR COPYING, DISTRIBUTION, AND MODIFICATION
+
+  0. You just DO WHATEVER YOU WANT TO as long as you NEVER LEAVE A
+TRACE TO TRACK THE AUTHOR of the original product to blame for or hold
+responsible.
+
+IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+
+Good luck and Godspeed.
+"""
+
+"""
+Module `src/bench.py` measures the cost of every `Game` method of every game.
+---
+Engine optimizations should be proven with numbers. This benchmark runner uses the standard library only,
+so it runs anywhere the games run, without Telegram, network or extra packages.
+
+For every game found in `src/games/` (see `registry.discover`):
+    1. A corpus of reachable states is built by random playouts from the initial state,
+        seeded, so every run measures the same states. Games may have extra corpora (see EXTRA_CORPORA)
+        for hot paths random playouts do not reach, such as Nim on large piles.
+    2. Every interface method is called over the corpus, one call after another, each call timed
+        with `time.perf_counter`, for at least `--min-time` seconds and `--min-calls` calls.
+        Link: https://docs.python.org/3/library/time.html#time.perf_counter
+    3. `generate_best_move` is measured cold (the first call in the process, before `warm_up`),
+        then `warm_up` itself, then warm calls over the corpus.
+    4. Calls per second and 50th, 90th and 99th percentiles of single call duration are reported.
+
+Results may be saved as a baseline (`--save`) and compared with one (`--compare`): a method whose median
+got slower by more than `--threshold` (25% by default) is a regression, and the runner exits with code 1,
+so it can gate a change in CI. Compare results from the same machine only.
+
+Usage example:
+```
+python3 src/bench.py --save baseline.json
+# ... change an engine ...
+python3 src/bench.py --compare baseline.json
+python3 src/bench.py --games nim tictactoe --min-time 1
+```
+Expected time complexity: O(g * m * max(min_time, min_calls * call time)) where g is amount of games and m is amount of methods.
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import platform
+import random
+import sys
+import time
+import typing as tp
+from dataclasses import asdict, dataclass
+
+from games.game import Game
+from registry import GameSpec, discover, select
+
+# Extra corpora of games, keyed by game name, then by label. States are in `Game.encode_state` format.
+# Random playouts only reach states close to the initial one, extra corpora cover hot paths far from it,
+# e.g. `Nim.get_legal_moves` on large piles, where every removal from every pile is a legal move.
+# Methods taking a state are measured on every extra corpus separately, as "<method>[<label>]".
+EXTRA_CORPORA: dict[str, dict[str, list[bytes]]] = {
+    "Nim": {
+        "large piles": [
+            bytes([1, 200, 150, 100, 255]),  # Turn byte first: 1 - bot to move, as when the engine is called.
+            bytes([1, 255, 255, 255, 255]),
+            bytes([0, 128, 64, 250, 31]),
+            bytes([0, 255, 1, 254, 2]),
+        ],
+    },
+}
+
+
+# Measured cost of one method of one game.
+@dataclass(frozen=True)
+class Result:
+    """
+    Measured cost of one method of one game. Durations are in seconds.
+    """
+
+    calls: int
+    ops: float  # Calls per second.
+    p50: float
+    p90: float
+    p99: float
+
+
+# Benchmarked method with the argument tuples it is called with in a cycle.
+Case = tuple[tp.Callable[..., tp.Awaitable[tp.Any]], list[tuple[tp.Any, ...]]]
+
+
+def percentile(sorted_timings: list[float], q: float) -> float:
+    """
+    Returns `q`-th percentile (0 < q <= 100) of sorted values, nearest-rank method.
+    Link: https://en.wikipedia.org/wiki/Percentile#The_nearest-rank_method
+    """
+    rank = max(1, -(-len(sorted_timings) * q // 100))  # Ceiling of n * q / 100.
+    return sorted_timings[int(rank) - 1]
+
+
+def summarize(timings: list[float]) -> Result:
+    """
+    Returns a result of timed calls.
+    """
+    ordered = sorted(timings)
+    return Result(
+        calls=len(ordered),
+        ops=len(ordered) / sum(ordered) if sum(ordered) else float("inf"),
+        p50=percentile(ordered, 50),
+        p90=percentile(ordered, 90),
+        p99=percentile(ordered, 99),
+    )
+
+
+async def build_corpus(game: Game, rng: random.Random, size: int) -> list[tp.Any]:
+    """
+    Returns up to `size` distinct reachable states (terminal ones included), visited by random playouts.
+    Expected time complexity: O(size * l) where l is the cost of a playout step.
+    """
+    states: dict[bytes, tp.Any] = {}
+    for _ in range(size * 4):  # Small games have fewer states than asked for.
+        state = await game.initial_state()
+        while True:
+            states.setdefault(await game.encode_state(state), state)
+            if len(states) >= size or await game.is_terminal(state):
+                break
+            state = await game.add_move(state, rng.choice(await game.get_legal_moves(state)))
+        if len(states) >= size:
+            break
+    return list(states.values())
+
+
+async def time_calls(
+    method: tp.Callable[..., tp.Awaitable[tp.Any]],
+    arguments: list[tuple[tp.Any, ...]],
+    min_time: float,
+    min_calls: int,
+) -> list[float]:
+    """
+    Calls `method` with `arguments` in a cycle, timing every call, for at least `min_time` seconds and `min_calls` calls.
+    """
+    gc.collect()  # Do not make the first calls pay for garbage of the previous method.
+    timings: list[float] = []
+    started = time.perf_counter()
+    while len(timings) < min_calls or time.perf_counter() - started < min_time:
+        args = arguments[len(timings) % len(arguments)]
+        call_started = time.perf_counter()
+        await method(*args)
+        timings.append(time.perf_counter() - call_started)
+    return timings
+
+
+async def bench_game(spec: GameSpec, seed: int, corpus_size: int, min_time: float, min_calls: int) -> dict[str, Result]:
+    """
+    Returns results of all methods of a game, keyed by method name.
+    """
+    game = spec.create()
+    rng = random.Random(seed)
+    results: dict[str, Result] = {}
+
+    # Cold engine: the very first search of the process, before any warm-up.
+    initial = await game.initial_state()
+    results["generate_best_move[cold]"] = summarize(await time_calls(game.generate_best_move, [(initial,)], 0, 1))
+    results["warm_up"] = summarize(await time_calls(game.warm_up, [()], 0, 1))
+
+    cases: dict[str, Case] = {"initial_state": (game.initial_state, [()])}
+    cases.update(await corpus_cases(game, rng, await build_corpus(game, rng, corpus_size)))
+    for label, corpus in EXTRA_CORPORA.get(spec.name, {}).items():
+        extra = await corpus_cases(game, rng, [await game.decode_state(data) for data in corpus])
+        cases.update((f"{name}[{label}]", case) for name, case in extra.items())
+    for name, (method, arguments) in cases.items():
+        results[name] = summarize(await time_calls(method, arguments, min_time, min_calls))
+    return results
+
+
+async def corpus_cases(game: Game, rng: random.Random, states: list[tp.Any]) -> dict[str, Case]:
+    """
+    Returns methods taking a state with their arguments over `states`, keyed by method name.
+    Random moves for `add_move` and `parse_move` are drawn from `rng`.
+    """
+    playing = [state for state in states if not await game.is_terminal(state)]
+    moves = [(state, rng.choice(await game.get_legal_moves(state))) for state in playing]
+    encoded = [(await game.encode_state(state),) for state in states]
+    return {
+        "get_legal_moves": (game.get_legal_moves, [(state,) for state in playing]),
+        "add_move": (game.add_move, moves),
+        "is_terminal": (game.is_terminal, [(state,) for state in states]),
+        "get_winner": (game.get_winner, [(state,) for state in states]),
+        "format_state": (game.format_state, [(state,) for state in states]),
+        "parse_move": (game.parse_move, [(str(move),) for _, move in moves]),
+        "encode_state": (game.encode_state, [(state,) for state in states]),
+        "decode_state": (game.decode_state, encoded),
+        "keyboard_key": (game.keyboard_key, [(state,) for state in playing]),
+        "generate_best_move": (game.generate_best_move, [(state,) for state in playing]),
+    }
+
+
+def compare(current: dict[str, Result], baseline: dict[str, dict[str, float]], threshold: float) -> dict[str, str]:
+    """
+    Returns verdicts of results present in the baseline: "slower", "faster" or "same", judged by medians.
+    """
+    verdicts = {}
+    for key, result in current.items():
+        if (base := baseline.get(key)) is None:
+            continue
+        ratio = result.p50 / base["p50"] if base["p50"] else 1.0
+        verdicts[key] = "slower" if ratio > 1 + threshold else "faster" if ratio < 1 / (1 + threshold) else "same"
+    return verdicts
+
+
+def format_duration(seconds: float) -> str:
+    """
+    Formats a duration with a unit fitting its magnitude, e.g. "12.3us".
+    """
+    for unit, scale in (("ns", 1e-9), ("us", 1e-6), ("ms", 1e-3)):
+        if seconds < scale * 1000:
+            return f"{seconds / scale:.1f}{unit}"
+    return f"{seconds:.2f}s"
+
+
+async def run(args: argparse.Namespace) -> int:
+    """
+    Runs the benchmark as configured by command line arguments, prints results.
+
+    Returns:
+        int: exit code, 1 if a regression against the baseline was found, 0 otherwise.
+    """
+    specs = await discover()
+    if args.games:
+        specs = select(specs, args.games)
+
+    baseline: dict[str, dict[str, float]] = {}
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)["results"]
+
+    results: dict[str, Result] = {}
+    print(f"{'method':<40} {'calls':>8} {'ops/s':>12} {'p50':>10} {'p90':>10} {'p99':>10}")
+    for spec in specs:
+        game_results = await bench_game(spec, args.seed, args.corpus, args.min_time, args.min_calls)
+        for method, result in game_results.items():
+            key = f"{spec.name}.{method}"
+            results[key] = result
+            verdict = compare({key: result}, baseline, args.threshold).get(key, "")
+            print(
+                f"{key:<40} {result.calls:>8} {result.ops:>12.0f} {format_duration(result.p50):>10} "
+                f"{format_duration(result.p90):>10} {format_duration(result.p99):>10}  {verdict}"
+            )
+
+    if args.save:
+        meta = {"python": platform.python_version(), "machine": platform.machine(), "seed": args.seed}
+        with open(args.save, "w") as file:
+            json.dump({"meta": meta, "results": {key: asdict(result) for key, result in results.items()}}, file, indent=2)
+
+    regressions = [key for key, verdict in compare(results, baseline, args.threshold).items() if verdict == "slower"]
+    if regressions:
+        print(f"{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def parse_args(argv: tp.Optional[list[str]] = None) -> argparse.Namespace:
+    """
+    Parses command line arguments, see `python3 src/bench.py --help`.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark every method of every game.")
+    parser.add_argument("--games", nargs="*", help="names or classes of games to benchmark, all by default")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the state corpus")
+    parser.add_argument("--corpus", type=int, default=200, help="amount of states in the corpus of each game")
+    parser.add_argument("--min-time", type=float, default=0.5, help="minimum seconds spent on each method")
+    parser.add_argument("--min-calls", type=int, default=10, help="minimum calls of each method")
+    parser.add_argument("--save", help="save results to a baseline file")
+    parser.add_argument("--compare", help="compare results with a baseline file")
+    parser.add_argument("--threshold", type=float, default=0.25, help="slowdown of a median counted as a regression")
+    return parser.parse_args(argv)
+
+
+# Standard Python technique to check if script is run directly.
+# Link: https://docs.python.org/3/library/__main__.html
+if __name__ == "__main__":
+    sys.exit(asyncio.run(run(parse_args())))
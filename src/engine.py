@@ -0,0 +1,352 @@
+"""
+               GLWT(Good Luck With That) Public License
+                 Copyright (c) Everyone, except Author
+
+Everyone is permitted to copy, distribute, modify, merge, sell, publish,
+sublicense or whatever they want with this software but at their OWN RISK.
+
+                            Preamble
+
+The author has absolutely no clue what the code in this project does.
+It might just work or not, there is no third option.
+
+
+                GOOD LUCK WITH THAT PUBLIC LICENSE
+   TERMS AND CONDITIONS FOR COPYING, DISTRIBUTION, AND MODIFICATION
+
+  0. You just DO WHATEVER YOU WANT TO as long as you NEVER LEAVE A
+TRACE TO TRACK THE AUTHOR of the original product to blame for or hold
+responsible.
+
+IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+
+Good luck and Godspeed.
+"""
+
+"""
+Module `src/engine.py` runs `Game` engine calls away from the bot's event loop.
+---
+All `Game` methods are `async`, but engine methods (`generate_best_move` above all) are CPU-bound:
+while one of them runs on the event loop, no other user's update is processed.
+`EngineRunner` dispatches such calls to an executor chosen per game:
+
+    1. "inline" - the call is awaited directly on the event loop.
+        Used for games whose engine is a table lookup or a formula (Nim, Tic Tac Toe).
+
+    2. "thread" - the call runs in a `concurrent.futures.ThreadPoolExecutor`.
+        Link: https://docs.python.org/3/library/concurrent.futures.html#threadpoolexecutor
+        Keeps the loop responsive for engines that release the GIL or do I/O,
+        pure Python engines still compete with the loop for the GIL.
+        All threads share one game instance, so a game must not keep the state of a running call on the instance
+        (see the search of `src/games/mnk.py`).
+
+    3. "process" - the call runs in a `concurrent.futures.ProcessPoolExecutor`.
+        Link: https://docs.python.org/3/library/concurrent.futures.html#processpoolexecutor
+        Each worker process receives its own copy of the game once, when the worker starts,
+        and warms it up (see `Game.warm_up`), so engine caches (e.g. transposition tables) live in the worker and persist between calls.
+        Only the state, the method name and the result cross the process boundary.
+        Along with a result, a worker reports its engine stats (see `Game.engine_stats`),
+        at most once per `STATS_INTERVAL` seconds.
+
+Every call may be bounded by a timeout. If `generate_best_move` does not answer in time,
+a random legal move is played instead (fallback), so a user is never left without a reply.
+Note that a timed out call can not be interrupted, it keeps its worker busy until it finishes.
+
+Every call is timed into the `bot_engine_call_seconds` histogram and timed out calls are counted
+in `bot_engine_timeouts_total` (see `src/metrics.py`).
+`EngineRunner.engine_stats` sums engine stats over all copies of a game without submitting any call:
+shared instances ("inline", "thread") are read directly, process workers are read from their latest reports.
+So metric scrapes never queue behind searches, nor show up in call latency and timeouts.
+
+Typical usage example:
+```
+engine = EngineRunner(
+    default=EngineSettings(),
+    per_game={"tictactoe4x4": EngineSettings(executor="process", workers=2, timeout=3.0)},
+)
+await engine.warm_up(game)  # Optional, before taking traffic.
+move = await engine.generate_best_move(game, state)
+...
+engine.shutdown()
+```
+"""
+
+import asyncio
+import logging
+import os
+import random
+import time
+import typing as tp
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+
+from games.game import Game
+from metrics import REGISTRY
+
+ENGINE_CALL_SECONDS = REGISTRY.histogram(
+    "bot_engine_call_seconds",
+    "Duration of engine calls as seen by the event loop, including executor queueing and transfer.",
+    labels=("game", "method", "executor"),
+)
+ENGINE_TIMEOUTS = REGISTRY.counter(
+    "bot_engine_timeouts_total", "Engine calls that exceeded their timeout.", labels=("game", "method")
+)
+
+logger = logging.getLogger(__name__)
+
+# Allowed values of EngineSettings.executor.
+EXECUTORS = ("inline", "thread", "process")
+
+# Seconds between engine stats reports of a worker process.
+STATS_INTERVAL = 1.0
+
+
+# Settings of the executor used for a single game.
+@dataclass(frozen=True)
+class EngineSettings:
+    """
+    Settings of the executor used for a single game.
+
+    Attributes:
+        executor: one of "inline", "thread", "process", see module documentation.
+        workers: amount of threads or processes in the pool. Ignored for "inline".
+        timeout: seconds an engine call may take before fallback is used. None means no limit.
+    """
+
+    executor: str = "inline"
+    workers: int = 1
+    timeout: tp.Optional[float] = None
+
+    def __post_init__(self):
+        if self.executor not in EXECUTORS:
+            raise ValueError(f"Unknown engine executor {self.executor!r}, expected one of {EXECUTORS}")
+        if self.workers < 1:
+            raise ValueError("Engine workers must be a positive number")
+        if self.timeout is not None and self.timeout <= 0:
+            raise ValueError("Engine timeout must be positive")
+
+    @classmethod
+    def from_env(cls) -> "EngineSettings":
+        """
+        Builds settings from environment variables:
+            ENGINE_EXECUTOR - executor kind, "inline" by default.
+            ENGINE_WORKERS - pool size, 1 by default.
+            ENGINE_TIMEOUT - timeout in seconds, no timeout by default.
+        """
+        timeout = os.getenv("ENGINE_TIMEOUT")
+        return cls(
+            executor=os.getenv("ENGINE_EXECUTOR", "inline"),
+            workers=int(os.getenv("ENGINE_WORKERS", "1")),
+            timeout=float(timeout) if timeout else None,
+        )
+
+
+# Game instance owned by the current worker process. Set once by _init_worker.
+_worker_game: tp.Optional[Game] = None
+
+# time.monotonic() of the last engine stats report of the current worker process.
+_worker_reported_at = float("-inf")
+
+# Engine stats report of a worker process: (process id, stats).
+_Report = tuple[int, dict[str, float]]
+
+
+def _init_worker(game: Game) -> None:
+    """
+    Initializer of process pool workers: remembers the game this worker serves and warms it up,
+    see `Game.warm_up`. Workers never serve a call before their game is warm.
+    """
+    global _worker_game
+    _worker_game = game
+    asyncio.run(game.warm_up())
+
+
+def _ping() -> tp.Optional[_Report]:
+    """
+    Returns engine stats of the worker's warm game.
+    Submitted to a process pool to make it start its workers.
+    """
+    return asyncio.run(_report(force=True))
+
+
+def _call_in_worker(method: str, args: tuple) -> tuple[tp.Any, tp.Optional[_Report]]:
+    """
+    Runs `method` of the worker's game to completion. Executed inside a worker process.
+    Returns the result, and engine stats of the worker if they are due (see STATS_INTERVAL).
+    """
+    assert _worker_game is not None, "engine: invariant failed: worker is not initialized"
+
+    async def run() -> tuple[tp.Any, tp.Optional[_Report]]:
+        result = await getattr(_worker_game, method)(*args)
+        return result, await _report()
+
+    return asyncio.run(run())
+
+
+async def _report(force: bool = False) -> tp.Optional[_Report]:
+    """
+    Returns engine stats of the worker's game, or None if the last report is less than STATS_INTERVAL seconds old.
+    """
+    global _worker_reported_at
+    assert _worker_game is not None, "engine: invariant failed: worker is not initialized"
+    now = time.monotonic()
+    if not force and now - _worker_reported_at < STATS_INTERVAL:
+        return None
+    _worker_reported_at = now
+    return os.getpid(), await _worker_game.engine_stats()
+
+
+def _call_in_thread(game: Game, method: str, args: tuple) -> tp.Any:
+    """
+    Runs `method` of `game` to completion on a private event loop. Executed inside a pool thread.
+    """
+    return asyncio.run(getattr(game, method)(*args))
+
+
+# EngineRunner owns executors of all games and routes engine calls to them.
+class EngineRunner:
+    """
+    EngineRunner owns executors of all games and routes engine calls to them.
+    Executors are created lazily, on the first call for a game.
+    """
+
+    def __init__(self, default: EngineSettings, per_game: tp.Optional[dict[str, EngineSettings]] = None):
+        """
+        Args:
+            default: settings used for games not listed in `per_game`.
+            per_game: settings keyed by game name (as returned by `Game.name()`).
+        """
+        self.default = default
+        self.per_game = per_game or {}
+        self._executors: dict[str, tp.Optional[Executor]] = {}  # Keyed by game name. None for "inline".
+        # Latest engine stats of every worker process, keyed by game name and process id.
+        self._reports: dict[str, dict[int, dict[str, float]]] = {}
+
+    def settings(self, name: str) -> EngineSettings:
+        """
+        Returns settings used for a game name.
+        """
+        return self.per_game.get(name, self.default)
+
+    async def call(self, game: Game, method: str, *args: tp.Any) -> tp.Any:
+        """
+        Runs `game.<method>(*args)` on the game's executor.
+        Raises `TimeoutError` if the call does not finish within the configured timeout.
+        """
+        name = await game.name()
+        settings = self.settings(name)
+        executor = self._executor(name, game, settings)
+
+        if executor is None:
+            # Inline calls can not be preempted, the timeout only bounds coroutines that yield.
+            call = getattr(game, method)(*args)
+        else:
+            loop = asyncio.get_running_loop()
+            if settings.executor == "process":
+                call = loop.run_in_executor(executor, _call_in_worker, method, args)
+            else:
+                call = loop.run_in_executor(executor, _call_in_thread, game, method, args)
+
+        with ENGINE_CALL_SECONDS.time(name, method, settings.executor):
+            try:
+                result = await asyncio.wait_for(call, settings.timeout)
+            except TimeoutError:
+                ENGINE_TIMEOUTS.inc(name, method)
+                raise
+        if settings.executor == "process":
+            result, report = result
+            self._record(name, report)
+        return result
+
+    async def generate_best_move(self, game: Game, state: tp.Any) -> tp.Any:
+        """
+        Returns `game.generate_best_move(state)` computed on the game's executor.
+        If the engine exceeds its timeout, a random legal move is returned instead.
+        """
+        try:
+            return await self.call(game, "generate_best_move", state)
+        except TimeoutError:
+            logger.warning("Engine of %s exceeded its time budget, playing a fallback move", await game.name())
+            return random.choice(await game.get_legal_moves(state))
+
+    async def warm_up(self, game: Game) -> None:
+        """
+        Warms up a game where its engine calls will run, see `Game.warm_up`.
+
+        For "inline" and "thread" executors the game instance is shared, it is warmed up once.
+        For "process" executors every worker has its own copy of the game,
+        so all workers are started (each one warms up its copy in the initializer).
+        """
+        name = await game.name()
+        settings = self.settings(name)
+        executor = self._executor(name, game, settings)
+        loop = asyncio.get_running_loop()
+
+        if executor is None:
+            await game.warm_up()
+        elif settings.executor == "thread":
+            await loop.run_in_executor(executor, _call_in_thread, game, "warm_up", ())
+        else:
+            # Pool starts a new worker for every submitted task while none of the workers is idle.
+            reports = await asyncio.gather(*(loop.run_in_executor(executor, _ping) for _ in range(settings.workers)))
+            for report in reports:
+                self._record(name, report)
+
+    async def engine_stats(self, game: Game) -> dict[str, float]:
+        """
+        Returns engine stats of a game (see `Game.engine_stats`) summed over all copies of the game,
+        and amount of the copies as "copies". Nothing is submitted to the game's executor.
+
+        With "inline" and "thread" executors there is one copy, the shared instance, read right away.
+        With "process" executor every worker has a copy, its latest report is used (see STATS_INTERVAL).
+        A worker reports when it answers a warm-up ping or a call, until then it is not counted.
+        Time complexity: O(w * k) where w is amount of workers and k is amount of keys, plus `Game.engine_stats`.
+        """
+        name = await game.name()
+        if self.settings(name).executor == "process":
+            reports = list(self._reports.get(name, {}).values())
+        else:
+            reports = [await game.engine_stats()]
+        stats: dict[str, float] = {"copies": len(reports)}
+        for report in reports:
+            for key, value in report.items():
+                stats[key] = stats.get(key, 0) + value
+        return stats
+
+    def _record(self, name: str, report: tp.Optional[_Report]) -> None:
+        """
+        Remembers engine stats reported by a worker process.
+        """
+        if report is not None:
+            pid, stats = report
+            self._reports.setdefault(name, {})[pid] = stats
+
+    def _executor(self, name: str, game: Game, settings: EngineSettings) -> tp.Optional[Executor]:
+        """
+        Returns the executor of a game, creating it on first use.
+        """
+        if name not in self._executors:
+            if settings.executor == "process":
+                self._executors[name] = ProcessPoolExecutor(
+                    max_workers=settings.workers, initializer=_init_worker, initargs=(game,)
+                )
+            elif settings.executor == "thread":
+                self._executors[name] = ThreadPoolExecutor(
+                    max_workers=settings.workers, thread_name_prefix=f"engine-{name}"
+                )
+            else:
+                self._executors[name] = None
+        return self._executors[name]
+
+    def shutdown(self) -> None:
+        """
+        Shuts down all executors. Pending calls are cancelled, running ones are not waited for.
+        """
+        for executor in self._executors.values():
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+        self._executors.clear()
+        self._reports.clear()
@@ -80,13 +80,15 @@ from .game import Game
 from typing_extensions import override
 
 class GameName(Game):
+    DESCRIPTION = "Game name description"
+
     @override
     async def name(self) -> str:
         return "Game name"
     
     @override
     async def description(self) -> str:
-        return "Game name description"
+        return self.DESCRIPTION
 
     @override
     async def initial_state(self) -> GameNameState:
@@ -119,6 +121,19 @@ class GameName(Game):
     @override
     async def parse_move(self, move_str: str) -> tp.Optional[Move]:
         return Move.try_parse(move_str)
+
+    @override
+    async def encode_state(self, state: GameNameState) -> bytes:
+        return state.to_bytes()
+
+    @override
+    async def decode_state(self, data: bytes) -> GameNameState:
+        return GameNameState.from_bytes(data)
+
+    # Optional, see `Game.warm_up`.
+    @override
+    async def warm_up(self) -> None:
+        build_engine_tables()
 ```
 """
 
@@ -131,8 +146,15 @@ class Game(ABC):
     """
     Base abstract class for each game to inherit.
     Game implementation is complete, when all `@abstractmethod` methods are implemented.
+
+    Attributes:
+        DESCRIPTION: description of the game, read from the class to show the game menu without creating the game
+            (see `registry.GameSpec`). It may refer to constructor arguments, e.g. "{rows}x{cols} board",
+            which are filled in with the arguments of the game. `description` must return the same text.
     """
 
+    DESCRIPTION: tp.ClassVar[str] = ""
+
     @abstractmethod # Mark method as required to implement.
     async def name(self) -> str:
         """
@@ -297,4 +319,86 @@ and contains profanity (in english language), please explain in PR.
             tp.Optional[tp.Any]: move type. Could be None, if move is invalid.
         """
         pass
- 
+
+    @abstractmethod # Mark method as required to implement.
+    async def encode_state(self, state: tp.Any) -> bytes:
+        """
+        Encode game state into a compact binary form.
+
+        Encoded states are kept in user sessions, possibly in external storage,
+        so the encoding should be as short as practical (a few bytes).
+        `state` type is of `tp.Any`, as each `Game` implementation will have its own state type.
+
+        Args:
+            state: current state of the game.
+
+        Returns:
+            bytes: encoded state. `decode_state(encode_state(state)) == state` must hold.
+        """
+        pass
+
+    @abstractmethod # Mark method as required to implement.
+    async def decode_state(self, data: bytes) -> tp.Any:
+        """
+        Decode game state produced by `encode_state`.
+
+        Output type is of `tp.Any`, as each `Game` implementation will have its own state type.
+
+        Args:
+            data: encoded state.
+
+        Raises:
+            ValueError: if `data` is not a valid encoded state.
+
+        Returns:
+            tp.Any: decoded state.
+        """
+        pass
+
+    # Not abstract: games without expensive precomputation do not need to implement it.
+    async def warm_up(self) -> None:
+        """
+        Prepares the game to serve requests at full speed.
+
+        Called once for every game before the bot starts taking traffic.
+        Games with lazily built engine tables or caches should build them here,
+        so that the first real user does not pay for it.
+        Default implementation does nothing.
+
+        Returns:
+            None.
+        """
+        pass
+
+    # Not abstract: games without a cheap key are cached by the text of their legal moves.
+    async def keyboard_key(self, state: tp.Any) -> tp.Optional[tp.Hashable]:
+        """
+        Returns a cache key identifying the set of legal moves in `state`.
+
+        Two states must have equal keys only if they have the same legal moves (in the same order).
+        The key lets the bot reuse a keyboard of legal moves between users and turns.
+        It should be much cheaper to compute than `get_legal_moves`, e.g. a bitboard of empty cells.
+        Default implementation returns None, meaning "no key".
+
+        `state` type is of `tp.Any`, as each `Game` implementation will have its own state type.
+
+        Args:
+            state: current state of the game.
+
+        Returns:
+            tp.Optional[tp.Hashable]: key of the legal move set, or None.
+        """
+        return None
+
+    # Not abstract: games without engine caches have nothing to report.
+    async def engine_stats(self) -> dict[str, float]:
+        """
+        Returns numbers describing the engine's caches and work, exported as metrics (see `src/metrics.py`).
+
+        For example, amount of entries in a transposition table, or amount of nodes visited by the last search.
+        Keys should be short snake_case names. Default implementation returns an empty dict.
+
+        Returns:
+            dict[str, float]: engine statistics.
+        """
+        return {}
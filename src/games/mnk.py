@@ -0,0 +1,721 @@
+"""
+               GLWT(Good Luck With That) Public License
+                 Copyright (c) Everyone, except Author
+
+Everyone is permitted to copy, distribute, modify, merge, sell, publish,
+sublicense or whatever they want with this software but at their OWN RISK.
+
+                            Preamble
+
+The author has absolutely no clue what the code in this project does.
+It might just work or not, there is no third option.
+
+
+                GOOD LUCK WITH THAT PUBLIC LICENSE
+   TERMS AND CONDITIONS FOR COPYING, DISTRIBUTION, AND MODIFICATION
+
+  0. You just DO WHATEVER YOU WANT TO as long as you NEVER LEAVE A
+TRACE TO TRACK THE AUTHOR of the original product to blame for or hold
+responsible.
+
+IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+
+Good luck and Godspeed.
+"""
+
+"""
+Module `src/games/mnk.py` provides an implementation of generalized Tic Tac Toe (m,n,k-game) as a PvE minigame.
+Link: https://en.wikipedia.org/wiki/M,n,k-game
+---
+The game is played on a board of `rows` x `cols` cells. Cells are initially empty.
+There are 2 players, X (cross, human) and O (circle, bot), X moves first.
+During a turn, player must place their respective symbol into a free cell.
+The first player to get `k` of their symbols in a horizontal, vertical or diagonal line wins.
+If all cells are filled and nobody has won, a draw is declared.
+Tic Tac Toe is the (3, 3, 3) game, 4x4 "four in a row" is the (4, 4, 4) game.
+
+Cells are numbered row by row, e.g. for a 4x4 board:
+     0  1  2  3
+     4  5  6  7
+     8  9 10 11
+    12 13 14 15
+
+The board is stored as a pair of bitboards (https://en.wikipedia.org/wiki/Bitboard),
+bit number i corresponds to cell number i, just like in `src/games/tictactoe.py`.
+---
+Unlike Tic Tac Toe, larger boards can not be solved exhaustively on every request.
+The engine is a depth limited search:
+
+    1. Negamax with alpha-beta pruning. Link: https://en.wikipedia.org/wiki/Negamax
+        Both players are searched by the same function, scores are from the point of view of the player to move.
+
+    2. Iterative deepening. Link: https://en.wikipedia.org/wiki/Iterative_deepening_depth-first_search
+        Search is repeated with depth 1, 2, 3, ... until the time budget runs out or the game is solved.
+        The best move of the last completed iteration is played.
+
+    3. Move ordering. Moves are tried in the following order:
+        a. An immediate win, if there is one (it is played without further search).
+        b. A block of the opponent's immediate win, if there is one (no other move is searched).
+        c. Best move stored in the transposition table.
+        d. Remaining moves by history score, then by distance to the center.
+
+    4. Transposition table keyed by Zobrist hashes. Link: https://en.wikipedia.org/wiki/Zobrist_hashing
+        The table has a fixed amount of slots (2^table_bits), each slot holds one position.
+        A slot is overwritten when it is stale (left over from an earlier search)
+        or when the new result was searched at least as deep as the stored one.
+        On square boards the key is the smallest of the 8 hashes of symmetric positions
+        (see `src/games/symmetry.py`), so rotations and reflections share one slot.
+
+    5. Concurrent searches. With the thread executor (see `src/engine.py`) several searches run on one instance.
+        Everything a search changes while it runs (deadline, node count, history) lives in a `_Search` object
+        of its own, passed down the recursion. Only the transposition table is shared: a slot holds a single tuple
+        with the key and the entry, so it is replaced at once and a reader never sees half of another write.
+
+Positions at the depth limit are scored by counting lines that are still open for only one of the players.
+"""
+
+from dataclasses import dataclass
+from itertools import count
+from random import Random
+from threading import Lock
+from time import perf_counter
+from typing_extensions import override
+
+from .game import Game
+from .symmetry import TRANSFORMS, square_symmetry
+from .tictactoe import XO, Draw
+
+
+# Score of a won position. Wins found closer to the root score higher,
+# so that the engine prefers the fastest win and the slowest loss.
+_WIN = 1_000_000
+
+# Any score with an absolute value above this threshold is a forced win or loss.
+_WIN_THRESHOLD = _WIN - 10_000
+
+# Transposition table entry kinds, see https://en.wikipedia.org/wiki/Alpha%E2%80%93beta_pruning
+_EXACT = 0  # Stored score is the exact value of the position.
+_LOWER = 1  # Search failed high, the value is at least the stored score.
+_UPPER = 2  # Search failed low, the value is at most the stored score.
+
+# Time is checked every _CHECK_EVERY nodes, so that perf_counter is not called on every node.
+_CHECK_EVERY = 1024
+
+
+# Class MNKState represents full state of an m,n,k-game.
+# MNKState is hashable.
+@dataclass(frozen=True, slots=True)
+class MNKState:
+    """
+    Class MNKState represents full state of an m,n,k-game.
+    Board size is not stored in the state, it belongs to the `MNKGame` instance.
+    MNKState is hashable.
+    """
+
+    x: int  # Bitboard of crosses. Bit i is set <=> cell i holds XO.X.
+    o: int  # Bitboard of circles. Bit i is set <=> cell i holds XO.O.
+    turn: XO  # Current turn. XO.X - cross (human) to move, XO.O - circle (bot) to move.
+
+
+# _Search holds the state of a single search, see "Concurrent searches" in module documentation.
+@dataclass(slots=True)
+class _Search:
+    generation: int  # Tag of table entries stored by this search, entries with other tags are stale.
+    deadline: float  # perf_counter value at which the search must stop.
+    # History heuristic: cells that caused cutoffs recently are tried earlier.
+    # Link: https://www.chessprogramming.org/History_Heuristic
+    history: list[int]
+    nodes: int = 0  # Amount of nodes visited so far.
+
+
+# _SearchTimeout is raised inside the search when the time budget is exhausted.
+# It unwinds the recursion, the result of the last completed iteration is used instead.
+class _SearchTimeout(Exception):
+    pass
+
+
+# MNKGame is an implementation of a Game for an m,n,k-game.
+class MNKGame(Game):
+    """
+    MNKGame is an implementation of a Game for an m,n,k-game.
+    One instance corresponds to one board configuration and owns its engine tables.
+    """
+
+    # Description shown in the game menu, see `Game.DESCRIPTION`. Filled in with constructor arguments.
+    DESCRIPTION = "Tic Tac Toe on a {rows}x{cols} board. First to place {k} in a line wins."
+
+    def __init__(
+        self,
+        rows: int = 4,
+        cols: int = 4,
+        k: int = 4,
+        time_budget: float = 1.0,
+        table_bits: int = 18,
+        name: str | None = None,
+        seed: int = 0,
+    ):
+        """
+        Args:
+            rows: amount of rows on the board.
+            cols: amount of columns on the board.
+            k: amount of symbols in a line required to win.
+            time_budget: seconds `generate_best_move` may spend searching.
+                The first iteration of the search is always completed.
+            table_bits: transposition table holds 2^table_bits positions.
+            name: name of the game. Defaults to "tictactoe<rows>x<cols>" if `k` equals the side of a square board
+                (so the bot, `src/bench.py` and `src/tournament.py` all call the 4x4 game "tictactoe4x4"),
+                and to "mnk<rows>x<cols>x<k>" otherwise.
+            seed: seed for Zobrist keys, same seed produces same keys.
+        """
+        assert rows > 0 and cols > 0, "mnk: invariant failed: board must not be empty"
+        assert 0 < k <= max(rows, cols), "mnk: invariant failed: k does not fit the board"
+
+        self.rows = rows
+        self.cols = cols
+        self.k = k
+        self.time_budget = time_budget
+        self.cells = rows * cols
+        if name is None:
+            name = f"tictactoe{rows}x{cols}" if rows == cols == k else f"mnk{rows}x{cols}x{k}"
+        self._name = name
+        self._full = (1 << self.cells) - 1  # Bitboard with all cells set.
+        self._encoded_size = (2 * self.cells + 1 + 7) // 8  # Bytes taken by an encoded state.
+
+        # _lines holds every k-long segment of the board as a bitboard.
+        # _lines_through[cell] holds only segments passing through the cell.
+        lines: list[int] = []
+        for r in range(rows):
+            for c in range(cols):
+                for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):  # Right, down, diagonal, anti diagonal.
+                    end_r, end_c = r + dr * (k - 1), c + dc * (k - 1)
+                    if 0 <= end_r < rows and 0 <= end_c < cols:
+                        lines.append(sum(1 << (r + dr * i) * cols + c + dc * i for i in range(k)))
+        self._lines = tuple(lines)
+        self._lines_through = tuple(
+            tuple(line for line in lines if line >> cell & 1) for cell in range(self.cells)
+        )
+
+        # _centrality orders cells from the center of the board outwards.
+        # Central cells take part in more lines, so they are usually better moves.
+        center_r, center_c = (rows - 1) / 2, (cols - 1) / 2
+        self._centrality = tuple(
+            sorted(range(self.cells), key=lambda i: abs(i // cols - center_r) + abs(i % cols - center_c))
+        )
+
+        # _weights[n] is the value of an open line holding n symbols of a single player.
+        self._weights = tuple(0 if n == 0 else 4 ** n for n in range(k + 1))
+
+        # Symmetries only exist for square boards, other boards use the identity transform alone.
+        self._symmetry = square_symmetry(rows) if rows == cols else None
+        transforms = TRANSFORMS if self._symmetry is not None else 1
+
+        # _zobrist[t][side][cell] is the key of `side`'s symbol (0 - X, 1 - O) in `cell`,
+        # as seen after applying symmetry transform t to the board.
+        # Keys of a transformed board are keys of the original cells moved by the permutation.
+        rng = Random(seed)
+        base = [[rng.getrandbits(64) for _ in range(self.cells)] for _ in range(2)]
+        self._zobrist = tuple(
+            tuple(
+                tuple(
+                    base[side][self._symmetry.permutations[t][cell] if self._symmetry else cell]
+                    for cell in range(self.cells)
+                )
+                for side in range(2)
+            )
+            for t in range(transforms)
+        )
+        self._zobrist_o_to_move = rng.getrandbits(64)  # XOR-ed into the key when O is to move.
+
+        # Transposition table. Slot i holds the stored position as a single tuple:
+        # (full key, generation, depth, kind, score, best move in canonical orientation).
+        self._table_mask = (1 << table_bits) - 1
+        self._table: list[tuple[int, int, int, int, int, int] | None] = [None] * (1 << table_bits)
+        self._generations = count(1)  # Every search takes the next generation, entries of older searches are stale.
+
+        # Totals over finished searches, see `engine_stats`. Searches of several threads may finish at once.
+        self._searches = 0
+        self._search_nodes = 0
+        self._totals_lock = Lock()
+
+    def __getstate__(self) -> dict:
+        """
+        Returns attributes to pickle, e.g. when the game is sent to engine worker processes (see `src/engine.py`).
+        Locks can not be pickled, the copy gets a new one.
+        """
+        state = self.__dict__.copy()
+        del state["_totals_lock"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._totals_lock = Lock()
+
+    @override  # Mark that a virtual method is overridden.
+    async def name(self) -> str:
+        """
+        Returns name of the game.
+        Time complexity: O(1)
+        """
+        return self._name
+
+    @override  # Mark that a virtual method is overridden.
+    async def description(self) -> str:
+        """
+        Returns a short description of the game: DESCRIPTION filled in with the board configuration.
+        Time complexity: O(1)
+        """
+        return self.DESCRIPTION.format(rows=self.rows, cols=self.cols, k=self.k)
+
+    @override  # Mark that a virtual method is overridden.
+    async def initial_state(self) -> MNKState:
+        """
+        Returns starting state: empty board with X (cross, human) to move.
+        Time complexity: O(1)
+        """
+        return MNKState(x=0, o=0, turn=XO.X)
+
+    @override  # Mark that a virtual method is overridden.
+    async def get_legal_moves(self, state: MNKState) -> list[int]:
+        """
+        Returns list of empty cells in ascending order.
+        This function is not aware of win conditions.
+        Time complexity: O(c) where c is amount of cells.
+        """
+        self._check_state_invariants(state)
+        empty = self._full & ~(state.x | state.o)
+        return [i for i in range(self.cells) if empty >> i & 1]
+
+    @override  # Mark that a virtual method is overridden.
+    async def add_move(self, state: MNKState, move: int) -> MNKState:
+        """
+        Performs a state transition.
+        Provided move must have been returned by get_legal_moves,
+        otherwise an exception will be raised.
+        Time complexity: O(1)
+        """
+        self._check_state_invariants(state)
+        assert (
+            isinstance(move, int) and 0 <= move < self.cells
+        ), "mnk: invariant failed: invalid move"
+        assert not (
+            (state.x | state.o) >> move & 1
+        ), "mnk: invariant failed: move overrides occupied cell"
+
+        if state.turn == XO.X:
+            return MNKState(x=state.x | 1 << move, o=state.o, turn=XO.O)
+        else:
+            return MNKState(x=state.x, o=state.o | 1 << move, turn=XO.X)
+
+    @override  # Mark that a virtual method is overridden.
+    async def generate_best_move(self, state: MNKState) -> int:
+        """
+        Returns the best move found within the time budget.
+        If the search completes, the move is optimal.
+        Time complexity: bounded by `time_budget` (plus one depth 1 iteration).
+        """
+        self._check_state_invariants(state)
+        assert (
+            self._get_winner(state.x, state.o) is None
+        ), "mnk: invariant failed: requesting best move on a terminal position"
+
+        if state.turn == XO.X:
+            me, opp, side = state.x, state.o, 0
+        else:
+            me, opp, side = state.o, state.x, 1
+        return self._search_root(me, opp, side)
+
+    @override  # Mark that a virtual method is overridden.
+    async def is_terminal(self, state: MNKState) -> bool:
+        """
+        Check if game is over, that is somebody has won or the board is full.
+        Time complexity: O(l) where l is amount of lines on the board.
+        """
+        self._check_state_invariants(state)
+        return self._get_winner(state.x, state.o) is not None
+
+    @override  # Mark that a virtual method is overridden.
+    async def get_winner(self, state: MNKState) -> int | None:
+        """
+        Returns winner for terminal positions.
+        If the human (X) won, returns 1.
+        If the computer (O) won, returns -1.
+        If game ended in a draw, returns 0.
+        If more moves are possible, returns None.
+        Time complexity: O(l) where l is amount of lines on the board.
+        """
+        self._check_state_invariants(state)
+        if (res := self._get_winner(state.x, state.o)) == XO.X:
+            return 1
+        elif res == XO.O:
+            return -1
+        elif res is None:
+            return None
+        else:
+            return 0
+
+    @override  # Mark that a virtual method is overridden.
+    async def format_state(self, state: MNKState) -> str:
+        """
+        Format game state for display to user.
+        Same layout as Tic Tac Toe: symbols for occupied cells, indices (padded to 2 glyphs) for empty ones.
+        Returned string should be rendered in monospace font.
+        Time complexity: O(c) where c is amount of cells.
+        """
+        self._check_state_invariants(state)
+
+        def render(i: int) -> str:
+            if state.x >> i & 1:
+                return str(XO.X)
+            if state.o >> i & 1:
+                return str(XO.O)
+            return f"{i:>2}"  # Right aligned index, emoji glyphs are 2 columns wide.
+
+        return "\n".join(
+            " ".join(render(i) for i in range(r * self.cols, (r + 1) * self.cols))
+            for r in range(self.rows)
+        )
+
+    @override  # Mark that a virtual method is overridden.
+    async def parse_move(self, move_str: str) -> int | None:
+        """
+        Parse user input into a move.
+        Returns None if input is invalid.
+        If an int is returned, it is guaranteed to be a valid cell index.
+        Time complexity: O(n) where n is length of the input string.
+        """
+        try:
+            res = int(move_str)
+        except ValueError:
+            return None
+        if not 0 <= res < self.cells:
+            return None
+        return res
+
+    @override  # Mark that a virtual method is overridden.
+    async def encode_state(self, state: MNKState) -> bytes:
+        """
+        Encodes state as a single integer: crosses bitboard, circles bitboard shifted by the amount of cells,
+        and the turn bit above them. Takes (2 * cells + 1) / 8 bytes, rounded up (5 bytes for 4x4).
+        Time complexity: O(c) where c is amount of cells.
+        """
+        self._check_state_invariants(state)
+        packed = state.x | state.o << self.cells | (state.turn == XO.O) << 2 * self.cells
+        return packed.to_bytes(self._encoded_size, "big")
+
+    @override  # Mark that a virtual method is overridden.
+    async def decode_state(self, data: bytes) -> MNKState:
+        """
+        Decodes state produced by encode_state.
+        Raises ValueError if data is not a valid encoded state.
+        Time complexity: O(c) where c is amount of cells.
+        """
+        packed = int.from_bytes(data, "big")
+        x, o, turn = packed & self._full, packed >> self.cells & self._full, packed >> 2 * self.cells
+        if len(data) != self._encoded_size or x & o or turn > 1:
+            raise ValueError("mnk: invalid encoded state")
+        return MNKState(x=x, o=o, turn=XO.O if turn else XO.X)
+
+    @override  # Mark that a virtual method is overridden.
+    async def keyboard_key(self, state: MNKState) -> int:
+        """
+        Returns the bitboard of empty cells, legal moves are exactly the empty cells.
+        Time complexity: O(1)
+        """
+        return self._full & ~(state.x | state.o)
+
+    @override  # Mark that a virtual method is overridden.
+    async def warm_up(self) -> None:
+        """
+        Searches the empty board for the full time budget.
+        Positions of the opening stay in the transposition table,
+        so replies to the first moves start from a deeper search.
+        Time complexity: bounded by `time_budget`.
+        """
+        self._search_root(0, 0, 0)
+
+    @override  # Mark that a virtual method is overridden.
+    async def engine_stats(self) -> dict[str, float]:
+        """
+        Returns transposition table size and occupancy, amount of finished searches and nodes they visited.
+        All values may be summed over several instances (see `src/engine.py`).
+        Time complexity: O(n) where n is amount of table slots (counted at C speed).
+        """
+        slots = len(self._table)
+        return {
+            "table_slots": slots,
+            "table_used": slots - self._table.count(None),
+            "searches": self._searches,
+            "search_nodes": self._search_nodes,
+        }
+
+    def _check_state_invariants(self, state: MNKState) -> None:
+        """
+        Verifies basic properties of the provided state, raises an exception if anything is wrong.
+        Does not verify whether state is reachable in normal gameplay.
+        Time complexity: O(1)
+        """
+        assert isinstance(state, MNKState), "mnk: invariant failed: state is not of type MNKState"
+        assert (
+            0 <= state.x <= self._full and 0 <= state.o <= self._full
+        ), "mnk: invariant failed: invalid field size"
+        assert not state.x & state.o, "mnk: invariant failed: field contains invalid elements"
+        assert isinstance(state.turn, XO), "mnk: invariant failed: current turn is not X or O"
+
+    def _get_winner(self, x: int, o: int) -> XO | Draw | None:
+        """
+        Returns XO.X or XO.O if respective player has a line,
+        Draw() if the board is full without a winner and None otherwise.
+        Time complexity: O(l) where l is amount of lines on the board.
+        """
+        for line in self._lines:
+            if x & line == line:
+                return XO.X
+            if o & line == line:
+                return XO.O
+        if x | o == self._full:
+            return Draw()
+        return None
+
+    def _wins(self, board: int, cell: int) -> bool:
+        """
+        Returns True if placing a symbol into `cell` completes a line on `board`.
+        Time complexity: O(l) where l is amount of lines through the cell.
+        """
+        board |= 1 << cell
+        for line in self._lines_through[cell]:
+            if board & line == line:
+                return True
+        return False
+
+    def _evaluate(self, me: int, opp: int) -> int:
+        """
+        Static evaluation of a non-terminal position from the point of view of the player to move.
+        Lines still open for a single player are worth 4^(symbols in the line).
+        Time complexity: O(l) where l is amount of lines on the board.
+        """
+        score = 0
+        weights = self._weights
+        for line in self._lines:
+            if not line & opp:
+                score += weights[(line & me).bit_count()]
+            elif not line & me:
+                score -= weights[(line & opp).bit_count()]
+        return score
+
+    def _ordered(self, empty: int, first: int, history: list[int]) -> list[int]:
+        """
+        Returns empty cells in search order: `first` (if it is empty), then by history and centrality.
+        Time complexity: O(c log c) where c is amount of cells.
+        """
+        moves = sorted(
+            (cell for cell in self._centrality if empty >> cell & 1),
+            key=lambda cell: -history[cell],
+        )  # sorted() is stable, so cells with equal history stay in centrality order.
+        if first >= 0 and empty >> first & 1:
+            moves.remove(first)
+            moves.insert(0, first)
+        return moves
+
+    def _search_root(self, me: int, opp: int, side: int) -> int:
+        """
+        Iterative deepening driver. Returns best move for the player to move (`me`).
+        `side` is 0 if X is to move and 1 if O is to move.
+        """
+        search = _Search(
+            generation=next(self._generations),
+            deadline=perf_counter() + self.time_budget,
+            history=[0] * self.cells,
+        )
+        try:
+            return self._deepen(search, me, opp, side)
+        finally:
+            with self._totals_lock:
+                self._searches += 1
+                self._search_nodes += search.nodes
+
+    def _deepen(self, search: _Search, me: int, opp: int, side: int) -> int:
+        """
+        Runs iterations of increasing depth until the time budget runs out or the game is solved.
+        Returns the best move of the last completed iteration.
+        """
+        empty = self._full & ~(me | opp)
+        moves = self._ordered(empty, -1, search.history)
+
+        # Trivial cases do not need a search.
+        for cell in moves:
+            if self._wins(me, cell):  # Win right away.
+                return cell
+        threats = [cell for cell in moves if self._wins(opp, cell)]
+        if threats:  # Block the opponent. If there are several threats, the game is lost anyway.
+            return threats[0]
+        if len(moves) == 1:
+            return moves[0]
+
+        hashes = self._hashes(me, opp, side)
+        best = moves[0]
+        for depth in range(1, len(moves) + 1):
+            try:
+                score, move = self._search_moves(search, me, opp, side, hashes, moves, depth)
+            except _SearchTimeout:
+                if depth > 1:  # Unfinished iteration, keep result of the previous one.
+                    break
+                # The first iteration is always completed, so that some search result exists.
+                search.deadline = float("inf")
+                score, move = self._search_moves(search, me, opp, side, hashes, moves, depth)
+            best = move
+            # Search the best move first in the next iteration.
+            moves.remove(move)
+            moves.insert(0, move)
+            if abs(score) >= _WIN_THRESHOLD:  # Forced result found, deeper search will not change it.
+                break
+        return best
+
+    def _search_moves(
+        self, search: _Search, me: int, opp: int, side: int, hashes: list[int], moves: list[int], depth: int
+    ) -> tuple[int, int]:
+        """
+        Searches all root moves to `depth` and returns (best score, best move).
+        """
+        alpha, beta = -_WIN - 1, _WIN + 1
+        best_move = moves[0]
+        for cell in moves:
+            score = -self._negamax(
+                search, opp, me | 1 << cell, 1 - side, self._move_hashes(hashes, side, cell), depth - 1, -beta, -alpha,
+                1,
+            )
+            if score > alpha:
+                alpha, best_move = score, cell
+        return alpha, best_move
+
+    def _hashes(self, me: int, opp: int, side: int) -> list[int]:
+        """
+        Computes Zobrist keys of a position under every symmetry transform.
+        Time complexity: O(tc) where t is amount of transforms and c is amount of cells.
+        """
+        boards = (me, opp) if side == 0 else (opp, me)  # (crosses, circles).
+        hashes = []
+        for keys in self._zobrist:
+            h = self._zobrist_o_to_move if side == 1 else 0
+            for player in range(2):
+                for cell in range(self.cells):
+                    if boards[player] >> cell & 1:
+                        h ^= keys[player][cell]
+            hashes.append(h)
+        return hashes
+
+    def _move_hashes(self, hashes: list[int], side: int, cell: int) -> list[int]:
+        """
+        Incrementally updates keys after `side` places a symbol into `cell`.
+        Time complexity: O(t) where t is amount of transforms.
+        """
+        flip = self._zobrist_o_to_move
+        return [h ^ keys[side][cell] ^ flip for h, keys in zip(hashes, self._zobrist)]
+
+    def _negamax(
+        self, search: _Search, me: int, opp: int, side: int, hashes: list[int], depth: int, alpha: int, beta: int,
+        ply: int,
+    ) -> int:
+        """
+        Returns score of the position for the player to move (`me`),
+        searched to `depth` with alpha-beta window (alpha, beta).
+        The opponent's last move is known not to have won the game.
+        """
+        search.nodes += 1
+        if search.nodes % _CHECK_EVERY == 0 and perf_counter() > search.deadline:
+            raise _SearchTimeout()
+
+        empty = self._full & ~(me | opp)
+        if not empty:  # Board is full, nobody has won.
+            return 0
+
+        # Immediate win.
+        cells = [cell for cell in self._centrality if empty >> cell & 1]
+        for cell in cells:
+            if self._wins(me, cell):
+                return _WIN - ply
+
+        # Opponent's immediate wins must be blocked. Two of them can not be blocked at once.
+        threats = [cell for cell in cells if self._wins(opp, cell)]
+        if len(threats) > 1:
+            return -(_WIN - ply - 1)
+
+        if depth <= 0:
+            return self._evaluate(me, opp)
+
+        # Transposition table lookup. The key is the smallest of the symmetric keys,
+        # `t` is the transform that maps this position onto the stored one.
+        key = min(hashes)
+        t = hashes.index(key)
+        slot = key & self._table_mask
+        tt_move = -1
+        original_alpha = alpha
+        if (entry := self._table[slot]) is not None and entry[0] == key:
+            _, _, stored_depth, kind, score, stored_move = entry
+            if stored_move >= 0:
+                tt_move = self._symmetry.restore_move(stored_move, t) if self._symmetry else stored_move
+            if stored_depth >= depth:
+                # Forced results are stored relative to the stored position, adjust to current ply.
+                if score > _WIN_THRESHOLD:
+                    score -= ply
+                elif score < -_WIN_THRESHOLD:
+                    score += ply
+                if kind == _EXACT:
+                    return score
+                if kind == _LOWER and score >= beta:
+                    return score
+                if kind == _UPPER and score <= alpha:
+                    return score
+
+        moves = threats if threats else self._ordered(empty, tt_move, search.history)
+        best_score = -_WIN - 1
+        best_move = moves[0]
+        for cell in moves:
+            score = -self._negamax(
+                search, opp, me | 1 << cell, 1 - side, self._move_hashes(hashes, side, cell), depth - 1, -beta, -alpha,
+                ply + 1,
+            )
+            if score > best_score:
+                best_score, best_move = score, cell
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                search.history[cell] += depth * depth  # Deeper cutoffs are more valuable.
+                break
+
+        self._store(search, slot, key, t, depth, original_alpha, beta, best_score, best_move, ply)
+        return best_score
+
+    def _store(
+        self, search: _Search, slot: int, key: int, t: int, depth: int, alpha: int, beta: int, score: int, move: int,
+        ply: int,
+    ) -> None:
+        """
+        Stores a search result in the transposition table.
+        Replacement policy: an occupied slot is overwritten only when it holds a stale entry
+        (from another search) or an entry searched no deeper than the new one.
+        """
+        entry = self._table[slot]
+        if entry is not None and entry[1] == search.generation and entry[2] > depth:
+            return
+
+        if score <= alpha:
+            kind = _UPPER
+        elif score >= beta:
+            kind = _LOWER
+        else:
+            kind = _EXACT
+
+        # Forced results are stored relative to the position, not to the root.
+        if score > _WIN_THRESHOLD:
+            score += ply
+        elif score < -_WIN_THRESHOLD:
+            score -= ply
+
+        # Moves are stored in canonical orientation, see _negamax for the reverse mapping.
+        if self._symmetry is not None:
+            move = self._symmetry.permutations[t][move]
+
+        self._table[slot] = (key, search.generation, depth, kind, score, move)
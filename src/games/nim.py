@@ -132,6 +132,9 @@ class NimState:
 
 # Main Nim game logic implementing the abstract Game interface.
 class Nim(Game):
+    # Description shown in the game menu, see `Game.DESCRIPTION`.
+    DESCRIPTION = "Remove stones from piles. Last move wins."
+
     def __init__(self):
         # Total number of piles in the game.
         self.piles_size = 4
@@ -148,8 +151,8 @@ class Nim(Game):
     # Returns a short description for the /start game list.
     @override
     async def description(self) -> str:
-        """Return a short textual description of the game."""
-        return "Remove stones from piles. Last move wins."
+        """Return a short textual description of the game, see DESCRIPTION."""
+        return self.DESCRIPTION
 
 
     # Defines the initial starting state of the Nim game.
@@ -231,6 +234,8 @@ class Nim(Game):
         Algorithm:
             - Compute XOR of all pile sizes.
             - Find a pile that can be reduced to make Nim-sum = 0.
+            - If Nim-sum is already 0 (losing position), no such pile exists:
+              remove a single stone from the largest pile, to make the game last as long as possible.
         """
         nim_sum = 0
         for pile in state.piles:
@@ -242,6 +247,10 @@ class Nim(Game):
             if target < pile:
                 return Move(i, pile - target)
 
+        # Losing position: any move loses against perfect play.
+        largest = max(range(len(state.piles)), key=lambda i: state.piles[i])
+        return Move(largest, 1)
+
     # Check if game reached terminal (end) state.
     @override
     async def is_terminal(self, state: NimState) -> bool:
@@ -280,4 +289,37 @@ class Nim(Game):
         return "\n".join(
             f"Pile {i}: {'●' * pile} ({pile})"
             for i, pile in enumerate(state.piles)
-        )
\ No newline at end of file
+        )
+
+
+    # Encode state into bytes: turn flag followed by one byte per pile.
+    @override
+    async def encode_state(self, state: NimState) -> bytes:
+        """
+        Return compact binary form of the state.
+
+        Example:
+            NimState((1, 3, 5, 7), bot_turn=False) -> b"\\x00\\x01\\x03\\x05\\x07"
+        """
+        return bytes((int(state.bot_turn), *state.piles))
+
+
+    # Decode state produced by encode_state.
+    @override
+    async def decode_state(self, data: bytes) -> NimState:
+        """
+        Restore a state from its binary form.
+
+        Raises:
+            ValueError: If data does not describe a state of this game.
+        """
+        if len(data) != self.piles_size + 1 or data[0] > 1:
+            raise ValueError("Invalid encoded state")
+        return NimState(tuple(data[1:]), bot_turn=bool(data[0]))
+
+
+    # Legal moves depend only on pile sizes.
+    @override
+    async def keyboard_key(self, state: NimState) -> Tuple[int, ...]:
+        """Return pile sizes, which fully determine the list of legal moves."""
+        return state.piles
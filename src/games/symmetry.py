@@ -0,0 +1,193 @@
+"""
+               GLWT(Good Luck With That) Public License
+                 Copyright (c) Everyone, except Author
+
+Everyone is permitted to copy, distribute, modify, merge, sell, publish,
+sublicense or whatever they want with this software but at their OWN RISK.
+
+                            Preamble
+
+The author has absolutely no clue what the code in this project does.
+It might just work or not, there is no third option.
+
+
+                GOOD LUCK WITH THAT PUBLIC LICENSE
+   TERMS AND CONDITIONS FOR COPYING, DISTRIBUTION, AND MODIFICATION
+
+  0. You just DO WHATEVER YOU WANT TO as long as you NEVER LEAVE A
+TRACE TO TRACK THE AUTHOR of the original product to blame for or hold
+responsible.
+
+IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+
+Good luck and Godspeed.
+"""
+
+"""
+Module `src/games/symmetry.py` provides board symmetries for square-board games.
+---
+A square board has 8 symmetries, together they form the dihedral group D4
+(https://en.wikipedia.org/wiki/Dihedral_group): 4 rotations and 4 reflections.
+Two positions that are mapped onto each other by one of the symmetries
+have the same outcome, and their optimal moves are mapped onto each other as well.
+
+Engines use this to store only one representative (the "canonical" position) of each
+group of symmetric positions, which cuts the size of caches and the amount of search roughly 8 times.
+
+Boards are described as bitboards (https://en.wikipedia.org/wiki/Bitboard):
+bit number `row * size + col` corresponds to cell (row, col).
+A position is a tuple of bitboards, for example (crosses, circles) for Tic Tac Toe.
+
+Typical usage example:
+```
+from .symmetry import square_symmetry
+
+sym = square_symmetry(3)
+(x, o), t = sym.canonical(x, o)       # Canonical position and transform that produced it.
+moves = lookup_optimal_moves(x, o)    # Bitboard of moves in canonical orientation.
+moves = sym.restore(moves, t)         # Same moves, in orientation of the original position.
+```
+---
+All permutations are precomputed once per board size. Bitboards are transformed 8 bits at a time
+through lookup tables, so transforming a 3x3 board costs 2 table reads.
+"""
+
+from functools import cache
+
+# Number of symmetries of a square.
+TRANSFORMS = 8
+
+# Bitboards are transformed in chunks of CHUNK_BITS bits.
+# 8 bits keeps every lookup table at 256 entries.
+CHUNK_BITS = 8
+_CHUNK_MASK = (1 << CHUNK_BITS) - 1
+
+
+# SquareSymmetry holds the 8 symmetries of a square board of a given size.
+# Instances are immutable and may be shared between games, see square_symmetry.
+class SquareSymmetry:
+    """
+    SquareSymmetry holds the 8 symmetries of a square board of a given size.
+
+    Transform number 0 is always the identity.
+    `permutations[t][i]` is the cell that cell `i` is moved to by transform `t`.
+    `inverse[t]` is the transform that undoes transform `t`.
+    """
+
+    def __init__(self, size: int):
+        assert size > 0, "symmetry: invariant failed: board size must be positive"
+
+        self.size = size  # Length of a side of the board.
+        self.cells = size * size  # Total amount of cells.
+
+        # Each symmetry is described as a function of (row, col) -> (row, col).
+        # n is the last valid row/column index.
+        n = size - 1
+        maps = (
+            lambda r, c: (r, c),  # Identity.
+            lambda r, c: (c, n - r),  # Rotation by 90 degrees clockwise.
+            lambda r, c: (n - r, n - c),  # Rotation by 180 degrees.
+            lambda r, c: (n - c, r),  # Rotation by 270 degrees clockwise.
+            lambda r, c: (r, n - c),  # Reflection over the vertical axis.
+            lambda r, c: (n - r, c),  # Reflection over the horizontal axis.
+            lambda r, c: (c, r),  # Reflection over the main diagonal.
+            lambda r, c: (n - c, n - r),  # Reflection over the anti diagonal.
+        )
+
+        # Convert each function into an index permutation.
+        self.permutations: tuple[tuple[int, ...], ...] = tuple(
+            tuple(
+                (lambda rc: rc[0] * size + rc[1])(f(i // size, i % size))
+                for i in range(self.cells)
+            )
+            for f in maps
+        )
+
+        # inverse[t] is the only transform u for which permutations[u][permutations[t][i]] == i.
+        self.inverse: tuple[int, ...] = tuple(
+            next(
+                u
+                for u in range(TRANSFORMS)
+                if all(self.permutations[u][p[i]] == i for i in range(self.cells))
+            )
+            for p in self.permutations
+        )
+
+        # _chunks[t][k][byte] is the image under transform t of `byte` placed at chunk k of a bitboard.
+        # A bitboard is transformed by OR-ing images of all its chunks.
+        chunks = (self.cells + CHUNK_BITS - 1) // CHUNK_BITS
+        self._chunks: tuple[tuple[tuple[int, ...], ...], ...] = tuple(
+            tuple(
+                tuple(
+                    sum(
+                        1 << p[k * CHUNK_BITS + b]
+                        for b in range(CHUNK_BITS)
+                        if byte >> b & 1 and k * CHUNK_BITS + b < self.cells
+                    )
+                    for byte in range(1 << CHUNK_BITS)
+                )
+                for k in range(chunks)
+            )
+            for p in self.permutations
+        )
+
+    def transform(self, mask: int, t: int) -> int:
+        """
+        Returns image of a bitboard under transform t.
+        Time complexity: O(c) where c is amount of 8 bit chunks in a bitboard.
+        """
+        res = 0
+        for table in self._chunks[t]:
+            res |= table[mask & _CHUNK_MASK]
+            mask >>= CHUNK_BITS
+        return res
+
+    def restore(self, mask: int, t: int) -> int:
+        """
+        Undoes transform t, i.e. maps a bitboard in canonical orientation
+        back to the orientation of the original position.
+        Time complexity: O(c) where c is amount of 8 bit chunks in a bitboard.
+        """
+        return self.transform(mask, self.inverse[t])
+
+    def restore_move(self, cell: int, t: int) -> int:
+        """
+        Maps a single cell index in canonical orientation back
+        to the orientation of the original position.
+        Time complexity: O(1)
+        """
+        return self.permutations[self.inverse[t]][cell]
+
+    def canonical(self, *masks: int) -> tuple[tuple[int, ...], int]:
+        """
+        Returns the canonical representative of a position and the transform that produced it.
+
+        Canonical representative is the lexicographically smallest tuple of transformed bitboards
+        over all 8 transforms. All symmetric positions share the same representative.
+
+        Args:
+            masks: bitboards describing the position, e.g. (crosses, circles).
+
+        Returns:
+            tuple[tuple[int, ...], int]: canonical bitboards and index of the transform t,
+                such that canonical == tuple(transform(mask, t) for mask in masks).
+        """
+        best = masks
+        best_t = 0
+        for t in range(1, TRANSFORMS):
+            image = tuple(self.transform(mask, t) for mask in masks)
+            if image < best:
+                best, best_t = image, t
+        return best, best_t
+
+
+@cache
+def square_symmetry(size: int) -> SquareSymmetry:
+    """
+    Returns symmetries of a square board with a side of `size` cells.
+    Tables are built once per size and shared by all callers.
+    """
+    return SquareSymmetry(size)
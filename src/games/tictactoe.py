@@ -93,20 +93,30 @@ human player to go first (cross or X) and computer to respond (circle or O).
 
 It can be proven, that a tie may be forced for both players.
 
-The following code assumes a board to be laid out in an 9 element array or tuple.
+The following code assumes a board to be laid out in 9 cells.
 Here is a diagram showing indices corresponding to cells:
     0 1 2
     3 4 5
     6 7 8
+
+The board is stored as a pair of bitboards (https://en.wikipedia.org/wiki/Bitboard).
+Each bitboard is a 9-bit integer, bit number i corresponds to cell number i:
+    - bit i of `x` is set <=> cell i holds a cross.
+    - bit i of `o` is set <=> cell i holds a circle.
+    - cell i is empty <=> bit i is set in neither of them.
+Win detection, legal move enumeration and move application are plain integer operations,
+so no intermediate tuples or lists are allocated while the engine is searching.
 """
 
+from array import array
 from random import choice  # Required only if DETERMINISTIC is False
-from typing import cast
 from dataclasses import dataclass
 from enum import Enum
+from threading import Lock
 from typing_extensions import override
 
 from .game import Game
+from .symmetry import TRANSFORMS, square_symmetry
 
 
 # DETERMINISTIC determines whether bot algorithm acts deterministically,
@@ -166,30 +176,20 @@ class Draw:
     """
 
 
-# TypeField is a type alias for a field.
-# It consists of a 9-tuple that is homogeneous.
-# Each element is of type XO | None.
-# Value of XO.X represents that X (cross) is placed in the cell.
-# Value of XO.O represents that O (circle) is placed in the cell.
-# Value of None represents an empty cell.
-TypeField = tuple[
-    XO | None,  # Index 0, upper left cell.
-    XO | None,  # Index 1, upper central cell.
-    XO | None,  # Index 2, upper right cell.
-    XO | None,  # Index 3, middle left cell.
-    XO | None,  # Index 4, central cell.
-    XO | None,  # Index 5, middle right cell.
-    XO | None,  # Index 6, bottom left cell.
-    XO | None,  # Index 7, bottom central cell.
-    XO | None,  # Index 8, bottom right cell.
-]
+# _DRAW is the shared instance of Draw.
+# All instances of Draw are equal, so reusing one saves an allocation per call.
+_DRAW = Draw()
+
+# _FULL is the bitboard with all 9 cells set.
+# x | o == _FULL <=> there are no empty cells left.
+_FULL = 0b111_111_111
 
 
 # Class TicTacToeState represents full state of a Tic Tac Toe game.
 # TicTacToe may represent unreachable states,
 # but all representable states are valid to use in the Engine.
 # TicTacToeState is hashable.
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class TicTacToeState:
     """
     Class TicTacToeState represents full state of a Tic Tac Toe game.
@@ -198,9 +198,25 @@ class TicTacToeState:
     TicTacToeState is hashable.
     """
 
-    field: TypeField  # Current state of the field.
+    x: int  # Bitboard of crosses. Bit i is set <=> cell i holds XO.X.
+    o: int  # Bitboard of circles. Bit i is set <=> cell i holds XO.O.
     turn: XO  # Current turn. XO.X - cross (player 1) to move, XO.O - circle (player 2) to move.
 
+    # cell returns content of the cell number i.
+    # Returns XO.X for a cross, XO.O for a circle and None for an empty cell.
+    # Time complexity: O(1)
+    def cell(self, i: int) -> XO | None:
+        """
+        Returns content of the cell number i.
+        XO.X for a cross, XO.O for a circle and None for an empty cell.
+        Time complexity: O(1)
+        """
+        if self.x >> i & 1:  # Bit i is set on the crosses bitboard.
+            return XO.X
+        if self.o >> i & 1:  # Bit i is set on the circles bitboard.
+            return XO.O
+        return None  # Neither bitboard claims the cell.
+
     # __repr__ provides a human-readable representation of a field.
     # The following holds: (x == y) <=> (repr(x) == repr(y))
     # for all x, y that are valid TicTacToeState's.
@@ -209,7 +225,7 @@ class TicTacToeState:
     def __repr__(self) -> str:
         # This statement is equivalent to the following pseudocode:
         # result = ε (empty string)
-        # for each cell c of self.field:
+        # for each cell c of the field:
         #   if c is X: append "X" to the result
         #   if c is O: append "O" to the result
         #   if c is empty: append "." to the result
@@ -221,7 +237,8 @@ class TicTacToeState:
         #   - ", "
         #   - turn
         #   ")"
-        return f"State({''.join('.' if x is None else str(x) for x in self.field )}, {self.turn})"
+        cells = "".join("." if (c := self.cell(i)) is None else str(c) for i in range(9))
+        return f"State({cells}, {self.turn})"
 
 
 # _win_patterns is an array of win condition patterns.
@@ -240,6 +257,17 @@ _win_patterns = [
     (2, 4, 6),  # Top right diagonal.
 ]
 
+# _win_masks holds _win_patterns converted to bitboards.
+# Pattern p is filled by a player <=> (bitboard & mask) == mask.
+_win_masks = tuple(sum(1 << i for i in pat) for pat in _win_patterns)
+
+# _moves_by_empty maps a bitboard of empty cells to the sorted tuple of its indices.
+# There are only 2^9 = 512 possible bitboards, so every answer is computed once at import.
+# For example, _moves_by_empty[0b000_010_001] == (0, 4).
+_moves_by_empty = tuple(
+    tuple(i for i in range(9) if empty >> i & 1) for empty in range(_FULL + 1)
+)
+
 
 # TicTacToe is an implementation of a Game for a game of TicTacToe.
 class TicTacToe(Game):
@@ -247,6 +275,9 @@ class TicTacToe(Game):
     TicTacToe is an implementation of a Game for a game of TicTacToe.
     """
 
+    # Description shown in the game menu, see `Game.DESCRIPTION`.
+    DESCRIPTION = "A classic notebook game. Players take turns placing Xs and Os. First to place 3 in a line wins."
+
     @override  # Mark that a virtual method is overridden.
     async def name(self) -> str:
         """
@@ -259,32 +290,23 @@ class TicTacToe(Game):
     @override  # Mark that a virtual method is overridden.
     async def description(self) -> str:
         """
-        Returns a short description of Tic Tac Toe.
+        Returns a short description of Tic Tac Toe, see DESCRIPTION.
         For a comprehensive description of the rules, see module level documentation.
         String is guaranteed to be constant between invocations.
         String is not guaranteed to be constant between different versions of the library.
         Time complexity: O(1)
         """
-        return (
-            "A classic notebook game. "
-            "Players take turns placing Xs and Os. "
-            "First to place 3 in a line wins."
-        )
+        return self.DESCRIPTION
 
     @override  # Mark that a virtual method is overridden.
     async def initial_state(self) -> TicTacToeState:
         """
         Returns starting state.
-        Starting state is empty field (None, None, None, None, None, None, None, None, None)
+        Starting state is empty field (both bitboards are zero)
         with X (cross, player 1) to move.
         Time complexity: O(1)
         """
-        return TicTacToeState(
-            # Equivalent to (None, None, None, None, None, None, None, None, None)
-            field=cast(TypeField, tuple(None for _ in range(9))),
-            # X to move.
-            turn=XO.X,
-        )
+        return TicTacToeState(x=0, o=0, turn=XO.X)  # Empty field, X to move.
 
     @override  # Mark that a virtual method is overridden.
     async def get_legal_moves(self, state: TicTacToeState) -> list[int]:
@@ -299,11 +321,9 @@ class TicTacToe(Game):
 
         _check_state_invariants(state)  # Verify that state is valid.
 
-        res: list[int] = []  # Accumulator for the result.
-        for i in range(9):  # For each cell. range(9) will iterate from 0 to 8.
-            if state.field[i] is None:  # Cell i is empty.
-                res.append(i)  # Add it to the accumulator
-        return res  # Return the accumulated result.
+        # Empty cells are the ones that are set in neither bitboard.
+        # The answer is precomputed, a fresh list is returned so that callers may modify it.
+        return list(_moves_by_empty[_FULL & ~(state.x | state.o)])
 
     @override  # Mark that a virtual method is overridden.
     async def add_move(self, state: TicTacToeState, move: int) -> TicTacToeState:
@@ -317,23 +337,11 @@ class TicTacToe(Game):
         assert (  # Verify that move is in bounds.
             isinstance(move, int) and 0 <= move < 9
         ), "tictactoe: invariant failed: invalid move"
-        assert (  # Verify that replaced cell is empty.
-            state.field[move] is None
+        assert not (  # Verify that replaced cell is empty.
+            (state.x | state.o) >> move & 1
         ), "tictactoe: invariant failed: move overrides occupied cell"
 
-        # Copy the state.
-        # Tuples are immutable so a list has to be used.
-        field = list(state.field)
-
-        field[move] = state.turn  # Make the move.
-
-        return TicTacToeState(
-            # Static analyzers may miss that tuple(field) is of type TypeField,
-            # so an explicit cast is required.
-            field=cast(TypeField, tuple(field)),
-            # Flip the turn. This makes player alternate.
-            turn=_other(state.turn),
-        )
+        return _apply(state.x, state.o, state.turn, move)
 
     @override  # Mark that a virtual method is overridden.
     async def generate_best_move(self, state: TicTacToeState) -> int:
@@ -341,47 +349,25 @@ class TicTacToe(Game):
         Returns one of optimal moves in the state.
         If at least one valid move is possible, return index of the cell that should be filled.
         If no moves are possible, returns None.
-        Note that first query computes the whole game tree,
-        but subsequent results may be cached for performance.
-        This cache may leak memory, but the game tree is not that large.
-        (at most 6000 for normal gameplay)
+        Note that first query solves the whole game into a table of fixed size,
+        all subsequent queries are a single table lookup.
         Time complexity: O(1)
         """
         _check_state_invariants(state)  # Verify that state is valid.
         assert (  # Verify that position is not terminal.
-            _get_winner(state.field) is None
+            _get_winner(state.x, state.o) is None
         ), "tictactoe: invariant failed: requesting best move on a terminal position"
 
         # General description of the algorithm:
-        # 1. Determine whether position is winning, losing or a draw.
-        # 2. Collect all possible moves that lead to the best possible outcome.
+        # 1. Look up the position in the precomputed outcome table.
+        # 2. The entry already holds a bitboard of all moves that lead to the best possible outcome.
         # 3. Select some move from the list depending on value of DETERMINISTIC.
 
-        # Determine winner of the position.
-        # This is the most expensive part of the function,
-        # but will be cached on subsequent calls.
-        target = _compute_memo(state)
-
-        options: list[int] = []  # Accumulator for best possible moves.
-        for i in range(9):  # range(9) iterates integers from 0 to 8.
-            if state.field[i] is not None:  # Current cell is occupied.
-                continue  # We can only make moves in empty cells, so this option is not valid.
-
-            # Make a move and determine the next state.
-
-            f = list(state.field)  # List instead of tuple for modification.
-            f[i] = state.turn  # Override cell number i.
-            next_state = TicTacToeState(  # Construct a new state.
-                field=cast(
-                    TypeField, tuple(f)
-                ),  # Static analyzers are not smart enough to determine that this is fine.
-                turn=_other(state.turn),  # Don't forget to flip the turn!
-            )
+        # This is the most expensive part of the function on the very first call,
+        # when the whole game is solved. Afterwards it is a single array read.
+        entry = _table()[_index(state.x, state.o, state.turn)]
 
-            # This call is guaranteed to not recurse, because it is already cached.
-            # Check that result is what we are searching for.
-            if _compute_memo(next_state) == target:
-                options.append(i)  # Remember it for later.
+        options = _moves_by_empty[entry & _MOVES_MASK]  # Best possible moves.
 
         # Due to the position not being terminal, at least one move is possible.
         # Because of this, len(options) >= 1.
@@ -417,7 +403,7 @@ class TicTacToe(Game):
         #  - Draw() (game ended in a draw)
         # and False for the following:
         #  - None (winner is not determined yet)
-        return _get_winner(state.field) is not None
+        return _get_winner(state.x, state.o) is not None
 
     @override  # Mark that a virtual method is overridden.
     async def get_winner(self, state: TicTacToeState) -> int | None:
@@ -441,11 +427,11 @@ class TicTacToe(Game):
         # lhs stands for left hand side of the walrus operator (:=).
         # rhs stands for right hand side of the walrus operator (:=).
 
-        if (res := _get_winner(state.field)) == XO.X:  # X (cross) has won.
+        if (res := _get_winner(state.x, state.o)) == XO.X:  # X (cross) has won.
             return 1  # Return positive one (human won).
         elif res == XO.O:  # O (circle) has won.
             return -1  # Return negative one (computer won).
-        elif res == Draw():  # Game ended in a draw.
+        elif res == _DRAW:  # Game ended in a draw.
             return 0  # Return zero (draw).
         else:  # Winner is not XO.X, XO.O or Draw(), that is game is ongoing.
             return None  # Return None.
@@ -466,8 +452,8 @@ class TicTacToe(Game):
         # and then joins the strings into a multiline string.
 
         # Here is equivalent pseudocode:
-        # Let f(x) be a cross glyph if field[x] is an X.
-        # Let f(x) be a circle glyph if field[x] is an O.
+        # Let f(x) be a cross glyph if cell x holds an X.
+        # Let f(x) be a circle glyph if cell x holds an O.
         # Let f(x) be a str(x) otherwise, padded to 2 glyphs using spaces.
         # Return concatenation of the following strings:
         #   - f(0)
@@ -497,7 +483,7 @@ class TicTacToe(Game):
             (
                 " ".join(  # Join columns of a single row
                     (
-                        " " + str(i) if state.field[i] is None else str(state.field[i])
+                        " " + str(i) if (c := state.cell(i)) is None else str(c)
                     )  # Render a singular cell
                     for i in range(j * 3, (j + 1) * 3)
                 )
@@ -524,6 +510,59 @@ class TicTacToe(Game):
             return None  # Provided value is out of range.
         return res  # Provided value is valid.
 
+    @override  # Mark that a virtual method is overridden.
+    async def encode_state(self, state: TicTacToeState) -> bytes:
+        """
+        Encodes state into 2 bytes: its index in the outcome table (base-3 code of the field
+        plus 3^9 if O is to move), which is below 2 * 3^9 = 39366 < 2^16.
+        Time complexity: O(1)
+        """
+        _check_state_invariants(state)  # Check that provided state is valid.
+        return _index(state.x, state.o, state.turn).to_bytes(2, "big")
+
+    @override  # Mark that a virtual method is overridden.
+    async def decode_state(self, data: bytes) -> TicTacToeState:
+        """
+        Decodes state produced by encode_state.
+        Raises ValueError if data is not a valid encoded state.
+        Time complexity: O(1)
+        """
+        if len(data) != 2 or (index := int.from_bytes(data, "big")) >= 2 * _CODES:
+            raise ValueError("tictactoe: invalid encoded state")
+
+        turn = XO.O if index >= _CODES else XO.X
+        x, o = _decode_field(index % _CODES)
+        return TicTacToeState(x=x, o=o, turn=turn)
+
+    @override  # Mark that a virtual method is overridden.
+    async def keyboard_key(self, state: TicTacToeState) -> int:
+        """
+        Returns the bitboard of empty cells. Legal moves are exactly the empty cells,
+        so equal bitboards mean equal move lists. At most 512 distinct keys exist.
+        Time complexity: O(1)
+        """
+        return _FULL & ~(state.x | state.o)
+
+    @override  # Mark that a virtual method is overridden.
+    async def warm_up(self) -> None:
+        """
+        Solves the whole game into the outcome table,
+        so that the first call to generate_best_move is a table lookup as well.
+        Time complexity: O(n) where n = 2 * 3^9 is the number of table entries.
+        """
+        _table()
+
+    @override  # Mark that a virtual method is overridden.
+    async def engine_stats(self) -> dict[str, float]:
+        """
+        Returns size of the outcome table: amount of entries and bytes, zeroes until the table is built.
+        Time complexity: O(1)
+        """
+        return {
+            "table_entries": len(_outcome_table),
+            "table_bytes": len(_outcome_table) * _outcome_table.itemsize,
+        }
+
 
 def _check_state_invariants(state: TicTacToeState) -> None:
     """
@@ -540,12 +579,15 @@ def _check_state_invariants(state: TicTacToeState) -> None:
         state, TicTacToeState
     ), "tictactoe: invariant failed: state is not of type TicTacToeState"
 
-    # Check that field is exactly 9 cells (3 by 3 grid).
-    assert len(state.field) == 9, "tictactoe: invariant failed: invalid field size"
+    # Check that both bitboards fit into exactly 9 cells (3 by 3 grid).
+    assert (
+        isinstance(state.x, int) and isinstance(state.o, int)
+        and 0 <= state.x <= _FULL and 0 <= state.o <= _FULL
+    ), "tictactoe: invariant failed: invalid field size"
 
-    # Check that all elements are of expected types.
-    assert all(
-        isinstance(x, XO) or x is None for x in state.field
+    # Check that no cell holds both a cross and a circle.
+    assert not (
+        state.x & state.o
     ), "tictactoe: invariant failed: field contains invalid elements"
 
     # Check that current turn is of expected type.
@@ -568,144 +610,217 @@ def _other(xo: XO) -> XO:
         return XO.X  # Return a cross.
 
 
-def _get_winner(field: TypeField) -> XO | Draw | None:
+def _apply(x: int, o: int, turn: XO, move: int) -> TicTacToeState:
+    """
+    _apply places the symbol of `turn` into cell `move` and flips the turn.
+    No checks are performed on the input, see TicTacToe.add_move for a checked version.
+    Time complexity: O(1)
+    """
+    if turn == XO.X:  # Cross is to move, set the bit on the crosses bitboard.
+        return TicTacToeState(x=x | 1 << move, o=o, turn=XO.O)
+    else:  # Circle is to move, set the bit on the circles bitboard.
+        return TicTacToeState(x=x, o=o | 1 << move, turn=XO.X)
+
+
+def _get_winner(x: int, o: int) -> XO | Draw | None:
     """
     _get_winner checks if field is a terminal position.
     If position is terminal, returns the winner (or draw).
     No type checks are performed on the input.
-    Time complexity: O(nm) where n is size of a pattern and m is amount of patterns.
-    For the game of Tic Tac Toe, n = 3 and m = 8.
+    Time complexity: O(m) where m is amount of patterns.
+    For the game of Tic Tac Toe, m = 8.
     """
 
-    for pat in _win_patterns:  # Iterate all patterns.
-        # Verify that a pattern matches.
-        # Due to == being a transitive operator, the following holds:
-        #   a == b and b == c => a == c
-        # Assuming the above, this holds:
-        #  (a == b and b == c => a == c) => ((a == b and b == c) <=> (a == b and a == c and b == c))
-        # Because of this, we only need to compare 2 cells and the third comparison can be skipped.
-        # See https://en.wikipedia.org/wiki/Transitive_relation for more info.
-        if (
-            field[pat[0]] is not None  # There is a symbol in first cell.
-            and field[pat[0]] == field[pat[1]]  # First and second cells are the same.
-            and field[pat[1]] == field[pat[2]]  # Second and third cells are the same.
-        ):
-            # Pattern matches. First cell is guaranteed to contain either XO.X or XO.O.
-            return field[pat[0]]
+    for mask in _win_masks:  # Iterate all patterns.
+        # A pattern matches when every one of its bits is set on a single bitboard.
+        # Masking keeps only the bits of the pattern, so equality means "all 3 cells are filled".
+        if x & mask == mask:  # Crosses fill the pattern.
+            return XO.X
+        if o & mask == mask:  # Circles fill the pattern.
+            return XO.O
 
     # None of the patterns matched. Game is either a draw or not finished yet.
 
     # Check that all cells are not empty.
-    if all(x is not None for x in field):
-        return Draw()  # No free cells - draw.
+    if x | o == _FULL:
+        return _DRAW  # No free cells - draw.
 
     return None  # At least one move is possible - non terminal.
 
 
-# _winner_memo is the global memoization table for _compute_memo.
-# For each TicTacToeState it stores the outcome of the state:
-#   XO.X means X (cross) may force a win.
-#   XO.O means O (circle) may force a win.
-#   Draw() means current player may force a draw.
-# This table only grows, elements are never removed.
-# For normal usage, this table will stay under 6000 entries.
-# Theoretically, through direct usage of _compute_memo, it may grow to 39366 entries.
-_winner_memo: dict[TicTacToeState, XO | Draw] = {}
+# Layout of the outcome table.
+# Every field has a base-3 code: cell i contributes 0 (empty), 1 (cross) or 2 (circle) times 3^i.
+# There are 3^9 = 19683 codes, and each code is stored twice: once for X to move, once for O to move.
+# Entry index = code + _CODES * (1 if O is to move else 0).
+_CODES = 3**9
+
+# Each entry of the table is a 16-bit integer:
+#   bits 0..8   - bitboard of optimal moves (0 for terminal positions).
+#   bits 9..10  - outcome that the player to move may force, one of _OUTCOME_* below.
+_MOVES_MASK = _FULL
+_OUTCOME_SHIFT = 9
+_OUTCOME_X = 1  # X (cross) may force a win.
+_OUTCOME_O = 2  # O (circle) may force a win.
+_OUTCOME_DRAW = 3  # Current player may force a draw.
+
+# _base3 maps a bitboard to the base-3 code of the same cells holding a cross.
+# A circle contributes twice as much, so code(x, o) = _base3[x] + 2 * _base3[o].
+_base3 = tuple(sum(3**i for i in range(9) if mask >> i & 1) for mask in range(_FULL + 1))
+
+# _pow3 holds 3^i for every cell i. Placing a cross into cell i adds _pow3[i] to the code,
+# placing a circle adds 2 * _pow3[i].
+_pow3 = tuple(3**i for i in range(9))
+
+# _outcome_table is the complete solution of the game, see _solve_all for details.
+# It is empty until the first call to _table(), afterwards it is never modified.
+# Its size is fixed: 2 * 3^9 entries of 2 bytes each, roughly 77 KiB.
+_outcome_table = array("H")
 
+# Guards filling of _outcome_table: games may be searched by several threads at once (see `src/engine.py`).
+_outcome_table_lock = Lock()
 
-def _compute_memo(s: TicTacToeState) -> XO | Draw:
+
+def _index(x: int, o: int, turn: XO) -> int:
     """
-    The Engine behind the game.
-    For each state returns the best outcome that current player may force.
-    If result == s.turn, a win is forcible.
-    If result == Draw(), a draw is forcible.
-    If result == _other(s.turn), any and all game paths lead to a loss.
+    _index returns position of a state in the outcome table.
+    Time complexity: O(1)
+    """
+    return _base3[x] + 2 * _base3[o] + (_CODES if turn == XO.O else 0)
 
-    This function uses a global cache (_winner_memo).
-    Because of this, first invocation may be slow,
-    but all subsequent invocations will be memoized.
 
-    Time complexity:
-        first invocation: O(n) where n is the size of game tree that is not yet
-        subsequent invocation: O(x) where x is the dictionary lookup time.
-        Assumed to be close to a constant.
+def _decode_field(code: int) -> tuple[int, int]:
+    """
+    Converts base-3 code of a field into bitboards (crosses, circles).
+    Time complexity: O(1)
+    """
+    x = o = 0
+    for i in range(9):  # Extract base-3 digits, least significant digit is cell 0.
+        code, digit = divmod(code, 3)
+        if digit == 1:
+            x |= 1 << i
+        elif digit == 2:
+            o |= 1 << i
+    return x, o
 
-    Due to the fact that this is Tic Tac Toe we are talking about, the game state graph
-    is tiny (n < 6000) and may be considered constant size.
 
+def _table() -> array:
+    """
+    Returns the outcome table, solving the game on the first invocation.
+    Time complexity:
+        first invocation: O(n) where n = 2 * 3^9 is the number of entries.
+        subsequent invocation: O(1).
     """
-    _check_state_invariants(s)  # Check that provided state is valid.
 
     # Pylint is stupid in this case.
     # I don't care that I don't assign to this variable.
     # I want the intent of accessing a global to be explicit.
-    global _winner_memo  # pylint: disable=global-variable-not-assigned
-
-    if s in _winner_memo:  # Is state already memoized?
-        return _winner_memo[s]  # It is! Return it.
-
-    # Uses walrus operator (:=) for more compact and clean notation.
-    # Walrus operator (:=) is semantically equivalent to the following:
-    #
-    # lhs = None
-    # def walrus(rhs):
-    #    lhs = rhs
-    #    return rhs
-    #
-    # lhs stands for left hand side of the walrus operator (:=).
-    # rhs stands for right hand side of the walrus operator (:=).
-
-    if (winner := _get_winner(s.field)) is not None:  # Check if position is terminal.
-        # Position is terminal!
-        _winner_memo[s] = winner  # Save the result for further invocations.
-        return winner  # Return the result as well.
-
-    found_draw = False  # Stores whether a move that leads to a draw was found.
-    found_win = False  # Stores whether a move that leads to a win was found.
-    for move in range(9):  # Check all possible moves. range(9) iterates from 0 to 8.
-        if s.field[move] is not None:  # Not a valid move, cell is already occupied.
-            continue  # Skip this iteration.
-
-        # Generate next state.
-        field = list(s.field)  # List is required because tuple is immutable.
-        field[move] = s.turn  # Make the actual move.
-        next_state = TicTacToeState(
-            field=cast(TypeField, tuple(field)),
-            turn=_other(s.turn),  # Don't forget to flip the turn!
-        )
+    global _outcome_table  # pylint: disable=global-variable-not-assigned
+
+    if not _outcome_table:  # Table was not generated yet.
+        solved = _solve_all()  # Solved outside the lock, a thread losing the race only wastes its work.
+        with _outcome_table_lock:
+            if not _outcome_table:  # Another thread may have filled the table meanwhile.
+                _outcome_table.extend(solved)
+    return _outcome_table
+
+
+def _solve_all() -> array:
+    """
+    The Engine behind the game.
+    Solves every encodable field (including unreachable ones) for both players to move
+    and returns the table described above _outcome_table.
+
+    Positions are solved bottom-up: fields with more occupied cells come first.
+    Every move fills one more cell, so by the time a position is visited
+    all of its children are already in the table and no recursion is required.
+    Rotations and reflections of a solved position are filled in without searching them.
+
+    Time complexity: O(nm) where n = 2 * 3^9 is the number of entries
+    and m = 9 is the maximum number of moves from a position.
+    """
+    table = array("H", bytes(2 * 2 * _CODES))  # 2 turns, 2 bytes per entry, all zeroes.
+
+    # Decode every code into a pair of bitboards and bucket codes by the number of filled cells.
+    by_filled: list[list[tuple[int, int, int]]] = [[] for _ in range(10)]
+    for code in range(_CODES):
+        x, o = _decode_field(code)
+        by_filled[(x | o).bit_count()].append((code, x, o))
+
+    # solved[code] is set once the code was written to the table.
+    # Each solved position is written together with all of its symmetric images,
+    # so only one position out of every group of (up to 8) symmetric ones is actually searched.
+    sym = square_symmetry(3)
+    solved = bytearray(_CODES)
+
+    for filled in range(9, -1, -1):  # Full boards first, empty board last.
+        for code, x, o in by_filled[filled]:
+            if solved[code]:  # Already written as an image of a symmetric position.
+                continue
+
+            entries = _solve_position(table, code, x, o)
+
+            if _get_winner(x, o) is not None:
+                # Terminal positions are cheap to evaluate, so they are not mirrored.
+                # In unreachable fields where both players have a line, the reported winner
+                # depends on order of _win_patterns, which is not symmetric.
+                table[code], table[code + _CODES] = entries
+                continue
+
+            # Symmetric positions have the same outcome, their optimal moves are images of ours.
+            for t in range(TRANSFORMS):
+                image = _base3[sym.transform(x, t)] + 2 * _base3[sym.transform(o, t)]
+                if solved[image]:  # Position is symmetric to itself under this transform.
+                    continue
+                solved[image] = 1
+                for offset, entry in zip((0, _CODES), entries):
+                    moves = sym.transform(entry & _MOVES_MASK, t)
+                    table[image + offset] = entry & ~_MOVES_MASK | moves
+
+    return table
+
+
+def _solve_position(table: array, code: int, x: int, o: int) -> tuple[int, int]:
+    """
+    Computes table entries of a single field for X to move and for O to move.
+    All children of the field must already be present in the table.
+    Time complexity: O(m) where m = 9 is the maximum number of moves from a position.
+    """
+
+    # Terminal positions have the same outcome for both players to move.
+    if (winner := _get_winner(x, o)) is not None:
+        if winner == XO.X:
+            outcome = _OUTCOME_X
+        elif winner == XO.O:
+            outcome = _OUTCOME_O
+        else:
+            outcome = _OUTCOME_DRAW
+        return outcome << _OUTCOME_SHIFT, outcome << _OUTCOME_SHIFT
+
+    empty = _FULL & ~(x | o)
+    entries: list[int] = []
+    for win, loss, step, child_offset in (
+        # X to move: a cross adds 3^i, O moves next.
+        (_OUTCOME_X, _OUTCOME_O, 1, _CODES),
+        # O to move: a circle adds 2 * 3^i, X moves next.
+        (_OUTCOME_O, _OUTCOME_X, 2, 0),
+    ):
+        # Bitboards of moves leading to each outcome.
+        wins = draws = losses = 0
+        for move in _moves_by_empty[empty]:
+            child = table[code + step * _pow3[move] + child_offset] >> _OUTCOME_SHIFT
+            if child == win:
+                wins |= 1 << move
+            elif child == _OUTCOME_DRAW:
+                draws |= 1 << move
+            else:
+                losses |= 1 << move
+
+        # Pick the best outcome available and remember every move that reaches it.
+        if wins:
+            entries.append(win << _OUTCOME_SHIFT | wins)
+        elif draws:
+            entries.append(_OUTCOME_DRAW << _OUTCOME_SHIFT | draws)
+        else:
+            entries.append(loss << _OUTCOME_SHIFT | losses)
 
-        # Compute the winner of the next position.
-        # Usually, such recursive memoization may lead to infinite recursion.
-        # We are safe in this case, because it can be proven that TicTacToe game graph
-        # is a DAG and even a Rooted Tree!
-        # More info here: https://en.wikipedia.org/wiki/Directed_acyclic_graph
-        #                 https://en.wikipedia.org/wiki/Tree_(graph_theory)#Rooted_tree
-
-        # Hopefully, we will not hit the recursion stack depth limit.
-        # This should not happen, because maximum length of a game of Tic Tac Toe is 9 moves.
-        # And if your system cannot handle 9 stack frames, God help you.
-        res = _compute_memo(next_state)
-
-        # We found a draw if current result is a draw OR we found a draw previously.
-        found_draw = found_draw or res == Draw()
-
-        # We found a win if current result is a win OR we found a win previously.
-        found_win = found_win or res == s.turn
-
-    if found_win:  # Did we find a win?
-        # We did! It can be proven that this result is optimal.
-        _winner_memo[s] = s.turn  # Memoize the result.
-    elif found_draw:  # Did we at least find a draw?
-        # We did find a draw and no win is possible.
-        # That means that optimal result is a draw.
-        _winner_memo[s] = Draw()  # Memoize the result.
-    else:
-        # We did not find a win, did not find a draw.
-        # We also know that position is not terminal.
-        # That means that there exists at least one move which is neither
-        # a draw nor a win.
-        # We also know that none of the existing moves are wins or draws.
-        # That means that all remaining moves are losses.
-        _winner_memo[s] = _other(s.turn)  # Memoize the result.
-
-    return _winner_memo[s]  # Return the memoized result.
+    return entries[0], entries[1]
@@ -0,0 +1,194 @@
+"""
+               GLWT(Good Luck With That) Public License
+                 Copyright (c) Everyone, except Author
+
+Everyone is permitted to copy, distribute, modify, merge, sell, publish,
+sublicense or whatever they want with this software but at their OWN RISK.
+
+                            Preamble
+
+The author has absolutely no clue what the code in this project does.
+It might just work or not, there is no third option.
+
+
+                GOOD LUCK WITH THAT PUBLIC LICENSE
+   TERMS AND CONDITIONS FOR COPYING, DISTRIBUTION, AND MODIFICATION
+
+  0. You just DO WHATEVER YOU WANT TO as long as you NEVER LEAVE A
+TRACE TO TRACK THE AUTHOR of the original product to blame for or hold
+responsible.
+
+IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+
+Good luck and Godspeed.
+"""
+
+"""
+Module `src/health.py` watches the event loop and reports liveness and readiness of the bot.
+---
+All updates of a process are handled by a single asyncio event loop. A CPU-bound call running on it
+(e.g. an inline engine search or a cold table build) stalls every user of the process at once.
+Link: https://docs.python.org/3/library/asyncio-dev.html#running-blocking-code
+
+`LoopMonitor` measures it from two sides:
+    1. A sampler task sleeps for `interval` seconds and measures how late it wakes up.
+        The delay (lag) is how long any callback waits to be scheduled. Every sample is observed
+        in the `bot_loop_lag_seconds` histogram (see `src/metrics.py`).
+    2. A watchdog thread checks that the sampler keeps waking up. When it has not for `threshold` seconds,
+        the loop is blocked right now: the watchdog logs the stack of the loop's thread,
+        which names the function blocking the loop, once per stall.
+        Link: https://docs.python.org/3/library/sys.html#sys._current_frames
+
+Endpoints for orchestrators (added to the metrics application by `add_routes`):
+    - `/healthz` (liveness) - 200 while the last measured lag is below `threshold`, 503 otherwise.
+        A stalled loop does not answer at all, which probes treat as a failure as well.
+    - `/readyz` (readiness) - 200 once the bot has warmed up and started taking updates and the loop is healthy,
+        503 otherwise, so traffic is routed to other instances meanwhile.
+
+Typical usage example:
+```
+monitor = LoopMonitor(interval=0.25, threshold=1.0)
+monitor.start()
+app = metrics.build_app()
+add_routes(app, monitor)
+...
+monitor.ready = True  # After warm-up.
+...
+monitor.stop()
+```
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+import typing as tp
+
+from aiohttp import web
+
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+LOOP_LAG_SECONDS = REGISTRY.histogram(
+    "bot_loop_lag_seconds",
+    "Delay of event loop callbacks, measured by a task waking up periodically.",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+
+
+# Event loop lag sampler with a watchdog thread.
+class LoopMonitor:
+    """
+    Event loop lag sampler with a watchdog thread, see module documentation.
+
+    Attributes:
+        interval: seconds between lag samples.
+        threshold: lag in seconds above which the loop is considered unhealthy.
+        ready: whether the bot takes traffic, set by the owner after warm-up.
+        lag: last measured lag in seconds.
+        stalls: amount of times the loop was blocked for longer than `threshold`.
+    """
+
+    def __init__(self, interval: float = 0.25, threshold: float = 1.0):
+        if interval <= 0 or threshold <= 0:
+            raise ValueError("interval and threshold must be positive")
+        self.interval = interval
+        self.threshold = threshold
+        self.ready = False
+        self.lag = 0.0
+        self.stalls = 0
+        self._heartbeat = time.monotonic()  # When the sampler last woke up. Written by the loop, read by the watchdog.
+        self._loop_thread: tp.Optional[int] = None
+        self._sampler: tp.Optional[asyncio.Task] = None
+        self._watchdog: tp.Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    @property
+    def healthy(self) -> bool:
+        """
+        Whether the last measured lag is below `threshold`.
+        """
+        return self.lag < self.threshold
+
+    def stats(self) -> dict[str, float]:
+        """
+        Returns last lag, stalls and readiness (1 or 0).
+        """
+        return {"last_lag_seconds": self.lag, "stalls": self.stalls, "ready": int(self.ready)}
+
+    def start(self):
+        """
+        Starts the sampler on the running event loop and the watchdog thread.
+        """
+        self._loop_thread = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stopped.clear()
+        self._sampler = asyncio.create_task(self._sample())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self):
+        """
+        Stops the sampler and the watchdog thread.
+        """
+        if self._sampler is not None:
+            self._sampler.cancel()
+            self._sampler = None
+        self._stopped.set()
+        if self._watchdog is not None:
+            self._watchdog.join()
+            self._watchdog = None
+
+    async def _sample(self):
+        """
+        Measures lag every `interval` seconds.
+        """
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._heartbeat = now
+            self.lag = max(0.0, now - expected)
+            LOOP_LAG_SECONDS.observe(self.lag)
+
+    def _watch(self):
+        """
+        Logs the stack of the loop's thread once per stall longer than `threshold`.
+        Runs in the watchdog thread.
+        """
+        reported = None  # Heartbeat of the stall already reported.
+        while not self._stopped.wait(self.threshold / 2):
+            heartbeat = self._heartbeat
+            blocked = time.monotonic() - heartbeat - self.interval
+            if blocked < self.threshold or heartbeat == reported:
+                continue
+            reported = heartbeat
+            self.stalls += 1
+            frame = sys._current_frames().get(tp.cast(int, self._loop_thread))
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else "(stack is not available)\n"
+            logger.warning("Event loop is blocked for %.2f s, loop thread is in:\n%s", blocked, stack)
+
+
+def add_routes(app: web.Application, monitor: LoopMonitor):
+    """
+    Adds `/healthz` and `/readyz` endpoints reporting the state of `monitor` to `app`.
+    """
+
+    async def healthz(request: web.Request) -> web.Response:
+        if monitor.healthy:
+            return web.Response(text="ok\n")
+        return web.Response(status=503, text=f"event loop lag {monitor.lag:.3f} s\n")
+
+    async def readyz(request: web.Request) -> web.Response:
+        if not monitor.ready:
+            return web.Response(status=503, text="warming up\n")
+        return await healthz(request)
+
+    app.router.add_get("/healthz", healthz)
+    app.router.add_get("/readyz", readyz)
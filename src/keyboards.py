@@ -0,0 +1,161 @@
+"""
+               GLWT(Good Luck With That) Public License
+                 Copyright (c) Everyone, except Author
+
+Everyone is permitted to copy, distribute, modify, merge, sell, publish,
+sublicense or whatever they want with this software but at their OWN RISK.
+
+                            Preamble
+
+The author has absolutely no clue what the code in this project does.
+It might just work or not, there is no third option.
+
+
+                GOOD LUCK WITH THAT PUBLIC LICENSE
+   TERMS AND CONDITIONS FOR COPYING, DISTRIBUTION, AND MODIFICATION
+
+  0. You just DO WHATEVER YOU WANT TO as long as you NEVER LEAVE A
+TRACE TO TRACK THE AUTHOR of the original product to blame for or hold
+responsible.
+
+IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+
+Good luck and Godspeed.
+"""
+
+"""
+Module `src/keyboards.py` provides a cache of legal move keyboards.
+---
+Every turn the bot sends a keyboard with one button per legal move. The set of legal moves
+repeats a lot between users and turns: Tic Tac Toe has at most 2^9 = 512 sets of empty cells,
+Nim's moves are a function of the pile sizes. `KeyboardCache` reuses one `ReplyKeyboardMarkup`
+for every occurrence of the same set of moves instead of building a new model tree per message.
+
+Each game chooses its own cache key through `Game.keyboard_key` (e.g. a bitboard of empty cells).
+Games that do not provide a key are cached by the text of their legal moves.
+
+The cache is bounded: once it holds `maxsize` keyboards, the least recently used one is dropped.
+Link: https://en.wikipedia.org/wiki/Cache_replacement_policies#LRU
+
+Keyboards come in two flavours:
+    1. Reply keyboards (`ReplyKeyboardMarkup`) - pressing a button sends its text as a message.
+    2. Inline keyboards (`InlineKeyboardMarkup`) - pressing a button sends a callback query
+        with `callback_data` equal to MOVE_CALLBACK_PREFIX followed by the move text.
+        Link: https://core.telegram.org/bots/api#inlinekeyboardmarkup
+"""
+
+import typing as tp
+from collections import OrderedDict
+
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup, KeyboardButton, ReplyKeyboardMarkup
+
+# Prefix of `callback_data` of inline move buttons, e.g. "m:4" for Tic Tac Toe move 4.
+MOVE_CALLBACK_PREFIX = "m:"
+
+# Amount of buttons in a row of an inline keyboard.
+INLINE_ROW_WIDTH = 3
+
+# Telegram limit on the size of `callback_data`, in bytes.
+CALLBACK_DATA_LIMIT = 64
+
+
+# Bounded LRU cache of legal move keyboards.
+class KeyboardCache:
+    """
+    Bounded LRU cache of legal move keyboards.
+    Cached markups are shared between messages and must not be modified.
+
+    Attributes:
+        maxsize: maximum amount of cached keyboards.
+        hits: amount of lookups answered from the cache.
+        misses: amount of lookups that built a new keyboard.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        if maxsize < 1:
+            raise ValueError("Keyboard cache size must be positive")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._markups: OrderedDict[tp.Hashable, ReplyKeyboardMarkup | InlineKeyboardMarkup] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._markups)
+
+    def get(
+        self,
+        namespace: str,
+        key: tp.Optional[tp.Hashable],
+        legal_moves: list[tp.Any],
+        inline: bool = False,
+    ) -> ReplyKeyboardMarkup | InlineKeyboardMarkup:
+        """
+        Returns a keyboard with one button per legal move.
+
+        Args:
+            namespace: name of the game, keys of different games never collide.
+            key: cache key provided by the game for this set of moves, see `Game.keyboard_key`.
+                If None, the text of the moves is used as the key.
+            legal_moves: moves to build the keyboard from on a cache miss.
+            inline: build an inline keyboard instead of a reply keyboard.
+
+        Returns:
+            ReplyKeyboardMarkup | InlineKeyboardMarkup: shared keyboard. Reply keyboards hold one move per row,
+                inline keyboards hold INLINE_ROW_WIDTH moves per row.
+        Time complexity: O(1) on a hit with a game provided key, O(n) otherwise where n is amount of moves.
+        """
+        if key is None:
+            key = tuple(str(move) for move in legal_moves)
+        full_key = (namespace, key, inline)
+
+        if (markup := self._markups.get(full_key)) is not None:
+            self.hits += 1
+            self._markups.move_to_end(full_key)  # Mark as most recently used.
+            return markup
+
+        self.misses += 1
+        markup = _build_inline(legal_moves) if inline else _build_reply(legal_moves)
+        self._markups[full_key] = markup
+        if len(self._markups) > self.maxsize:
+            self._markups.popitem(last=False)  # Drop the least recently used keyboard.
+        return markup
+
+    def stats(self) -> dict[str, int]:
+        """
+        Returns counters of the cache: hits, misses and current size.
+        """
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._markups)}
+
+
+def _build_reply(legal_moves: list[tp.Any]) -> ReplyKeyboardMarkup:
+    """
+    Builds a reply keyboard with one move per row.
+    """
+    return ReplyKeyboardMarkup(
+        # Example: [[move1], [move2], [move3], ...]
+        keyboard=[[KeyboardButton(text=str(move))] for move in legal_moves],
+        one_time_keyboard=True,  # Keyboard will refresh after each move
+        resize_keyboard=True,  # Keyboard resizes to fit. (shorter height)
+    )
+
+
+def _build_inline(legal_moves: list[tp.Any]) -> InlineKeyboardMarkup:
+    """
+    Builds an inline keyboard with INLINE_ROW_WIDTH moves per row.
+
+    Raises:
+        ValueError: if a move is too long to fit into `callback_data`.
+    """
+    buttons = []
+    for move in legal_moves:
+        data = MOVE_CALLBACK_PREFIX + str(move)
+        if len(data.encode()) > CALLBACK_DATA_LIMIT:
+            raise ValueError(f"Move {move!r} does not fit into callback data")
+        buttons.append(InlineKeyboardButton(text=str(move), callback_data=data))
+    # Example: [[move1, move2, move3], [move4, move5], ...]
+    return InlineKeyboardMarkup(
+        inline_keyboard=[buttons[i : i + INLINE_ROW_WIDTH] for i in range(0, len(buttons), INLINE_ROW_WIDTH)]
+    )
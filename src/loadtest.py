@@ -0,0 +1,463 @@
+"""
+               GLWT(Good Luck With That) Public License
+                 Copyright (c) Everyone, except Author
+
+Everyone is permitted to copy, distribute, modify, merge, sell, publish,
+sublicense or whatever they want with this software but at their OWN RISK.
+
+                            Preamble
+
+The author has absolutely no clue what the code in this project does.
+It might just work or not, there is no third option.
+
+
+                GOOD LUCK WITH THAT PUBLIC LICENSE
+   TERMS AND CONDITIONS FOR COPYING, DISTRIBUTION, AND MODIFICATION
+
+  0. You just DO WHATEVER YOU WANT TO as long as you NEVER LEAVE A
+TRACE TO TRACK THE AUTHOR of the original product to blame for or hold
+responsible.
+
+IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+
+Good luck and Godspeed.
+"""
+
+"""
+Module `src/loadtest.py` load-tests the bot end to end, fully offline.
+---
+The bot (`src/main.py`) runs unchanged in its own process, but talks to a fake Bot API server
+instead of Telegram (`TELEGRAM_API_URL` environment variable). The fake server and simulated users
+run in this process:
+
+    1. `FakeBotAPI` - aiohttp application implementing the Bot API methods the bot uses:
+        `getMe`, `getUpdates` (long polling), `sendMessage`, `editMessageText`, `answerCallbackQuery`,
+        `deleteWebhook`. Messages and button presses of users become updates; messages the bot sends or edits,
+        and notifications answering button presses, are delivered to the users.
+        Link: https://core.telegram.org/bots/api#getupdates
+
+    2. Users - every simulated user has its own private chat. It sends `/start`, picks a game from the menu keyboard,
+        and plays the whole game by pressing random buttons of the move keyboard, waiting for the bot's reply
+        after every message, like a person would. When the menu keyboard comes back, the game is over.
+        Replies without a keyboard ("bot is busy") are counted, and the message is sent again after a second.
+        With `--ui inline` the bot runs in inline mode (UI_MODE="inline") and users play through inline buttons:
+        every press is a callback query, answered by editing the board message in place (`editMessageText`).
+
+Measured:
+    - updates per second handled by the bot over the whole run,
+    - reply latency percentiles: time from the update being queued at the fake server
+        to the bot's reply arriving at it (includes polling, handlers, engines and rate limiting),
+    - amount of calls of every Bot API method, and amount of users who got no reply within `--timeout`.
+
+The run fails (exit code 1) if a user was left without a reply, or throughput is below `--min-throughput`,
+so it can gate releases. Settings of the bot are taken from the environment, e.g. `RATE_LIMIT=0` disables
+pacing to Telegram limits, which would otherwise bound throughput by design (one message per second in a chat).
+
+Usage example:
+```
+RATE_LIMIT=0 python3 src/loadtest.py --users 1000 --ramp 10 --games tictactoe Nim
+RATE_LIMIT=0 python3 src/loadtest.py --users 1000 --ramp 10 --ui inline
+python3 src/loadtest.py --no-spawn --port 8081  # Bot started separately with TELEGRAM_API_URL=http://127.0.0.1:8081
+```
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import sys
+import time
+import typing as tp
+from collections import Counter, deque
+
+from aiohttp import web
+
+from bench import format_duration, summarize
+
+# Token of the bot under test, any well formed token works with the fake server.
+TOKEN = "1:loadtest"
+
+# Bot user returned by getMe.
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "Load test", "username": "loadtest_bot"}
+
+
+# Fake Bot API server, delivering users' messages to the bot and the bot's messages to users.
+class FakeBotAPI:
+    """
+    Fake Bot API server, see module documentation.
+
+    Attributes:
+        calls: amount of calls of every Bot API method.
+        latencies: seconds from queuing an update to the bot's first reply to it, for every answered update.
+        delivered: amount of updates delivered to the bot.
+        polling: set when the bot polls for updates the first time, that is when it is ready.
+    """
+
+    def __init__(self):
+        self.calls: Counter[str] = Counter()
+        self.latencies: list[float] = []
+        self.delivered = 0
+        self.polling = asyncio.Event()
+        self._updates: deque[dict[str, tp.Any]] = deque()
+        self._has_updates = asyncio.Event()
+        self._next_update_id = 1
+        self._next_message_id = 1
+        self._inboxes: dict[int, asyncio.Queue[dict[str, tp.Any]]] = {}  # Bot's messages, per chat.
+        self._sent_at: dict[int, float] = {}  # When the update a chat waits a reply for was queued.
+        self._callbacks: dict[str, int] = {}  # Chats of button presses not answered yet, by callback query id.
+
+    def inbox(self, chat_id: int) -> asyncio.Queue[dict[str, tp.Any]]:
+        """
+        Returns the queue of messages the bot sent to a chat.
+        """
+        if (queue := self._inboxes.get(chat_id)) is None:
+            queue = self._inboxes[chat_id] = asyncio.Queue()
+        return queue
+
+    def send(self, chat_id: int, text: str):
+        """
+        Queues an update with a text message of the user `chat_id` (private chat, so user id is the chat id).
+        """
+        user = {"id": chat_id, "is_bot": False, "first_name": f"User {chat_id}"}
+        message = {
+            "message_id": self._message_id(),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private", "first_name": user["first_name"]},
+            "from": user,
+            "text": text,
+        }
+        self._queue(chat_id, {"message": message})
+
+    def press(self, chat_id: int, message: dict[str, tp.Any], data: str):
+        """
+        Queues an update with a press of the inline button with `callback_data` equal to `data`
+        on a message the bot sent to the user `chat_id`.
+        """
+        user = {"id": chat_id, "is_bot": False, "first_name": f"User {chat_id}"}
+        query_id = str(self._next_update_id)
+        self._callbacks[query_id] = chat_id
+        message = {key: value for key, value in message.items() if key != "reply_markup"}
+        query = {"id": query_id, "from": user, "chat_instance": str(chat_id), "message": message, "data": data}
+        self._queue(chat_id, {"callback_query": query})
+
+    def _queue(self, chat_id: int, update: dict[str, tp.Any]):
+        """
+        Queues an update from a chat, the chat waits for a reply from now on.
+        """
+        self._updates.append({"update_id": self._next_update_id, **update})
+        self._next_update_id += 1
+        self._sent_at[chat_id] = time.perf_counter()
+        self._has_updates.set()
+
+    def _message_id(self) -> int:
+        self._next_message_id += 1
+        return self._next_message_id
+
+    def _deliver(
+        self, chat_id: int, text: str, reply_markup: tp.Optional[dict[str, tp.Any]], message_id: tp.Optional[int] = None
+    ) -> dict[str, tp.Any]:
+        """
+        Delivers a new message of the bot (or an edit of message `message_id`) to a chat, records reply latency.
+        Returns the message as the Bot API does.
+        """
+        self._replied(chat_id)
+        message = {
+            "message_id": message_id or self._message_id(),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": BOT_USER,
+            "text": text,
+        }
+        self.inbox(chat_id).put_nowait({**message, "reply_markup": reply_markup})
+        return message
+
+    def _answer(self, query_id: str, text: tp.Optional[str]):
+        """
+        Delivers the answer to a button press to its chat, marked with "answer" key. It stops the loading indicator
+        of the button, and may carry a notification (e.g. "bot is busy") shown to the user instead of an edit.
+        """
+        chat_id = self._callbacks.pop(query_id, None)
+        if chat_id is not None:
+            if text:
+                self._replied(chat_id)
+            self.inbox(chat_id).put_nowait({"answer": True, "text": text or "", "reply_markup": None})
+
+    def _replied(self, chat_id: int):
+        """
+        Records latency of the first reply to the update a chat waits a reply for.
+        """
+        if (sent_at := self._sent_at.pop(chat_id, None)) is not None:
+            self.latencies.append(time.perf_counter() - sent_at)
+
+    async def get_updates(self, params: tp.Mapping[str, str]) -> list[dict[str, tp.Any]]:
+        """
+        Returns queued updates, waiting for them up to `timeout` seconds (long polling).
+        Every update is delivered once, so `offset` is not needed.
+        """
+        self.polling.set()
+        if not self._updates:
+            self._has_updates.clear()
+            try:
+                await asyncio.wait_for(self._has_updates.wait(), float(params.get("timeout") or 0))
+            except TimeoutError:
+                return []
+        limit = int(params.get("limit") or 100)
+        batch = [self._updates.popleft() for _ in range(min(limit, len(self._updates)))]
+        self.delivered += len(batch)
+        return batch
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """
+        Serves `/bot<token>/<method>`, parameters are taken from the query, a form or a JSON body.
+        """
+        method = request.match_info["method"]
+        self.calls[method] += 1
+        params: dict[str, tp.Any] = dict(request.query)
+        if request.content_type == "application/json":
+            params.update(await request.json())
+        elif request.can_read_body:
+            params.update(await request.post())
+
+        result: tp.Any
+        match method:
+            case "getMe":
+                result = BOT_USER
+            case "getUpdates":
+                result = await self.get_updates(params)
+            case "sendMessage":
+                markup = params.get("reply_markup")
+                result = self._deliver(int(params["chat_id"]), params["text"], json.loads(markup) if markup else None)
+            case "editMessageText":
+                markup = params.get("reply_markup")
+                result = self._deliver(
+                    int(params["chat_id"]), params["text"], json.loads(markup) if markup else None,
+                    message_id=int(params["message_id"]),
+                )
+            case "answerCallbackQuery":
+                self._answer(params["callback_query_id"], params.get("text"))
+                result = True
+            case "deleteWebhook" | "setWebhook" | "close" | "logOut":
+                result = True
+            case _:
+                return web.json_response(
+                    {"ok": False, "error_code": 404, "description": "Not Found: method not found"}, status=404
+                )
+        return web.json_response({"ok": True, "result": result})
+
+    def app(self) -> web.Application:
+        """
+        Returns aiohttp application serving the fake Bot API.
+        """
+        app = web.Application()
+        app.router.add_route("*", "/bot{token}/{method}", self.handle)
+        return app
+
+
+def buttons(message: dict[str, tp.Any]) -> list[str]:
+    """
+    Returns texts of reply keyboard buttons of a bot message, empty if it has no reply keyboard.
+    """
+    markup = message.get("reply_markup") or {}
+    return [button["text"] for row in markup.get("keyboard", []) for button in row]
+
+
+def inline_buttons(message: dict[str, tp.Any]) -> list[tuple[str, str]]:
+    """
+    Returns texts and callback data of inline keyboard buttons of a bot message, empty if it has no inline keyboard.
+    """
+    markup = message.get("reply_markup") or {}
+    return [(button["text"], button["callback_data"]) for row in markup.get("inline_keyboard", []) for button in row]
+
+
+# Outcome of simulated users.
+class Totals:
+    """
+    Outcome of simulated users.
+
+    Attributes:
+        games: amount of finished games.
+        busy: amount of replies without a keyboard (e.g. "bot is busy"), after which the message was sent again.
+        timeouts: amount of users who got no reply in time and gave up.
+    """
+
+    def __init__(self):
+        self.games = 0
+        self.busy = 0
+        self.timeouts = 0
+
+
+async def user(
+    api: FakeBotAPI, chat_id: int, rng: random.Random, games: tp.Optional[set[str]], rounds: int, timeout: float,
+    totals: Totals,
+):
+    """
+    Plays `rounds` games as a single user, see module documentation.
+    """
+    inbox = api.inbox(chat_id)
+
+    async def say(text: str) -> list[str]:
+        # Sends a message until the reply has a keyboard, returns its buttons.
+        while True:
+            api.send(chat_id, text)
+            reply = await asyncio.wait_for(inbox.get(), timeout)
+            while not inbox.empty():  # Long replies are split into several messages, the keyboard is on the last one.
+                reply = inbox.get_nowait()
+            if options := buttons(reply):
+                return options
+            totals.busy += 1
+            await asyncio.sleep(1.0)
+
+    try:
+        menu = await say("/start")
+        for _ in range(rounds):
+            options = await say(rng.choice([name for name in menu if games is None or name in games] or menu))
+            while options != menu:
+                options = await say(rng.choice(options))
+            totals.games += 1
+    except TimeoutError:
+        totals.timeouts += 1
+
+
+async def inline_user(
+    api: FakeBotAPI, chat_id: int, rng: random.Random, games: tp.Optional[set[str]], rounds: int, timeout: float,
+    totals: Totals,
+):
+    """
+    Plays `rounds` games as a single user through inline buttons: the menu message turns into the board,
+    every press edits it, and it shows the menu again when the game is over.
+    Like a person, the user presses the next button once the loading indicator of the previous one has stopped,
+    that is when the press is answered.
+    """
+    inbox = api.inbox(chat_id)
+
+    async def start() -> dict[str, tp.Any]:
+        # Sends /start until the reply has an inline keyboard, returns the reply.
+        while True:
+            api.send(chat_id, "/start")
+            reply = await asyncio.wait_for(inbox.get(), timeout)
+            if inline_buttons(reply):
+                return reply
+            totals.busy += 1
+            await asyncio.sleep(1.0)
+
+    async def press(board: dict[str, tp.Any], data: str) -> dict[str, tp.Any]:
+        # Presses a button until the board is edited, returns the edited board.
+        while True:
+            api.press(chat_id, board, data)
+            edited = None
+            while not (reply := await asyncio.wait_for(inbox.get(), timeout)).get("answer"):
+                edited = reply
+            if edited is not None and inline_buttons(edited):
+                return edited
+            totals.busy += 1
+            await asyncio.sleep(1.0)
+
+    try:
+        board = await start()
+        menu = inline_buttons(board)
+        chosen = [data for name, data in menu if games is None or name in games] or [data for _, data in menu]
+        for _ in range(rounds):
+            board = await press(board, rng.choice(chosen))
+            while (options := inline_buttons(board)) != menu:
+                board = await press(board, rng.choice(options)[1])
+            totals.games += 1
+    except TimeoutError:
+        totals.timeouts += 1
+
+
+async def run(args: argparse.Namespace) -> int:
+    """
+    Runs the load test as configured by command line arguments, prints the report.
+
+    Returns:
+        int: exit code, 1 if a user got no reply or throughput is below `--min-throughput`, 0 otherwise.
+    """
+    api = FakeBotAPI()
+    runner = web.AppRunner(api.app(), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", args.port)
+    await site.start()
+    port = runner.addresses[0][1]
+    print(f"Fake Bot API listens at http://127.0.0.1:{port}")
+
+    bot: tp.Optional[asyncio.subprocess.Process] = None
+    if args.spawn:
+        env = {
+            **os.environ, "TOKEN": TOKEN, "TELEGRAM_API_URL": f"http://127.0.0.1:{port}", "RUN_MODE": "polling",
+            "UI_MODE": args.ui,
+        }
+        main = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+        bot = await asyncio.create_subprocess_exec(sys.executable, main, env=env, stdout=asyncio.subprocess.DEVNULL)
+    try:
+        try:
+            await asyncio.wait_for(api.polling.wait(), args.startup_timeout)
+        except TimeoutError:
+            print("The bot did not start polling in time", file=sys.stderr)
+            return 1
+
+        rng = random.Random(args.seed)
+        totals = Totals()
+        games = set(args.games) if args.games else None
+        play = inline_user if args.ui == "inline" else user
+        started = time.perf_counter()
+        async with asyncio.TaskGroup() as group:
+            for index in range(args.users):
+                group.create_task(
+                    play(api, 10_000 + index, random.Random(rng.random()), games, args.rounds, args.timeout, totals)
+                )
+                if args.ramp:
+                    await asyncio.sleep(args.ramp / args.users)
+        elapsed = time.perf_counter() - started
+    finally:
+        if bot is not None and bot.returncode is None:
+            bot.send_signal(signal.SIGINT)  # Graceful shutdown, sessions are flushed.
+            await bot.wait()
+        await runner.cleanup()
+
+    throughput = api.delivered / elapsed
+    latency = summarize(api.latencies) if api.latencies else None
+    print(f"Users: {args.users}, games finished: {totals.games}, busy replies: {totals.busy}, timeouts: {totals.timeouts}")
+    print(f"Updates: {api.delivered} in {elapsed:.1f} s ({throughput:.1f} updates/s)")
+    if latency is not None:
+        print(
+            f"Reply latency: p50 {format_duration(latency.p50)}, p90 {format_duration(latency.p90)}, "
+            f"p99 {format_duration(latency.p99)}, max {format_duration(max(api.latencies))}"
+        )
+    print("Bot API calls: " + ", ".join(f"{method} {count}" for method, count in api.calls.most_common()))
+
+    if totals.timeouts or throughput < args.min_throughput:
+        return 1
+    return 0
+
+
+def parse_args(argv: tp.Optional[list[str]] = None) -> argparse.Namespace:
+    """
+    Parses command line arguments, see `python3 src/loadtest.py --help`.
+    """
+    parser = argparse.ArgumentParser(description="Load-test the bot against a local fake Bot API server.")
+    parser.add_argument("--users", type=int, default=100, help="amount of simulated users")
+    parser.add_argument("--ramp", type=float, default=0.0, help="seconds over which users join, all at once by default")
+    parser.add_argument("--rounds", type=int, default=1, help="games played by every user")
+    parser.add_argument("--games", nargs="*", help="names of games users choose from, all by default")
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds a user waits for a reply before giving up")
+    parser.add_argument("--seed", type=int, default=0, help="seed of users' choices")
+    parser.add_argument(
+        "--ui", choices=("reply", "inline"), default="reply",
+        help="keyboards users play with, the spawned bot runs in this UI_MODE (set it yourself with --no-spawn)",
+    )
+    parser.add_argument("--port", type=int, default=0, help="port of the fake Bot API, any free one by default")
+    parser.add_argument("--no-spawn", dest="spawn", action="store_false", help="do not start the bot, wait for one")
+    parser.add_argument("--startup-timeout", type=float, default=120.0, help="seconds to wait for the bot to start")
+    parser.add_argument("--min-throughput", type=float, default=0.0, help="fail below this many updates per second")
+    return parser.parse_args(argv)
+
+
+# Standard Python technique to check if script is run directly.
+# Link: https://docs.python.org/3/library/__main__.html
+if __name__ == "__main__":
+    sys.exit(asyncio.run(run(parse_args())))
@@ -38,7 +38,7 @@ It utilizes several external libraries and internal modules:
         Link: https://docs.python.org/3/library/asyncio.html
 
         a. `asyncio.run` - used for running asynchronous bot 
-           by `asyncio.run(dp.start_polling(bot))`
+           by `asyncio.run(main())`
 
     2. `logging` - logging module for tracking events and debugging.
         Used to output bot activity information to stdout.
@@ -67,25 +67,52 @@ It utilizes several external libraries and internal modules:
         Used type in this file is:
             a. `tp.Any` - any input type.
 
-    6. `aiogram` - asynchronous Telegram bot framework.
+    6. `time` - time access. `time.perf_counter` measures warm-up duration of each game.
+        Link: https://docs.python.org/3/library/time.html
+
+    7. `aiogram` - asynchronous Telegram bot framework.
         Link: https://docs.aiogram.dev/en/v3.22.0/
 
         Main components used:
             a. `Bot` - Represents a Telegram Bot instance with API methods.
             b. `Dispatcher` - Event handler manager that routes message updates to specific handlers.
             c. `DefaultBotProperties` - Configuration object for bot default settings.
+               `AiohttpSession`, `TelegramAPIServer` - HTTP session talking to a Bot API server other than Telegram's.
             d. `ParseMode` - Enum for message parsing modes (HTML/Markdown/etc.).
             e. `CommandStart` - Filter for handling /start command.
+               `Command`, `CommandObject` - Filter for handling admin commands and their arguments.
             f. `FSMContext` - Finite State Machine context for managing user message states.
             g. `State`, `StatesGroup` - Classes for defining bot conversation states.
             h. `Message` - Represents incoming message.
-            i. `KeyboardButton` - Custom keyboard button for user interface.
-            j. `ReplyKeyboardMarkup` - Custom keyboard layout for user interaction.
+            i. `ReplyKeyboardMarkup` - Custom keyboard layout for user interaction.
+            j. `InlineKeyboardMarkup` - Keyboard attached to a message, its buttons send callback queries.
+            k. `CallbackQuery` - Represents a press of an inline keyboard button.
+            l. `F` - magic filter, used to match callback data prefixes.
+
+        `aiohttp.web` - web server running the webhook in webhook mode (see `run_webhook`).
+        Link: https://docs.aiohttp.org/en/stable/web.html
+        `urllib.parse.urlsplit` - extracts the path of WEBHOOK_URL.
+        `html.escape` - escapes profile summaries sent to admins.
+        `tempfile.gettempdir` - default directory of profile dumps.
     
-    7. Internal game modules:
+    8. Internal modules:
         a. `games.game.Game` - Abstract base interface for games.
-        b. `games.tictactoe.TicTacToe` - Tic Tac Toe game implementation.
-        c. `games.nim.Nim` - Nim game implementation.
+        b. `engine.EngineRunner` - runs CPU-bound engine calls off the event loop.
+        c. `registry.GameRegistry` - catalogue of games, imports game modules on first use.
+        d. `menu.build_menu` - builds the game selection menu once.
+        e. `keyboards.KeyboardCache` - reuses keyboards of legal moves.
+        f. `session` - compact representation of games in FSM data.
+        g. `storage.SQLiteStorage` - persistent FSM storage with a hot cache and write-behind batching.
+           `storage.ExpiringMemoryStorage` - in-memory FSM storage, where idle sessions expire.
+        h. `webhook` - webhook mode: aiohttp applications of workers and of the router in front of them.
+        i. `outbound` - paces outgoing messages to Telegram rate limits, menus have low priority.
+        j. `replies` - collects replies of a message handler into as few messages as possible.
+        k. `sequencer.ChatSequencer` - handles updates of a chat one at a time, drops duplicate taps.
+        l. `admission.AdmissionController` - bounds concurrent handlers, answers "bot is busy" under overload.
+        m. `metrics` - handler, game and engine latency histograms and component stats, served at `/metrics`.
+        n. `health.LoopMonitor` - event loop lag sampler and watchdog, `/healthz` and `/readyz` endpoints.
+        o. `profiling.Profiler` - on demand CPU profiles of the running bot, `/profile` command and endpoint.
+        p. `memory.MemoryInspector` - memory gauges and on demand memory reports, `/memory` command and endpoint.
 
 ---
 Architectural idea:
@@ -94,6 +121,9 @@ The bot uses a Finite State Machine (FSM) pattern to manage conversation flow:
     1. `Form.choose_game` - user selects which game to play.
     2. `Form.play_game` - gameplay as whole occurs.
 
+FSM data holds only the game name and the encoded game state (see `src/session.py`),
+so sessions are small and may be kept by any storage backend.
+
 Message handlers are decorated with `@dp.message()` (read more at: https://en.wikipedia.org/wiki/Decorator_pattern) 
 to register them with the dispatcher. Handlers are matched based on state and command filters.
 
@@ -105,45 +135,156 @@ Userflow:
     5. User makes moves, bot responds with counter-moves
     6. When game ends, winner is announced and bot returns to step 2
 
+In inline mode (UI_MODE="inline") steps 3-6 happen through inline buttons:
+the menu message is edited into the board, each move edits the board, and the final edit shows
+the result together with the menu. A whole game lives in a single message.
+
 Global Constants:
-    - GAMES_TO_PLAY: List of available game instances
+    - GAMES_TO_PLAY: List of available game declarations
+    - inspector: Memory inspector, estimating memory of games, keyboards and sessions
+    - registry: GameRegistry built from GAMES_TO_PLAY
+    - MENU: Pre-built game selection menu
+    - UI_MODE: "reply" (new message per reply) or "inline" (board message edited in place)
+    - KEYBOARDS: Cache of legal move keyboards
+    - ENGINE_SETTINGS: Per game executor settings for engine calls
+    - engine: EngineRunner instance executing engine calls
+    - WARM_UP: Whether games are warmed up before polling starts
     - TOKEN: Telegram bot authentication token from environment variable
+    - TELEGRAM_API_URL: Base URL of the Bot API server, Telegram's by default
     - bot: Bot instance configured with HTML parse mode
+    - outbound: Rate limiter of outgoing requests, installed as a middleware of the bot's session
+    - SESSION_DB: Path of the SQLite session database, sessions are kept in memory if not set
+    - SESSION_TTL: Seconds of inactivity after which a session (and the game in it) expires
+    - SESSION_SWEEP_INTERVAL: Seconds between sweeps of expired sessions
+    - EXPIRED_NOTICE: Whether users returning to an expired game are told about it
+    - storage: FSM storage holding user sessions
     - dp: Dispatcher instance for handling updates
+    - admission: Limit of concurrent handlers with load shedding
+    - sequencer: Per-chat serialization of updates
+    - METRICS_HOST, METRICS_PORT: Address of the metrics endpoint, disabled if METRICS_PORT is not set
+    - monitor: Event loop lag monitor, reporting liveness and readiness on the metrics endpoint
+    - ADMIN_IDS: Telegram user ids allowed to use admin commands
+    - profiler: On demand CPU profiler, see `profile_command`
+    - RUN_MODE: "polling" (default) or "webhook"
+    - WEBHOOK_*: Webhook mode settings, see `run_webhook`
 """
 
 import asyncio
+import html
 import logging
 import sys
 import os
+import tempfile
+import time
 import typing as tp
+from urllib.parse import urlsplit
 
-from aiogram import Bot, Dispatcher
+from aiohttp import web
+
+from aiogram import Bot, Dispatcher, F
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 from aiogram.enums import ParseMode
-from aiogram.filters import CommandStart
+from aiogram.filters import Command, CommandObject, CommandStart
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import (
-    KeyboardButton,
+    CallbackQuery,
+    InlineKeyboardMarkup,
     Message,
     ReplyKeyboardMarkup,
 )
 
 from games.game import Game
-from games.tictactoe import TicTacToe
-from games.nim import Nim
+from engine import EngineRunner, EngineSettings
+from registry import GameRegistry, GameSpec
+from menu import GAME_CALLBACK_PREFIX, build_menu
+from keyboards import MOVE_CALLBACK_PREFIX, KeyboardCache
+from session import STATE_KEY, pack_game, pack_state, unpack_game
+from storage import EXPIRED_STATE, ExpiringMemoryStorage, SQLiteStorage
+from outbound import OutboundLimiter, low_priority
+from replies import MESSAGE_LIMIT, Reply, ReplyMiddleware
+from sequencer import ChatSequencer
+from admission import AdmissionController
+from metrics import REGISTRY, HandlerMetrics, build_app, instrument_game
+from health import LoopMonitor, add_routes as add_health_routes
+from profiling import Profiler, add_routes as add_profile_routes
+from memory import MemoryInspector, add_routes as add_memory_routes
+from webhook import build_router_app, build_worker_app, socket_paths, start_workers, stop_workers
 
 # Global list of available games that users can choose from.
+# Games are created only when first selected (or warmed up), building the menu only imports their classes.
 # To add a new game: 
 #   1. Create a class implementing the Game interface in src/games/
-#   2. Import it above
-#   3. Add an instance to this list
-GAMES_TO_PLAY: list[Game] = [
-    TicTacToe(),
-    Nim(),
+#   2. Add a GameSpec to this list. Name must match the one returned by the game,
+#      the registry refuses to create a game that does not match its spec.
+#      Description is taken from the `DESCRIPTION` attribute of the game class.
+GAMES_TO_PLAY: list[GameSpec] = [
+    GameSpec(
+        name="tictactoe",
+        target="games.tictactoe:TicTacToe",
+    ),
+    GameSpec(
+        name="Nim",
+        target="games.nim:Nim",
+    ),
+    GameSpec(
+        name="tictactoe4x4",
+        target="games.mnk:MNKGame",
+        options={"rows": 4, "cols": 4, "k": 4},
+    ),
 ]
 
+# Memory of games, caches and sessions, reported by `/memory` command and endpoint (see `src/memory.py`).
+inspector = MemoryInspector()
+REGISTRY.stats("bot_memory", inspector.stats)
+
+
+async def instrument(game: Game) -> Game:
+    """
+    Time calls of a created game, export its engine stats (see `src/metrics.py`) and include it in memory reports.
+    Engine stats are summed over all copies of the game, e.g. over its worker processes (see `src/engine.py`).
+    """
+    name = await game.name()
+    REGISTRY.stats(
+        "bot_engine", lambda: engine.engine_stats(game), counters=("searches", "search_nodes"), labels={"game": name}
+    )
+    inspector.track_game(name, game)
+    return await instrument_game(game)
+
+
+# Registry of games, used to look up a game by name in constant time.
+# Every game is instrumented when it is created.
+registry = GameRegistry(GAMES_TO_PLAY, wrap=instrument)
+
+# Game selection menu, built once and shared by all menu messages.
+MENU = build_menu(GAMES_TO_PLAY)
+
+# User interface mode, set by UI_MODE environment variable:
+#   - "reply": every bot reply is a new message with a reply keyboard (default).
+#   - "inline": boards carry inline keyboards, and pressing a button edits the board message in place,
+#     so a whole game lives in a single message.
+UI_MODE = os.getenv("UI_MODE", "reply")
+if UI_MODE not in ("reply", "inline"):
+    raise RuntimeError('UI_MODE must be either "reply" or "inline"')
+
+# Cache of legal move keyboards shared by all users. Size is set by KEYBOARD_CACHE_SIZE environment variable.
+KEYBOARDS = KeyboardCache(maxsize=int(os.getenv("KEYBOARD_CACHE_SIZE", "4096")))
+REGISTRY.stats("bot_keyboard_cache", KEYBOARDS.stats, counters=("hits", "misses"))
+inspector.track("keyboards", lambda: KEYBOARDS)
+
+# Executors for engine calls, see `src/engine.py`.
+# Games not listed here use settings from ENGINE_EXECUTOR/ENGINE_WORKERS/ENGINE_TIMEOUT environment variables
+# (inline execution without timeout by default).
+# m,n,k-game searches for up to a second, so it runs in worker processes to keep the event loop free.
+ENGINE_SETTINGS: dict[str, EngineSettings] = {
+    "tictactoe4x4": EngineSettings(executor="process", workers=2, timeout=3.0),
+}
+
+# Global engine runner shared by all handlers.
+engine = EngineRunner(default=EngineSettings.from_env(), per_game=ENGINE_SETTINGS)
+
 # Retrieve bot token from environment variable for security.
 # The TOKEN should be set in the environment before running the bot.
 # For example: TOKEN=your_bot_token_here python3 src/main.py
@@ -154,14 +295,111 @@ TOKEN = os.getenv("TOKEN")
 if TOKEN is None:
     raise RuntimeError('Token is not set. Use `TOKEN=your_bot_token_here python3 src/main.py`')
 
+# Base URL of the Bot API server, set by TELEGRAM_API_URL environment variable, https://api.telegram.org by default.
+# Used with a self-hosted Bot API server, or with the fake server of the load test (see `src/loadtest.py`).
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL")
+
 # Initialize Bot instance with authentication token.
 # DefaultBotProperties configures the bot's default behavior:
 #   - parse_mode=ParseMode.HTML: Allows HTML formatting in messages.
 # read more about it: https://core.telegram.org/bots/api#formatting-options
-bot = Bot(token=TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+bot = Bot(
+    token=TOKEN,
+    session=AiohttpSession(api=TelegramAPIServer.from_base(TELEGRAM_API_URL)) if TELEGRAM_API_URL else None,
+    default=DefaultBotProperties(parse_mode=ParseMode.HTML),
+)
+
+# Paces messages to Telegram rate limits (30 messages per second, 1 per second in a chat),
+# retrying requests answered with "429 Too Many Requests". Disabled if RATE_LIMIT environment variable is "0".
+# Webhook workers split the global limit between them, see `run_webhook_worker`.
+outbound = OutboundLimiter()
+if os.getenv("RATE_LIMIT", "1") != "0":
+    bot.session.middleware(outbound)
+REGISTRY.stats("bot_outbound", outbound.stats, counters=("sent", "retried"))
+inspector.track("outbound queues", lambda: outbound)
+
+# Storage of user sessions (FSM state and data), set by environment variables:
+#   - SESSION_DB: path of the SQLite database. Games survive restarts and cold sessions are not kept in memory.
+#     If not set, sessions are kept in memory only and are lost on restart.
+#   - SESSION_CACHE_SIZE: amount of recently used sessions kept in memory, 10000 by default.
+#   - SESSION_FLUSH_INTERVAL: seconds between batched writes to the database, 1 by default.
+#   - SESSION_TTL: seconds without a move after which a session expires, one day by default, "0" disables expiry.
+#     Users start games and never finish them, expiry keeps storage proportional to active players.
+#   - SESSION_SWEEP_INTERVAL: seconds between sweeps deleting expired sessions, 60 by default.
+#     Expired sessions are also dropped as soon as they are read.
+#   - EXPIRED_NOTICE: "0" disables the "your game has expired" message, see `expired_session`.
+SESSION_DB = os.getenv("SESSION_DB")
+SESSION_TTL = float(os.getenv("SESSION_TTL", str(24 * 60 * 60))) or None
+SESSION_SWEEP_INTERVAL = float(os.getenv("SESSION_SWEEP_INTERVAL", "60"))
+EXPIRED_NOTICE = os.getenv("EXPIRED_NOTICE", "1") != "0"
+storage: SQLiteStorage | ExpiringMemoryStorage = (
+    SQLiteStorage(
+        SESSION_DB,
+        cache_size=int(os.getenv("SESSION_CACHE_SIZE", "10000")),
+        flush_interval=float(os.getenv("SESSION_FLUSH_INTERVAL", "1")),
+        ttl=SESSION_TTL,
+    )
+    if SESSION_DB
+    else ExpiringMemoryStorage(ttl=SESSION_TTL)
+)
+REGISTRY.stats("bot_sessions", storage.stats, counters=("hits", "misses", "flushed", "expired"))
+inspector.track("sessions", lambda: storage)
 
 # Initialize Dispatcher to handle incoming updates from Telegram.
-dp = Dispatcher()
+# Dispatcher closes the storage on shutdown, which flushes pending session writes.
+dp = Dispatcher(storage=storage)
+
+# Updates of a chat are handled one at a time, so quick taps do not overwrite each other's moves,
+# and repeated taps of a button the bot has not answered yet are dropped (see `src/sequencer.py`).
+sequencer = ChatSequencer()
+dp.update.outer_middleware(sequencer)
+REGISTRY.stats("bot_sequencer", sequencer.stats, counters=("dropped",))
+
+# At most MAX_IN_FLIGHT updates (64 by default) are handled at once, up to MAX_PENDING more (1024 by default) wait,
+# further updates are answered with "bot is busy" right away (see `src/admission.py`).
+# Registered after the sequencer, so a slot is taken only once the chat's turn has come:
+# updates queued behind their own chat do not hold slots, and one flooding chat can not starve the others.
+admission = AdmissionController(
+    max_in_flight=int(os.getenv("MAX_IN_FLIGHT", "64")),
+    max_pending=int(os.getenv("MAX_PENDING", "1024")),
+)
+dp.update.outer_middleware(admission)
+REGISTRY.stats("bot_admission", admission.stats, counters=("admitted", "shed"))
+
+# Message handlers do not send messages themselves: they add replies to `reply` argument,
+# which are sent as a single message after the handler returns (see `src/replies.py`).
+dp.message.middleware(ReplyMiddleware())
+
+# Handlers are timed, see `src/metrics.py`. Registered after ReplyMiddleware, so replies are sent after the timer stops:
+# time spent waiting for rate limits is not counted.
+dp.message.middleware(HandlerMetrics())
+dp.callback_query.middleware(HandlerMetrics())
+
+# Metrics endpoint, set by environment variables:
+#   - METRICS_PORT: port serving `/metrics` in Prometheus text format, and `/healthz` and `/readyz` probes.
+#     Metrics are not served if not set.
+#     With several webhook workers, every worker serves its own metrics on METRICS_PORT + worker index.
+#   - METRICS_HOST: address to listen on, 127.0.0.1 by default. Metrics are not meant to be public.
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.environ["METRICS_PORT"]) if os.getenv("METRICS_PORT") else None
+
+# Event loop lag is sampled every LOOP_LAG_INTERVAL seconds (0.25 by default). A loop lagging or blocked for more than
+# LOOP_LAG_THRESHOLD seconds (1 by default) is reported unhealthy, and the stack of the blocking code is logged.
+monitor = LoopMonitor(
+    interval=float(os.getenv("LOOP_LAG_INTERVAL", "0.25")),
+    threshold=float(os.getenv("LOOP_LAG_THRESHOLD", "1")),
+)
+REGISTRY.stats("bot_loop", monitor.stats, counters=("stalls",))
+
+# Telegram user ids allowed to use admin commands, comma separated in ADMIN_IDS environment variable (none by default).
+# For everyone else admin commands are ordinary messages.
+ADMIN_IDS = frozenset(int(user_id) for user_id in os.getenv("ADMIN_IDS", "").split(",") if user_id.strip())
+
+# CPU profiles captured by `/profile` command or endpoint are saved to PROFILE_DIR (temporary directory by default).
+# Registered as the innermost middleware, so it counts handled updates.
+profiler = Profiler(directory=os.getenv("PROFILE_DIR", tempfile.gettempdir()))
+dp.message.middleware(profiler)
+dp.callback_query.middleware(profiler)
 
 
 # StatesGroup defines all possible states in the conversation FSM.
@@ -176,64 +414,117 @@ class Form(StatesGroup):
 
 # CommandStart() is a filter that matches messages starting with /start.
 @dp.message(CommandStart()) # Include method into handlers.
-async def start(message: Message, state: FSMContext):
+async def start(message: Message, state: FSMContext, reply: Reply):
     """
     Handle `/start` and display game selection menu.
     
     This is the entry point for user interaction. It:
         1. Sets FSM state to choose_game.
-        2. Creates a custom keyboard with game names as buttons.
-        3. Sends welcome message with game options.
+        2. Sends welcome message with the pre-built game menu and keyboard.
     
     Args:
         message: Incoming message containing user info and message data.
         state: FSM context for managing conversation state and storing data.
+        reply: Replies to the message, sent together after the handler (see `src/replies.py`).
     
     Returns:
         None.
-    Expected time complexity: O(n) where n is number of games in GAMES_TO_PLAY
+    Expected time complexity: O(1)
     """
     # Initiate state in choose_game state.
     await state.set_state(Form.choose_game)
 
-    # Initialize list to hold keyboard buttons.
-    keyboard = []
+    # Send the pre-built menu, only the greeting is built per message.
+    # message.from_user.first_name is guranteed to exist.
+    # Under load, menus wait for in-game replies of other users (see `src/outbound.py`).
+    with low_priority():
+        reply.add(
+            MENU.render(f"Hi {message.from_user.first_name}! Choose a game to play:"), # add text to the message
+            reply_markup=menu_keyboard(), # add a shared keyboard to the message.
+        )
 
-    # Build welcome text.
-    text = f"Hi {message.from_user.first_name}! Choose a game to play:\n" # message.from_user.first_name is guranteed to exist. 
 
-    # Iterate through all available games to build menu.
-    for index, game in enumerate(GAMES_TO_PLAY, 1): # enumerate(GAMES_TO_PLAY, 1) starts counting from 1 instead of 0.
-        # Retrieve game name.
-        name = await game.name()
-        
-        # Append game info: number, name, and description.
-        # Example formatted: "1. TicTacToe\nTicTacToe description"
-        text += f"{index}. {name}\n{await game.description()}\n\n"
-
-        # Create a keyboard button with the game name.
-        keyboard.append(KeyboardButton(text=name,))
-
-    # Send the constructed message to the user.
-    await message.answer(
-        text, # add text to the message
-        reply_markup=ReplyKeyboardMarkup( # add a keyboard to the message.
-            keyboard=[keyboard],  # in `aiogram``, keyboard is a list of rows
-            one_time_keyboard=True,  # Keyboard disappears after user chooses game
-            resize_keyboard=True,  # Keyboard resizes to fit. (shorter height)
-        ),
-    )
+# Admin command capturing a CPU profile of the running bot. Registered before game handlers, which accept any text.
+@dp.message(Command("profile"), F.from_user.id.in_(ADMIN_IDS)) # Include method into handlers.
+async def profile_command(message: Message, command: CommandObject, reply: Reply):
+    """
+    Handle `/profile [seconds] [updates]` of an admin: profile the bot for `seconds` seconds (10 by default),
+    or until `updates` updates are handled. The summary is sent when the capture ends (see `src/profiling.py`).
+
+    Args:
+        message: Incoming message containing user info and message data.
+        command: Parsed command, `command.args` holds its arguments.
+        reply: Replies to the message, sent together after the handler (see `src/replies.py`).
+
+    Returns:
+        None.
+    Expected time complexity: O(1)
+    """
+    try:
+        args = [float(arg) for arg in (command.args or "").split()][:2]
+        seconds = args[0] if args else 10.0
+        updates = int(args[1]) if len(args) > 1 else None
+        done = profiler.start(seconds, updates)
+    except (ValueError, RuntimeError) as error:
+        reply.add(f"Can not profile: {html.escape(str(error))}")
+        return  # Exit function early
+    profile_tasks.add(task := asyncio.create_task(send_profile(message.chat.id, done)))
+    task.add_done_callback(profile_tasks.discard)
+    reply.add(f"Profiling for {seconds:g} s" + (f" or {updates} updates." if updates else "."))
+
+
+# Tasks waiting for profiles to send them to admins.
+profile_tasks: set[asyncio.Task] = set()
+
+
+async def send_profile(chat_id: int, done: asyncio.Future[tuple[str, str]]):
+    """
+    Wait for a profile capture to end and send its summary to an admin chat.
+    """
+    path, summary = await done
+    header = f"Profile saved to <code>{html.escape(path)}</code>\n" if path else "Profile could not be saved.\n"
+    await bot.send_message(chat_id, preformatted(header, summary))
+
+
+# Admin command reporting memory use of the bot process.
+@dp.message(Command("memory"), F.from_user.id.in_(ADMIN_IDS)) # Include method into handlers.
+async def memory_command(message: Message, reply: Reply):
+    """
+    Handle `/memory` of an admin: reply with estimated sizes of games, caches and sessions,
+    object counts per type and, if tracemalloc is tracing, top allocations since the previous report
+    (see `src/memory.py`).
+
+    Args:
+        message: Incoming message containing user info and message data.
+        reply: Replies to the message, sent together after the handler (see `src/replies.py`).
+
+    Returns:
+        None.
+    Expected time complexity: O(n) where n is amount of objects in the process
+    """
+    reply.add(preformatted("", await inspector.report()))
+
+
+def preformatted(header: str, text: str) -> str:
+    """
+    Return `header` (HTML) followed by `text` as a preformatted block, with `text` cut to fit into a single message.
+    """
+    room = MESSAGE_LIMIT - len(header) - len("<pre></pre>")
+    text = html.escape(text)
+    if len(text) > room:
+        text = text[:text.rfind("\n", 0, room)]  # Cut at a line end, never inside an escaped character.
+    return f"{header}<pre>{text}</pre>"
 
 
 # Function used to parse user's chosen game from string.
 @dp.message(Form.choose_game) # Include method into handlers.
-async def choose_game(message: Message, state: FSMContext):
+async def choose_game(message: Message, state: FSMContext, reply: Reply):
     """
     Parse game selection from user input.
 
     This function validates the user's game choice and initializes the game session:
         1. Extract game name from message text.
-        2. Search for matching game in GAMES_TO_PLAY list.
+        2. Look up matching game in the registry.
             a. If invalid, resend game menu with error message.
             b. If valid,
                 I. Initialize game state and transition to play_game state.
@@ -242,47 +533,26 @@ async def choose_game(message: Message, state: FSMContext):
     Args:
         message: Incoming message containing user info and message data.
         state: FSM context for managing conversation state and storing data.
+        reply: Replies to the message, sent together after the handler.
 
     Returns:
         None.
-    Expected time complexity: O(n) where n is number of games
+    Expected time complexity: O(1)
     """
     # Get game name from user's message.
-    game_name = message.text
+    game_name = message.text or ""
     
-    # Search for the selected game in GAMES_TO_PLAY list.
-    selected_game = None
-    for game in GAMES_TO_PLAY:
-        if await game.name() == game_name: # Compare user input with game name.
-            selected_game = game # once game is found, update `selected_game`
-            break  # Exit loop early once game name is found
+    # Look up the selected game in the registry (dictionary lookup, case insensitive).
+    # Game module is imported on the first selection of the game.
+    selected_game = await registry.get(game_name)
     
     if not selected_game: # Handle when game name is invalid
-        # Build erorr text.
-        text = "Invalid game selection. Please choose from the list.\n"
-        # Initialize list to hold keyboard buttons.
-        keyboard = []
-        # Iterate through all available games to build menu.
-        for index, game in enumerate(GAMES_TO_PLAY, 1): # enumerate(GAMES_TO_PLAY, 1) starts counting from 1 instead of 0.
-            # Retrieve game name.
-            name = await game.name()
-            
-            # Append game info: number, name, and description.
-            # Example formatted: "1. TicTacToe\nTicTacToe description"
-            text += f"{index}. {name}\n{await game.description()}\n\n"
-
-            # Create a keyboard button with the game name.
-            keyboard.append(KeyboardButton(text=name,))
-
-        # Send the constructed message to the user.
-        await message.answer(
-            text, # add text to the message
-            reply_markup=ReplyKeyboardMarkup( # add a keyboard to the message.
-                keyboard=[keyboard],  # in `aiogram``, keyboard is a list of rows
-                one_time_keyboard=True,  # Keyboard disappears after user chooses game
-                resize_keyboard=True,  # Keyboard resizes to fit. (shorter height)
-            ),
-        )
+        # Send the pre-built menu with an error header.
+        with low_priority():
+            reply.add(
+                MENU.render("Invalid game selection. Please choose from the list."),
+                reply_markup=menu_keyboard(),
+            )
         return  # Exit function early
 
     # If we reach this line, we received valid game name.
@@ -290,8 +560,8 @@ async def choose_game(message: Message, state: FSMContext):
     # Initialize the selected game's starting state.
     game_state = await selected_game.initial_state()
     
-    # Store game instance and current state in FSM context.
-    await state.update_data(game=selected_game, game_state=game_state)
+    # Store game name and encoded state in FSM context (see `src/session.py`).
+    await state.update_data(**await pack_game(selected_game, game_state))
     
     # Transition FSM to play_game state.
     await state.set_state(Form.play_game)
@@ -302,24 +572,21 @@ async def choose_game(message: Message, state: FSMContext):
     # Get all valid moves from current position.
     legal_moves = await selected_game.get_legal_moves(game_state)
     
-    # Create keyboard with all legal moves.
-    # Example: [[move1], [move2], [move3], ...]
-    keyboard = [[KeyboardButton(text=str(move))] for move in legal_moves]
-    
     # Send message with initial board state and move options.
-    await message.answer(
+    reply.add(
         f"Let's play {await selected_game.name()}!\n\n{state_text}\n\nYour move:",
-        reply_markup=ReplyKeyboardMarkup(
-            keyboard=keyboard,  # Each legal move
-            one_time_keyboard=True,  # Keyboard will refresh after each move
-            resize_keyboard=True,  # Keyboard resizes to fit. (shorter height)
-        ),
+        reply_markup=await moves_keyboard(selected_game, game_state, legal_moves),  # Each legal move
     )
 
+    # In inline mode, remember which message holds the active board, see play_game_callback.
+    if UI_MODE == "inline":
+        sent = tp.cast(Message, await reply.flush())
+        await state.update_data(message_id=sent.message_id)
+
 
 # Function used to play the whole game.
 @dp.message(Form.play_game) # Include method into handlers.
-async def play_game(message: Message, state: FSMContext):
+async def play_game(message: Message, state: FSMContext, reply: Reply):
     """
     Handle gameplay.
     
@@ -329,13 +596,14 @@ async def play_game(message: Message, state: FSMContext):
         3. Adds user's move to game state
         4. Checks if game ended.
             a. If state is terminal, displays the result.
-            b. If state is not terminal, generates and adds bot's move
+            b. If state is not terminal, generates and adds bot's move (see play_turn)
         6. Checks if game ended.
             a. If state is terminal, displays the result
             b. If the state is not terminal, diplay the state with moves.
     Args:
         message: Incoming message containing user info and message data.
         state: FSM context for managing conversation state and storing data.
+        reply: Replies to the message, sent together after the handler.
     
     Returns:
         None.
@@ -344,11 +612,13 @@ async def play_game(message: Message, state: FSMContext):
     # Retrieve data from FSM context.
     data = await state.get_data()
     
-    # Extract game instance.
-    game: Game = data["game"]
-    
-    # Extract game state.
-    game_state = data["game_state"]
+    # Restore game instance and decode game state.
+    session = await unpack_game(registry, data)
+    if session is None:
+        # Stored game is missing or can not be decoded (e.g. game was removed). Start over.
+        await start(message, state, reply)
+        return  # Exit early
+    game, game_state = session
 
     # Get user's move as string and remove starting/ending probels.
     move_str = message.text.strip()
@@ -363,73 +633,349 @@ async def play_game(message: Message, state: FSMContext):
     if parsed_move is None or parsed_move not in legal_moves:
         # if we reach this line, then move is invalid.
 
-        # Build keyboard with legal moves.
-        # Example: [[move1], [move2], [move3], ...]
-        keyboard = [[KeyboardButton(text=str(move))] for move in legal_moves]
-
         # Send error with list of legal moves.
-        await message.answer(
+        reply.add(
             "Invalid move. Please try again.",
-            reply_markup=ReplyKeyboardMarkup(
-                keyboard=keyboard,  # Show legal moves 
-                one_time_keyboard=True,  # Refresh after selection
-                resize_keyboard=True,  # Keyboard resizes to fit. (shorter height)
-            ),
+            reply_markup=await moves_keyboard(game, game_state, legal_moves),  # Show legal moves
         )
         return  # Exit early, so that we dont parse invalid for current state move
     
-    # Apply user's move to the game state.
-    game_state = await game.add_move(game_state, parsed_move)
+    # Apply user's move and bot's response to the game state.
+    game_state, bot_move = await play_turn(game, game_state, parsed_move)
     
-    # Check if game ended.
-    if await game.is_terminal(game_state):
-        # Update stored state before showing game over screen.
-        await state.update_data(game_state=game_state)
-        
+    # Update FSM context with new encoded state.
+    await state.update_data({STATE_KEY: await pack_state(game, game_state)})
+    
+    # Check if game ended with user's move.
+    if bot_move is None:
         # Display game result and restart game selection.
-        await send_game_over(message, state, game, game_state)
+        await send_game_over(message, state, reply, game, game_state)
         return  # Exit, game is over
     
-    # Game has not ended - generating bot's response-move.
-    bot_move = await game.generate_best_move(game_state)
-    
-    # Apply bot's move to the game state.
-    game_state = await game.add_move(game_state, bot_move)
-    
-    # Update FSM context with new state after bot's move.
-    await state.update_data(game_state=game_state)
-    
     # Format current game state.
     state_text = await game.format_state(game_state)
     
     # Check if game ended after bot's move.
     if await game.is_terminal(game_state):
         # Display bot's move and final board state.
-        await message.answer(f"Bot played: {bot_move}\n\n{state_text}")
+        # Board, result and menu are sent as a single message.
+        reply.add(f"Bot played: {bot_move}\n\n{state_text}")
         
         # Show game result.
-        await send_game_over(message, state, game, game_state)
+        await send_game_over(message, state, reply, game, game_state)
         return  # Exit, game is over
     
     # Game continues - get next legal user moves.
     legal_moves = await game.get_legal_moves(game_state)
     
-    # Create keyboard with new legal user moves.
-    keyboard = [[KeyboardButton(text=str(move))] for move in legal_moves]
-    
     # Send response with bot's move and legal moves.
-    await message.answer(
+    reply.add(
         f"Bot played: {bot_move}\n\n{state_text}\n\nYour move:",
-        reply_markup=ReplyKeyboardMarkup(
-            keyboard=keyboard,  # Show current legal moves
-            one_time_keyboard=True,  # Refresh after each move
-            resize_keyboard=True,  # Keyboard resizes to fit. (shorter height)
-        ),
+        reply_markup=await moves_keyboard(game, game_state, legal_moves),  # Show current legal moves
+    )
+
+    # In inline mode, the new message holds the active board from now on.
+    if UI_MODE == "inline":
+        sent = tp.cast(Message, await reply.flush())
+        await state.update_data(message_id=sent.message_id)
+
+
+async def holds_expired_marker(message: Message, state: FSMContext) -> bool:
+    """
+    Filter of messages from users whose expired session left a marker (see `src/storage.py`).
+    Expected time complexity: O(1)
+    """
+    return await state.get_state() is None and await state.get_value(EXPIRED_STATE) is not None
+
+
+# Messages from users whose session has expired (see SESSION_TTL), registered after all other message handlers.
+# Messages of new users who never sent /start stay unanswered.
+@dp.message(holds_expired_marker) # Include method into handlers.
+async def expired_session(message: Message, state: FSMContext, reply: Reply):
+    """
+    Handle a message from a user whose session has expired.
+
+    Tells the user that the game has expired if the storage replaced an expired game by a marker
+    (unless EXPIRED_NOTICE is disabled), clears the marker and displays the game menu.
+
+    Args:
+        message: Incoming message containing user info and message data.
+        state: FSM context for managing conversation state and storing data.
+        reply: Replies to the message, sent together after the handler.
+
+    Returns:
+        None.
+    Expected time complexity: O(1)
+    """
+    expired = await state.get_value(EXPIRED_STATE)
+    await state.set_data({})  # The notice is shown once.
+    if EXPIRED_NOTICE and expired == Form.play_game.state:
+        reply.add("Your game has expired.")
+    await start(message, state, reply)
+
+
+# Inline mode: user pressed a game button of the menu.
+@dp.callback_query(F.data.startswith(GAME_CALLBACK_PREFIX)) # Include method into handlers.
+async def choose_game_callback(callback: CallbackQuery, state: FSMContext):
+    """
+    Start a game chosen with an inline menu button.
+
+    The menu message is edited in place into the initial board, which becomes the active board of the game.
+    Buttons of any menu message work, regardless of the current FSM state.
+
+    Args:
+        callback: Incoming callback query, `callback.data` is GAME_CALLBACK_PREFIX followed by the game number.
+        state: FSM context for managing conversation state and storing data.
+
+    Returns:
+        None.
+    Expected time complexity: O(1)
+    """
+    # Parse game number, numbering starts from 1 (see menu.build_menu).
+    number = callback.data[len(GAME_CALLBACK_PREFIX):]
+    if not number.isdigit() or not 1 <= int(number) <= len(GAMES_TO_PLAY) or callback.message is None:
+        await callback.answer("Invalid game selection.")
+        return  # Exit function early
+
+    # Game is looked up by its declared name, module is imported on first selection.
+    selected_game = tp.cast(Game, await registry.get(GAMES_TO_PLAY[int(number) - 1].name))
+
+    # Initialize game, remember the message holding the board.
+    game_state = await selected_game.initial_state()
+    await state.update_data(**await pack_game(selected_game, game_state), message_id=callback.message.message_id)
+    await state.set_state(Form.play_game)
+
+    # Turn the menu message into the board.
+    state_text = await selected_game.format_state(game_state)
+    legal_moves = await selected_game.get_legal_moves(game_state)
+    await callback.message.edit_text(
+        f"Let's play {await selected_game.name()}!\n\n{state_text}\n\nYour move:",
+        reply_markup=await moves_keyboard(selected_game, game_state, legal_moves, inline=True),
     )
 
+    # Stop the loading indicator on the button.
+    await callback.answer()
+
+
+# Inline mode: user pressed a move button of the active board.
+@dp.callback_query(Form.play_game, F.data.startswith(MOVE_CALLBACK_PREFIX)) # Include method into handlers.
+async def play_game_callback(callback: CallbackQuery, state: FSMContext):
+    """
+    Handle gameplay through inline buttons.
+
+    Same flow as `play_game`, but instead of sending new messages the board message is edited in place.
+    When the game ends, the board message shows final board, result and the game menu.
+    Invalid moves and buttons of old boards are answered with a short notification, without messages.
+
+    Args:
+        callback: Incoming callback query, `callback.data` is MOVE_CALLBACK_PREFIX followed by the move.
+        state: FSM context for managing conversation state and storing data.
+
+    Returns:
+        None.
+    Expected time complexity: O(n) where n depends on game move generation
+    """
+    data = await state.get_data()
+
+    # Only the most recent board of the current game accepts moves.
+    if callback.message is None or data.get("message_id") != callback.message.message_id:
+        await callback.answer("This board is no longer active.")
+        return  # Exit function early
+
+    session = await unpack_game(registry, data)
+    if session is None:
+        await callback.answer("This board is no longer active.")
+        return  # Exit function early
+    game, game_state = session
+
+    # Parse and validate the move, same as in play_game.
+    parsed_move = await game.parse_move(callback.data[len(MOVE_CALLBACK_PREFIX):])
+    legal_moves = await game.get_legal_moves(game_state)
+    if parsed_move is None or parsed_move not in legal_moves:
+        await callback.answer("Invalid move. Please try again.")
+        return  # Exit function early
+
+    # Apply user's move and bot's response to the game state.
+    game_state, bot_move = await play_turn(game, game_state, parsed_move)
+    await state.update_data({STATE_KEY: await pack_state(game, game_state)})
+
+    state_text = await game.format_state(game_state)
+    if bot_move is not None:
+        state_text = f"Bot played: {bot_move}\n\n{state_text}"
+
+    if await game.is_terminal(game_state):
+        # Show final board, result and menu in the same message.
+        await state.set_state(Form.choose_game)
+        await callback.message.edit_text(
+            f"{state_text}\n\n{result_text(await game.get_winner(game_state))}\n\n"
+            + MENU.render("Choose a game to play:"),
+            reply_markup=MENU.inline_markup,
+        )
+    else:
+        legal_moves = await game.get_legal_moves(game_state)
+        await callback.message.edit_text(
+            f"{state_text}\n\nYour move:",
+            reply_markup=await moves_keyboard(game, game_state, legal_moves, inline=True),
+        )
+
+    # Stop the loading indicator on the button.
+    await callback.answer()
+
+
+# Inline mode: move button pressed while no game is being played (e.g. on an old board).
+@dp.callback_query(F.data.startswith(MOVE_CALLBACK_PREFIX)) # Include method into handlers.
+async def stale_move_callback(callback: CallbackQuery, state: FSMContext):
+    """
+    Answer move buttons of finished or expired games.
+    """
+    # A marker left in place of an expired game, see `expired_session`.
+    if await state.get_state() is None and await state.get_value(EXPIRED_STATE) == Form.play_game.state:
+        await state.set_data({})  # The notice is shown once.
+        if EXPIRED_NOTICE:
+            await callback.answer("Your game has expired.")
+            return  # Exit function early
+    await callback.answer("This board is no longer active.")
+
+
+# Starts the loop monitor and the metrics endpoint before warm-up, so that probes see the bot is not ready yet.
+async def start_monitoring():
+    """
+    Start the event loop monitor and serve metrics and health probes, if METRICS_PORT is set.
+    """
+    global metrics_runner
+    monitor.start()
+    if METRICS_PORT is not None:
+        app = build_app(REGISTRY)
+        add_health_routes(app, monitor)
+        add_profile_routes(app, profiler)
+        add_memory_routes(app, inspector)
+        metrics_runner = web.AppRunner(app, access_log=None)
+        await metrics_runner.setup()
+        await web.TCPSite(metrics_runner, METRICS_HOST, METRICS_PORT).start()
+        logging.info("Serving metrics at http://%s:%d/metrics", METRICS_HOST, METRICS_PORT)
+
+
+# Sweeps expired sessions in the background while the bot is running.
+@dp.startup()
+async def on_startup():
+    """
+    Start periodic sweep of expired sessions and report the bot ready.
+    Called after warm-up, once the bot starts taking updates.
+    """
+    global sweeper
+    if SESSION_TTL is not None:
+        sweeper = asyncio.create_task(sweep_sessions())
+    monitor.ready = True
+
+
+# Releases engine executors when polling stops.
+@dp.shutdown()
+async def on_shutdown():
+    """
+    Stop the session sweep, the monitor, the metrics endpoint, the outbound limiter and shut down engine worker pools.
+    """
+    monitor.ready = False
+    if sweeper is not None:
+        sweeper.cancel()
+    monitor.stop()
+    if metrics_runner is not None:
+        await metrics_runner.cleanup()
+    outbound.close()
+    engine.shutdown()
+
+
+# Background task started by on_startup and metrics server started by start_monitoring.
+sweeper: tp.Optional[asyncio.Task] = None
+metrics_runner: tp.Optional[web.AppRunner] = None
+
+
+async def sweep_sessions():
+    """
+    Delete expired sessions every SESSION_SWEEP_INTERVAL seconds, logging how many were deleted.
+
+    Expected time complexity: O(e) per sweep where e is amount of expired sessions.
+    """
+    while True:
+        await asyncio.sleep(SESSION_SWEEP_INTERVAL)
+        if expired := await storage.expire_idle():
+            logging.info("Expired %d idle sessions (%d in total)", expired, storage.expired)
+
+
+# Applies user's move and bot's response.
+async def play_turn(game: Game, game_state: tp.Any, move: tp.Any) -> tuple[tp.Any, tp.Any]:
+    """
+    Apply a legal user move and, unless it ends the game, the bot's response.
+
+    Args:
+        game: Game instance.
+        game_state: Current game state.
+        move: Legal user move.
+
+    Returns:
+        tuple[tp.Any, tp.Any]: new game state and bot's move. Bot's move is None if user's move ended the game.
+    Expected time complexity: O(n) where n depends on game move generation
+    """
+    # Apply user's move to the game state.
+    game_state = await game.add_move(game_state, move)
+
+    # Check if game ended.
+    if await game.is_terminal(game_state):
+        return game_state, None
+
+    # Game has not ended - generating bot's response-move.
+    # Engine runner executes it off the event loop, if configured for this game.
+    bot_move = await engine.generate_best_move(game, game_state)
+
+    # Apply bot's move to the game state.
+    return await game.add_move(game_state, bot_move), bot_move
+
+
+# Returns a (possibly shared) keyboard with legal moves.
+async def moves_keyboard(
+    game: Game, game_state: tp.Any, legal_moves: list[tp.Any], inline: bool = UI_MODE == "inline"
+) -> ReplyKeyboardMarkup | InlineKeyboardMarkup:
+    """
+    Return keyboard with one button per legal move, reused from KEYBOARDS when possible.
+
+    Args:
+        game: Game instance.
+        game_state: Current game state.
+        legal_moves: Legal moves in `game_state`.
+        inline: Return an inline keyboard. Defaults to UI_MODE.
+
+    Returns:
+        ReplyKeyboardMarkup | InlineKeyboardMarkup: keyboard to attach to a message. Must not be modified.
+    Expected time complexity: O(1) on a cache hit
+    """
+    return KEYBOARDS.get(await game.name(), await game.keyboard_key(game_state), legal_moves, inline=inline)
+
+
+# Returns the pre-built menu keyboard for current UI_MODE.
+def menu_keyboard() -> ReplyKeyboardMarkup | InlineKeyboardMarkup:
+    """
+    Return the shared game selection keyboard: inline in inline mode, reply keyboard otherwise.
+    """
+    return MENU.inline_markup if UI_MODE == "inline" else MENU.markup
+
+
+# Converts winner into a human readable result.
+def result_text(winner: tp.Optional[int]) -> str:
+    """
+    Return result message for a winner as returned by `Game.get_winner`.
+    """
+    if winner == 1:
+        # Player (user) won the game
+        return "You won!"
+    elif winner == -1:
+        # Bot won the game
+        return "You lost."
+    else:
+        # Draw
+        return "It's a draw."
+
 
 # Handles game-overs.
-async def send_game_over(message: Message, state: FSMContext, game: Game, game_state: tp.Any):
+async def send_game_over(message: Message, state: FSMContext, reply: Reply, game: Game, game_state: tp.Any):
     """
     Display winner and restart game selection.
     
@@ -437,12 +983,13 @@ async def send_game_over(message: Message, state: FSMContext, game: Game, game_s
     It:
         1. Retrieves the winner from the terminal game state.
         2. Formats appropriate message based on winner.
-        3. Displays result message to user.
-        4. Restarts game selection by calling start() function.
+        3. Adds result message to the reply.
+        4. Restarts game selection by calling start() function, the menu is sent in the same message.
     
     Args:
         message: Incoming message containing user info and message data.
         state: FSM context for managing conversation state and storing data.
+        reply: Replies to the message, sent together after the handler.
         game: Game instance.
         game_state: Terminal game state.
     
@@ -453,22 +1000,128 @@ async def send_game_over(message: Message, state: FSMContext, game: Game, game_s
     # Determine who won the game.
     winner = await game.get_winner(game_state)
     
-    # Format result message based on winner.
-    if winner == 1:
-        # Player (user) won the game
-        result_text = "You won!"
-    elif winner == -1:
-        # Bot won the game
-        result_text = "You lost."
-    elif winner == 0:
-        # Draw
-        result_text = "It's a draw."
-    
-    # Send game result message to user.
-    await message.answer(result_text)
+    # Add game result to the reply.
+    reply.add(result_text(winner))
     
-    # Restart game selection process.
-    await start(message, state)
+    # Restart game selection process, the menu joins the same message.
+    await start(message, state, reply)
+
+
+# Warm-up is enabled unless WARM_UP environment variable is set to "0".
+WARM_UP = os.getenv("WARM_UP", "1") != "0"
+
+
+async def warm_up_games():
+    """
+    Warm up every game before the bot starts taking traffic.
+
+    Each game builds its engine tables and caches (see `Game.warm_up`) where its engine runs,
+    so the first users after a restart get the same latency as everyone else.
+    Time spent on each game is logged.
+
+    Returns:
+        None.
+    Expected time complexity: sum of warm-up times of all games.
+    """
+    for game in await registry.all():  # Creates every game.
+        started = time.perf_counter()
+        await engine.warm_up(game)
+        logging.info("Warmed up %s in %.3f s", await game.name(), time.perf_counter() - started)
+
+
+async def main():
+    """
+    Start monitoring, warm up games (if enabled) and start polling updates from Telegram.
+    """
+    await start_monitoring()
+    if WARM_UP:
+        await warm_up_games()
+    await dp.start_polling(bot)
+
+
+# How updates are received, set by RUN_MODE environment variable:
+#   - "polling": the bot asks Telegram for updates (default), a single process handles all of them.
+#   - "webhook": Telegram posts updates to WEBHOOK_URL, served by aiohttp, see `src/webhook.py`. Settings:
+#       - WEBHOOK_URL: public HTTPS URL of the webhook, e.g. https://bot.example.com/webhook. Required.
+#         Its path is also the path served locally.
+#       - WEBHOOK_HOST, WEBHOOK_PORT: address to listen on, 0.0.0.0:8080 by default.
+#       - WEBHOOK_SECRET: secret token Telegram sends with every update, requests without it are rejected.
+#       - WEBHOOK_WORKERS: amount of worker processes, 1 by default. With more than one worker
+#         a router process listens on the port and forwards every chat's updates to one and the same worker.
+RUN_MODE = os.getenv("RUN_MODE", "polling")
+if RUN_MODE not in ("polling", "webhook"):
+    raise RuntimeError('RUN_MODE must be either "polling" or "webhook"')
+WEBHOOK_URL = os.getenv("WEBHOOK_URL")
+WEBHOOK_PATH = urlsplit(WEBHOOK_URL).path or "/" if WEBHOOK_URL else "/webhook"
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8080"))
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "1"))
+
+
+async def set_webhook():
+    """
+    Register WEBHOOK_URL with Telegram, so that updates are posted to it.
+    """
+    await bot.set_webhook(
+        WEBHOOK_URL,
+        secret_token=WEBHOOK_SECRET,
+        allowed_updates=dp.resolve_used_update_types(),
+    )
+    # The session belongs to this event loop, the web server runs another one.
+    await bot.session.close()
+
+
+async def warm_up_on_startup(app: web.Application):
+    """
+    Start monitoring and warm up games (if enabled) before the web server starts taking updates.
+    """
+    await start_monitoring()
+    if WARM_UP:
+        await warm_up_games()
+
+
+def run_webhook():
+    """
+    Register the webhook and serve it, in this process or in WEBHOOK_WORKERS worker processes.
+    Blocks until the server is stopped (e.g. with SIGINT or SIGTERM).
+    """
+    if WEBHOOK_URL is None:
+        raise RuntimeError("WEBHOOK_URL must be set in webhook mode")
+    if WEBHOOK_WORKERS < 1:
+        raise RuntimeError("WEBHOOK_WORKERS must be a positive number")
+    asyncio.run(set_webhook())
+
+    if WEBHOOK_WORKERS == 1:
+        app = build_worker_app(dp, bot, WEBHOOK_PATH, WEBHOOK_SECRET)
+        app.on_startup.insert(0, warm_up_on_startup)
+        web.run_app(app, host=WEBHOOK_HOST, port=WEBHOOK_PORT)
+        return
+
+    # Router checks the secret and forwards updates to workers through Unix sockets.
+    sockets = socket_paths(WEBHOOK_WORKERS)
+    processes = start_workers(run_webhook_worker, sockets)
+    try:
+        web.run_app(build_router_app(sockets, WEBHOOK_PATH, WEBHOOK_SECRET), host=WEBHOOK_HOST, port=WEBHOOK_PORT)
+    finally:
+        stop_workers(processes, sockets)
+
+
+def run_webhook_worker(index: int, socket: str):
+    """
+    Entry point of a worker process: serve updates forwarded by the router on a Unix socket.
+    Every worker has its own bot, dispatcher, sessions and engine executors, and its own metrics port.
+    Every worker also has its own rate limiter, so each one gets an equal share of the global limit:
+    all workers together send no more than a single process would.
+    """
+    global METRICS_PORT
+    logging.basicConfig(level=logging.INFO, stream=sys.stdout)
+    if METRICS_PORT is not None:
+        METRICS_PORT += index
+    outbound.global_rate = outbound.global_rate.share(WEBHOOK_WORKERS)
+    app = build_worker_app(dp, bot, WEBHOOK_PATH)
+    app.on_startup.insert(0, warm_up_on_startup)
+    web.run_app(app, path=socket, print=None)
 
 
 # Standard Python technique to check if script is run directly.
@@ -480,6 +1133,10 @@ if __name__ == "__main__":
     
     # Start the bot's event loop.
     # asyncio.run() creates new event loop, runs the coroutine, and closes the loop.
-    # dp.start_polling(bot) begins long-polling for updates from Telegram servers.
+    # main() warms up games, then dp.start_polling(bot) begins long-polling for updates from Telegram servers.
     # Link: https://docs.aiogram.dev/en/latest/dispatcher/index.html
-    asyncio.run(dp.start_polling(bot))
+    # In webhook mode aiohttp web server runs its own event loop instead.
+    if RUN_MODE == "webhook":
+        run_webhook()
+    else:
+        asyncio.run(main())
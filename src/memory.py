@@ -0,0 +1,219 @@
+"""
+               GLWT(Good Luck With That) Public License
+                 Copyright (c) Everyone, except Author
+
+Everyone is permitted to copy, distribute, modify, merge, sell, publish,
+sublicense or whatever they want with this software but at their OWN RISK.
+
+                            Preamble
+
+The author has absolutely no clue what the code in this project does.
+It might just work or not, there is no third option.
+
+
+                GOOD LUCK WITH THAT PUBLIC LICENSE
+   TERMS AND CONDITIONS FOR COPYING, DISTRIBUTION, AND MODIFICATION
+
+  0. You just DO WHATEVER YOU WANT TO as long as you NEVER LEAVE A
+TRACE TO TRACK THE AUTHOR of the original product to blame for or hold
+responsible.
+
+IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+
+Good luck and Godspeed.
+"""
+
+"""
+Module `src/memory.py` tells where the memory of the bot process goes.
+---
+Memory of the bot grows with sessions, engine tables, keyboard caches and aiogram internals.
+To size containers and to catch leaks of new games, `MemoryInspector` provides:
+
+    1. Cheap gauges, exported as metrics on every scrape (see `src/metrics.py`):
+        resident set size of the process, and memory traced by `tracemalloc` (if tracing).
+
+    2. An on demand report (admin `/memory` command and `GET /memory` on the metrics port, see `add_routes`):
+        a. Estimated size of every tracked component (sessions, keyboards, each game with its module globals), in bytes.
+            The estimate walks all objects reachable from the component (`gc.get_referents`),
+            summing `sys.getsizeof`, without following classes, modules and functions. Objects shared
+            between components are counted in each of them. Link: https://docs.python.org/3/library/sys.html#sys.getsizeof
+        b. Amount of live objects per type (e.g. `TicTacToeState`, `NimState`, `Move`), top types first.
+            A type whose count only grows between reports is leaking.
+        c. If `tracemalloc` is tracing (e.g. `PYTHONTRACEMALLOC=1` environment variable), source lines
+            allocating most memory since the previous report, from a diff of two snapshots.
+            Link: https://docs.python.org/3/library/tracemalloc.html
+
+The report walks the whole heap on the event loop: it takes tens of milliseconds, and seconds with tracemalloc
+snapshots (tracing itself slows allocations down too), so it is meant for occasional manual use only. Game tables of engines running in worker processes
+(see `src/engine.py`) are not in this process and are not counted.
+
+Typical usage example:
+```
+inspector = MemoryInspector()
+inspector.track("sessions", lambda: storage)
+REGISTRY.stats("bot_memory", inspector.stats)
+print(await inspector.report())
+```
+"""
+
+import asyncio
+import gc
+import os
+import sys
+import tracemalloc
+import types
+import typing as tp
+from collections import Counter
+
+from aiohttp import web
+
+# Objects not followed when estimating sizes: they are shared by the whole process, not owned by a component.
+# E.g. a lock of a storage refers to the event loop, which refers to everything scheduled on it.
+_SHARED = (
+    type,
+    types.ModuleType,
+    types.FunctionType,
+    types.BuiltinFunctionType,
+    types.MethodType,
+    types.CodeType,
+    asyncio.AbstractEventLoop,
+)
+
+
+def deep_size(root: object) -> int:
+    """
+    Returns estimated amount of bytes of `root` and all objects reachable from it, see module documentation.
+    Time complexity: O(n) where n is amount of reachable objects.
+    """
+    seen = {id(root)}
+    stack = [root]
+    size = 0
+    while stack:
+        obj = stack.pop()
+        size += sys.getsizeof(obj)
+        for referent in gc.get_referents(obj):
+            if id(referent) not in seen and not isinstance(referent, _SHARED):
+                seen.add(id(referent))
+                stack.append(referent)
+    return size
+
+
+def _rss() -> tp.Optional[int]:
+    """
+    Returns resident set size of the process in bytes, or None where /proc is not available.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _bytes(amount: float) -> str:
+    """
+    Formats amount of bytes, e.g. "12.3 MiB".
+    """
+    for unit in ("B", "KiB", "MiB"):
+        if abs(amount) < 1024:
+            return f"{amount:.1f} {unit}" if unit != "B" else f"{amount:.0f} B"
+        amount /= 1024
+    return f"{amount:.1f} GiB"
+
+
+# Memory gauges and on demand memory reports of the process.
+class MemoryInspector:
+    """
+    Memory gauges and on demand memory reports of the process, see module documentation.
+
+    Attributes:
+        top: amount of lines in each section of a report.
+    """
+
+    def __init__(self, top: int = 15):
+        self.top = top
+        self._tracked: dict[str, tp.Callable[[], object]] = {}
+        self._snapshot: tp.Optional[tracemalloc.Snapshot] = None  # Snapshot of the previous report.
+
+    def track(self, name: str, source: tp.Callable[[], object]):
+        """
+        Adds a component to reports. `source` returns the object owning the component's memory,
+        it is called on every report, so components created later (e.g. games) are seen.
+        """
+        self._tracked[name] = source
+
+    def track_game(self, name: str, game: object):
+        """
+        Adds a game to reports. Its size includes the module defining the game,
+        as engine tables shared by all instances are often kept in module globals.
+        """
+        module_globals = vars(sys.modules[type(game).__module__])
+        self.track(f"game {name}", lambda: (game, module_globals))
+
+    def stats(self) -> dict[str, int]:
+        """
+        Returns cheap gauges: resident set size, and traced memory (current and peak) if tracemalloc is tracing.
+        Time complexity: O(1)
+        """
+        stats = {}
+        if (rss := _rss()) is not None:
+            stats["rss_bytes"] = rss
+        if tracemalloc.is_tracing():
+            stats["traced_bytes"], stats["traced_peak_bytes"] = tracemalloc.get_traced_memory()
+        return stats
+
+    def sizes(self) -> dict[str, int]:
+        """
+        Returns estimated size of every tracked component in bytes.
+        """
+        return {name: deep_size(source()) for name, source in self._tracked.items()}
+
+    def object_counts(self) -> Counter[str]:
+        """
+        Returns amount of live objects tracked by the garbage collector per type name.
+        Time complexity: O(n) where n is amount of such objects.
+        """
+        return Counter(type(obj).__qualname__ for obj in gc.get_objects())
+
+    def allocations(self) -> list[str]:
+        """
+        Returns source lines allocating most memory since the previous call (since start for the first call),
+        or an empty list if tracemalloc is not tracing.
+        """
+        if not tracemalloc.is_tracing():
+            return []
+        snapshot = tracemalloc.take_snapshot()
+        if self._snapshot is None:
+            lines = [str(stat) for stat in snapshot.statistics("lineno")[: self.top]]
+        else:
+            lines = [str(stat) for stat in snapshot.compare_to(self._snapshot, "lineno")[: self.top]]
+        self._snapshot = snapshot
+        return lines
+
+    async def report(self) -> str:
+        """
+        Returns a text report of memory use, see module documentation.
+        """
+        lines = [f"Process {os.getpid()}:"]
+        lines.extend(f"  {key}: {_bytes(value)}" for key, value in self.stats().items())
+        lines.append("Estimated sizes:")
+        lines.extend(f"  {name}: {_bytes(size)}" for name, size in self.sizes().items())
+        lines.append("Objects by type:")
+        lines.extend(f"  {name}: {count}" for name, count in self.object_counts().most_common(self.top))
+        if tracemalloc.is_tracing():
+            lines.append("Allocations since previous report:" if self._snapshot else "Top allocations:")
+            lines.extend(f"  {line}" for line in self.allocations())
+        return "\n".join(lines) + "\n"
+
+
+def add_routes(app: web.Application, inspector: MemoryInspector):
+    """
+    Adds `GET /memory` endpoint returning a memory report to `app`.
+    """
+
+    async def memory(request: web.Request) -> web.Response:
+        return web.Response(text=await inspector.report())
+
+    app.router.add_get("/memory", memory)
@@ -0,0 +1,119 @@
+"""
+               GLWT(Good Luck With That) Public License
+                 Copyright (c) Everyone, except Author
+
+Everyone is permitted to copy, distribute, modify, merge, sell, publish,
+sublicense or whatever they want with this software but at their OWN RISK.
+
+                            Preamble
+
+The author has absolutely no clue what the code in this project does.
+It might just work or not, there is no third option.
+
+
+                GOOD LUCK WITH THAT PUBLIC LICENSE
+   TERMS AND CONDITIONS FOR COPYING, DISTRIBUTION, AND MODIFICATION
+
+  0. You just DO WHATEVER YOU WANT TO as long as you NEVER LEAVE A
+TRACE TO TRACK THE AUTHOR of the original product to blame for or hold
+responsible.
+
+IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+
+Good luck and Godspeed.
+"""
+
+"""
+Module `src/menu.py` provides the game selection menu.
+---
+The menu (list of games and a keyboard with their names) is the same for every user,
+it only depends on `GAMES_TO_PLAY`. It is built once at startup and reused by every message,
+only a short header (greeting or error) is prepended per message.
+
+Menu messages are the most frequent messages the bot sends, so this saves building
+the text and a fresh `ReplyKeyboardMarkup` (a pydantic model tree) on every `/start` and every game over.
+
+The menu also carries an inline keyboard for the inline UI mode: pressing a button sends a callback query
+with `callback_data` equal to GAME_CALLBACK_PREFIX followed by the game's number in the menu (starting from 1).
+Numbers are used instead of names to keep `callback_data` short.
+
+Typical usage example:
+```
+MENU = build_menu(GAMES_TO_PLAY)
+await message.answer(MENU.render("Hi!"), reply_markup=MENU.markup)
+```
+"""
+
+import typing as tp
+from dataclasses import dataclass
+
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup, KeyboardButton, ReplyKeyboardMarkup
+
+from registry import GameSpec
+
+# Prefix of `callback_data` of inline game buttons, e.g. "g:1" for the first game.
+GAME_CALLBACK_PREFIX = "g:"
+
+
+# Pre-built game selection menu.
+@dataclass(frozen=True)
+class Menu:
+    """
+    Pre-built game selection menu.
+
+    Attributes:
+        text: numbered list of games with their descriptions.
+        markup: keyboard with one button per game. Shared between messages, must not be modified.
+        inline_markup: inline keyboard with one button per game. Shared between messages, must not be modified.
+    """
+
+    text: str
+    markup: ReplyKeyboardMarkup
+    inline_markup: InlineKeyboardMarkup
+
+    def render(self, header: str) -> str:
+        """
+        Returns full menu message text: `header` on its own line followed by the list of games.
+        """
+        return f"{header}\n{self.text}"
+
+
+def build_menu(specs: tp.Iterable[GameSpec]) -> Menu:
+    """
+    Builds the game selection menu.
+
+    Args:
+        specs: declared games, in the order they are shown to users.
+
+    Returns:
+        Menu: menu text and keyboards.
+    Expected time complexity: O(n) where n is number of games.
+    """
+    text = ""
+    keyboard = []
+    inline_keyboard = []
+    for index, spec in enumerate(specs, 1): # enumerate(specs, 1) starts counting from 1 instead of 0.
+        # Append game info: number, name, and description.
+        # Example formatted: "1. TicTacToe\nTicTacToe description"
+        text += f"{index}. {spec.name}\n{spec.description}\n\n"
+
+        # Create a keyboard button with the game name.
+        keyboard.append(KeyboardButton(text=spec.name))
+
+        # Create an inline button, one per row. Callback data holds the game number.
+        inline_keyboard.append(
+            [InlineKeyboardButton(text=spec.name, callback_data=f"{GAME_CALLBACK_PREFIX}{index}")]
+        )
+
+    return Menu(
+        text=text,
+        markup=ReplyKeyboardMarkup(
+            keyboard=[keyboard],  # in `aiogram`, keyboard is a list of rows
+            one_time_keyboard=True,  # Keyboard disappears after user chooses game
+            resize_keyboard=True,  # Keyboard resizes to fit. (shorter height)
+        ),
+        inline_markup=InlineKeyboardMarkup(inline_keyboard=inline_keyboard),
+    )
@@ -0,0 +1,446 @@
+"""
+               GLWT(Good Luck With That) Public License
+                 Copyright (c) Everyone, except Author
+
+Everyone is permitted to copy, distribute, modify, merge, sell, publish,
+sublicense or whatever they want with this software but at their OWN RISK.
+
+                            Preamble
+
+The author has absolutely no clue what the code in this project does.
+It might just work or not, there is no third option.
+
+
+                GOOD LUCK WITH THAT PUBLIC LICENSE
+   TERMS AND CONDITIONS FOR COPYING, DISTRIBUTION, AND MODIFICATION
+
+  0. You just DO WHATEVER YOU WANT TO as long as you NEVER LEAVE A
+TRACE TO TRACK THE AUTHOR of the original product to blame for or hold
+responsible.
+
+IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+
+Good luck and Godspeed.
+"""
+
+"""
+Module `src/metrics.py` collects runtime metrics and exports them in Prometheus text format.
+---
+Metrics answer capacity planning questions: how long handlers take, how long each `Game` method takes
+for each game, how big engine caches are, how many sessions are active.
+Link: https://prometheus.io/docs/instrumenting/exposition_formats/#text-based-format
+
+No client library is needed, the module implements the three kinds of metrics the bot uses:
+    1. `Counter` - a value that only goes up (e.g. handler errors).
+    2. `Histogram` - distribution of observed values (e.g. latencies) over fixed buckets,
+        with their sum and count. Observing a value is a binary search and two additions.
+        Link: https://prometheus.io/docs/concepts/metric_types/#histogram
+    3. Stats collectors - `stats()` dictionaries of components (caches, storage, limiters),
+        read only when metrics are scraped, so they cost nothing in between.
+
+Counters and histograms may be updated from any thread: games searched by thread executors (see `src/engine.py`)
+are timed on worker threads. Each metric guards its values with a lock, uncontended on the event loop thread.
+
+Instrumentation:
+    - `HandlerMetrics` middleware times every message and callback handler.
+    - `InstrumentedGame` wraps a game and times every call of its methods (see `GameRegistry`).
+    - `EngineRunner` times engine calls, including the time spent in executors (see `src/engine.py`).
+
+Metrics are exported by `build_app` on an HTTP endpoint, `/metrics`, meant to be reachable locally only.
+In webhook mode with several workers every worker exports its own metrics, on its own port.
+
+Typical usage example:
+```
+LATENCY = REGISTRY.histogram("bot_call_seconds", "Duration of calls.", labels=("call",))
+with LATENCY.time("example"):
+    ...
+REGISTRY.stats("bot_keyboard_cache", KEYBOARDS.stats, counters=("hits", "misses"))
+web.run_app(build_app(REGISTRY), host="127.0.0.1", port=9100)
+```
+"""
+
+import bisect
+import contextlib
+import inspect
+import logging
+import threading
+import time
+import typing as tp
+
+from aiohttp import web
+from typing_extensions import override
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from games.game import Game
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of histogram buckets in seconds, from 10 microseconds (table lookups) to 10 seconds (engine searches).
+DEFAULT_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+# Content type of Prometheus text format.
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+
+def _escape(value: str) -> str:
+    """
+    Escapes a label value.
+    """
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    """
+    Returns label set in text format, e.g. '{game="Nim",method="add_move"}'.
+    """
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    """
+    Formats a sample value, integers without a fractional part.
+    """
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+# Monotonically increasing value, one per combination of label values.
+class Counter:
+    """
+    Monotonically increasing value, one per combination of label values. Thread safe.
+    """
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        """
+        Increases the value for given label values.
+        Time complexity: O(1)
+        """
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            snapshot = list(self._values.items())
+        for values, value in snapshot:
+            lines.append(f"{self.name}{_labels(self.labels, values)} {_number(value)}")
+        return lines
+
+
+# Distribution of observed values over fixed buckets.
+class Histogram:
+    """
+    Distribution of observed values over fixed buckets, one per combination of label values. Thread safe.
+    """
+
+    def __init__(
+        self, name: str, help: str, labels: tuple[str, ...] = (), buckets: tp.Sequence[float] = DEFAULT_BUCKETS
+    ):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets))
+        # Per label values: count of each bucket (not cumulative, the last one is +Inf), sum and count.
+        self._series: dict[tuple[str, ...], list[float]] = {}
+        self._lock = threading.Lock()  # Keeps buckets, sum and count of a series consistent.
+
+    def observe(self, value: float, *labels: str):
+        """
+        Records an observed value for given label values.
+        Time complexity: O(log(b)) where b is amount of buckets.
+        """
+        bucket = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0.0] * (len(self.buckets) + 3)
+            series[bucket] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    @contextlib.contextmanager
+    def time(self, *labels: str) -> tp.Iterator[None]:
+        """
+        Observes duration of the `with` block in seconds, also when it raises.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(values, list(series)) for values, series in self._series.items()]
+        for values, series in snapshot:
+            cumulative = 0.0
+            for bound, count in zip((*self.buckets, float("inf")), series):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labels, values, le)} {_number(cumulative)}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, values)} {_number(series[-2])}")
+            lines.append(f"{self.name}_count{_labels(self.labels, values)} {_number(series[-1])}")
+        return lines
+
+
+# Reads a `stats()` dictionary of a component when metrics are scraped.
+class _Stats:
+    def __init__(
+        self,
+        prefix: str,
+        source: tp.Callable[[], tp.Mapping[str, float] | tp.Awaitable[tp.Mapping[str, float]]],
+        counters: tp.Collection[str],
+        labels: tp.Mapping[str, str],
+    ):
+        self.prefix = prefix
+        self.source = source
+        self.counters = counters
+        self.labels = labels
+
+    async def samples(self) -> list[tuple[str, str, str]]:
+        """
+        Returns (metric name, metric type, sample line) for every value.
+        """
+        stats = self.source()
+        if inspect.isawaitable(stats):
+            stats = await stats
+        label_text = _labels(tuple(self.labels), tuple(self.labels.values()))
+        samples = []
+        for key, value in stats.items():
+            kind = "counter" if key in self.counters else "gauge"
+            name = f"{self.prefix}_{key}_total" if kind == "counter" else f"{self.prefix}_{key}"
+            samples.append((name, kind, f"{name}{label_text} {_number(value)}"))
+        return samples
+
+
+# Set of metrics exported together.
+class Registry:
+    """
+    Set of metrics exported together.
+    """
+
+    def __init__(self):
+        self._metrics: list[Counter | Histogram | _Stats] = []
+
+    def counter(self, name: str, help: str, labels: tuple[str, ...] = ()) -> Counter:
+        """
+        Creates and registers a counter.
+        """
+        metric = Counter(name, help, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self, name: str, help: str, labels: tuple[str, ...] = (), buckets: tp.Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        """
+        Creates and registers a histogram.
+        """
+        metric = Histogram(name, help, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def stats(
+        self,
+        prefix: str,
+        source: tp.Callable[[], tp.Mapping[str, float] | tp.Awaitable[tp.Mapping[str, float]]],
+        counters: tp.Collection[str] = (),
+        labels: tp.Optional[tp.Mapping[str, str]] = None,
+    ):
+        """
+        Registers a `stats()` function of a component. Every key becomes metric `<prefix>_<key>`:
+        a counter (with `_total` suffix) if the key is listed in `counters`, a gauge otherwise.
+
+        Args:
+            prefix: prefix of metric names, e.g. "bot_keyboard_cache".
+            source: function (or coroutine function) returning current values.
+            counters: keys of monotonically increasing values.
+            labels: constant labels of all values, e.g. {"game": "Nim"}.
+        """
+        self._metrics.append(_Stats(prefix, source, counters, labels or {}))
+
+    async def render(self) -> str:
+        """
+        Returns all metrics in Prometheus text format.
+        Time complexity: O(n) where n is amount of samples.
+        """
+        lines: list[str] = []
+        # Several collectors may share a prefix (e.g. engine stats of every game), the format
+        # requires all samples of a metric to follow its single TYPE line.
+        collected: dict[str, list[str]] = {}
+        for metric in self._metrics:
+            if not isinstance(metric, _Stats):
+                lines.extend(metric.render())
+                continue
+            try:
+                samples = await metric.samples()
+            except Exception:
+                # E.g. engine stats of a game whose workers are busy past the timeout, other metrics are still served.
+                logger.exception("Failed to collect %s metrics", metric.prefix)
+                continue
+            for name, kind, line in samples:
+                if name not in collected:
+                    collected[name] = [f"# TYPE {name} {kind}"]
+                collected[name].append(line)
+        for samples in collected.values():
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+# Registry of all metrics of the bot.
+REGISTRY = Registry()
+
+HANDLER_SECONDS = REGISTRY.histogram(
+    "bot_handler_seconds", "Duration of update handlers, excluding sending replies.", labels=("handler",)
+)
+HANDLER_ERRORS = REGISTRY.counter("bot_handler_errors_total", "Update handlers that raised an exception.", labels=("handler",))
+GAME_CALL_SECONDS = REGISTRY.histogram(
+    "bot_game_call_seconds", "Duration of Game method calls made by the bot process.", labels=("game", "method")
+)
+
+
+# Middleware timing message and callback query handlers.
+class HandlerMetrics(BaseMiddleware):
+    """
+    Inner middleware timing handlers, labelled by the name of the handler function.
+    """
+
+    @override
+    async def __call__(
+        self,
+        handler: tp.Callable[[TelegramObject, dict[str, tp.Any]], tp.Awaitable[tp.Any]],
+        event: TelegramObject,
+        data: dict[str, tp.Any],
+    ) -> tp.Any:
+        name = data["handler"].callback.__name__
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            HANDLER_ERRORS.inc(name)
+            raise
+        finally:
+            HANDLER_SECONDS.observe(time.perf_counter() - started, name)
+
+
+# Game proxy timing every method call.
+class InstrumentedGame(Game):
+    """
+    Wraps a game and records duration of every call of its methods in GAME_CALL_SECONDS.
+
+    Calls run by engine worker processes are not seen by this proxy: the proxy is pickled as the wrapped game,
+    so workers run the game itself. Such calls are timed by `EngineRunner` instead.
+    """
+
+    def __init__(self, game: Game, name: str):
+        self.game = game
+        self._name = name
+
+    def __reduce_ex__(self, protocol: tp.SupportsIndex) -> tp.Any:
+        return self.game.__reduce_ex__(protocol)
+
+    async def _timed(self, method: str, *args: tp.Any) -> tp.Any:
+        started = time.perf_counter()
+        try:
+            return await getattr(self.game, method)(*args)
+        finally:
+            GAME_CALL_SECONDS.observe(time.perf_counter() - started, self._name, method)
+
+    @override
+    async def name(self) -> str:
+        return self._name
+
+    @override
+    async def description(self) -> str:
+        return await self.game.description()
+
+    @override
+    async def initial_state(self) -> tp.Any:
+        return await self._timed("initial_state")
+
+    @override
+    async def get_legal_moves(self, state: tp.Any) -> list[tp.Any]:
+        return await self._timed("get_legal_moves", state)
+
+    @override
+    async def add_move(self, state: tp.Any, move: tp.Any) -> tp.Any:
+        return await self._timed("add_move", state, move)
+
+    @override
+    async def generate_best_move(self, state: tp.Any) -> tp.Any:
+        return await self._timed("generate_best_move", state)
+
+    @override
+    async def is_terminal(self, state: tp.Any) -> bool:
+        return await self._timed("is_terminal", state)
+
+    @override
+    async def get_winner(self, state: tp.Any) -> tp.Optional[int]:
+        return await self._timed("get_winner", state)
+
+    @override
+    async def format_state(self, state: tp.Any) -> str:
+        return await self._timed("format_state", state)
+
+    @override
+    async def parse_move(self, move_str: str) -> tp.Optional[tp.Any]:
+        return await self._timed("parse_move", move_str)
+
+    @override
+    async def encode_state(self, state: tp.Any) -> bytes:
+        return await self._timed("encode_state", state)
+
+    @override
+    async def decode_state(self, data: bytes) -> tp.Any:
+        return await self._timed("decode_state", data)
+
+    @override
+    async def warm_up(self) -> None:
+        return await self._timed("warm_up")
+
+    @override
+    async def keyboard_key(self, state: tp.Any) -> tp.Optional[tp.Hashable]:
+        return await self._timed("keyboard_key", state)
+
+    @override
+    async def engine_stats(self) -> dict[str, float]:
+        return await self.game.engine_stats()
+
+
+async def instrument_game(game: Game) -> Game:
+    """
+    Returns `game` wrapped into `InstrumentedGame`. Suitable as `wrap` argument of `GameRegistry`.
+    """
+    return InstrumentedGame(game, await game.name())
+
+
+def build_app(registry: Registry = REGISTRY) -> web.Application:
+    """
+    Returns aiohttp application serving `registry` at `/metrics`.
+    """
+
+    async def metrics(request: web.Request) -> web.Response:
+        return web.Response(text=await registry.render(), headers={"Content-Type": CONTENT_TYPE})
+
+    app = web.Application()
+    app.router.add_get("/metrics", metrics)
+    return app
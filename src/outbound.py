@@ -0,0 +1,389 @@
+"""
+               GLWT(Good Luck With That) Public License
+                 Copyright (c) Everyone, except Author
+
+Everyone is permitted to copy, distribute, modify, merge, sell, publish,
+sublicense or whatever they want with this software but at their OWN RISK.
+
+                            Preamble
+
+The author has absolutely no clue what the code in this project does.
+It might just work or not, there is no third option.
+
+
+                GOOD LUCK WITH THAT PUBLIC LICENSE
+   TERMS AND CONDITIONS FOR COPYING, DISTRIBUTION, AND MODIFICATION
+
+  0. You just DO WHATEVER YOU WANT TO as long as you NEVER LEAVE A
+TRACE TO TRACK THE AUTHOR of the original product to blame for or hold
+responsible.
+
+IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+
+Good luck and Godspeed.
+"""
+
+"""
+Module `src/outbound.py` paces outgoing Bot API requests to stay within Telegram rate limits.
+---
+Telegram limits how fast a bot may send messages:
+    1. about 30 messages per second in total,
+    2. about 1 message per second in a single chat,
+    3. 20 messages per minute in a group chat.
+Link: https://core.telegram.org/bots/faq#my-bot-is-hitting-limits-how-do-i-avoid-this
+
+A bot exceeding them gets "429 Too Many Requests" with a `retry_after` delay, and bursts of them stall replies
+of every user. `OutboundLimiter` is a request middleware of the bot's session: every request addressed to a chat
+(i.e. having `chat_id`: messages, edits) waits for its turn, so requests leave at the allowed rate instead.
+Link: https://docs.aiogram.dev/en/v3.22.0/api/session/middleware.html
+
+Design:
+    - Every limit is a token bucket, implemented as GCRA (generic cell rate algorithm): instead of a token count
+        a bucket keeps the "theoretical arrival time" of the next request, which takes a single float per chat.
+        Link: https://en.wikipedia.org/wiki/Generic_cell_rate_algorithm
+    - Requests of a chat are sent one at a time, in the order they were made: the next request of a chat is
+        granted only once the previous one has completed (retries included), so messages never arrive out of order.
+    - Among chats that may send, the one whose first waiting request has the highest priority goes first,
+        then the one waiting for the longest time. In-game replies have `HIGH` priority, menus may be sent
+        with `LOW` priority (see `low_priority`), so players in the middle of a game are answered first under load.
+    - On a 429 response the chat is paused for `retry_after` seconds and the request is retried
+        (up to `max_retries` times), before any other request of the chat.
+
+Requests without `chat_id` (e.g. answers to callback queries) are not limited.
+
+Buckets live in process memory. Processes sending as the same bot (e.g. webhook workers, see `src/webhook.py`)
+must split the global limit: each one gets `global_rate.share(processes)`. Per chat limits need no split
+as long as every chat is served by a single process.
+
+Typical usage example:
+```
+limiter = OutboundLimiter()
+bot.session.middleware(limiter)
+...
+with low_priority():
+    await message.answer("Menu")
+...
+limiter.close()
+```
+"""
+
+import asyncio
+import contextlib
+import heapq
+import itertools
+import logging
+import time
+import typing as tp
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from typing_extensions import override
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+
+logger = logging.getLogger(__name__)
+
+# Priorities of requests, lower value goes first.
+HIGH = 0
+LOW = 1
+
+# Priority of requests made in the current context (handler task), see `low_priority`.
+PRIORITY: ContextVar[int] = ContextVar("outbound_priority", default=HIGH)
+
+
+@contextlib.contextmanager
+def low_priority() -> tp.Iterator[None]:
+    """
+    Requests made inside the `with` block are sent after HIGH priority requests of other chats.
+    """
+    token = PRIORITY.set(LOW)
+    try:
+        yield
+    finally:
+        PRIORITY.reset(token)
+
+
+# Rate limit with a burst, a token bucket in GCRA form.
+@dataclass(frozen=True)
+class Rate:
+    """
+    Attributes:
+        per_second: sustained rate, requests per second.
+        burst: amount of requests that may be sent at once after a pause.
+    """
+
+    per_second: float
+    burst: int = 1
+
+    def __post_init__(self):
+        if self.per_second <= 0 or self.burst < 1:
+            raise ValueError("Rate must be positive and burst must be at least 1")
+
+    @property
+    def interval(self) -> float:
+        """Seconds one request takes out of the bucket."""
+        return 1 / self.per_second
+
+    @property
+    def tolerance(self) -> float:
+        """How far ahead of real time the bucket may run."""
+        return (self.burst - 1) * self.interval
+
+    def share(self, parts: int) -> "Rate":
+        """
+        Returns the rate of one of `parts` equal senders, which together stay within this rate.
+        """
+        return Rate(self.per_second / parts, max(1, self.burst // parts))
+
+
+# Request waiting for its turn. It stays first in its chat's queue from its grant until it completes.
+@dataclass(eq=False)
+class _Request:
+    priority: int
+    seq: int
+    future: asyncio.Future = field(repr=False)  # Resolved when the request is granted.
+    granted: bool = False  # Holds its chat's slot: sent, or waiting to be retried.
+
+
+# Request middleware pacing requests to Telegram rate limits.
+class OutboundLimiter(BaseRequestMiddleware):
+    """
+    Request middleware pacing requests to Telegram rate limits, see module documentation.
+
+    Attributes:
+        sent: amount of requests let through.
+        retried: amount of requests retried after a 429 response.
+    """
+
+    def __init__(
+        self,
+        global_rate: Rate = Rate(30),
+        chat_rate: Rate = Rate(1, burst=3),
+        group_rate: Rate = Rate(20 / 60, burst=3),
+        max_retries: int = 3,
+    ):
+        self.global_rate = global_rate
+        self.chat_rate = chat_rate
+        self.group_rate = group_rate
+        self.max_retries = max_retries
+        self.sent = 0
+        self.retried = 0
+        self._granted = 0  # Amount of requests holding their chat's slot.
+
+        self._seq = itertools.count()
+        # Requests of every chat, in order. The first one may be granted (sent and not completed yet).
+        self._queues: dict[tp.Hashable, deque[_Request]] = {}
+        # Chats whose first request may be sent now: (priority, seq, chat, request).
+        self._ready: list[tuple[int, int, tp.Hashable, _Request]] = []
+        # Chats waiting for their bucket: (time, seq, chat, request).
+        self._delayed: list[tuple[float, int, tp.Hashable, _Request]] = []
+        # Theoretical arrival times of buckets. Chats missing here have full buckets.
+        self._tat: dict[tp.Hashable, float] = {}
+        self._global_tat = 0.0
+        # Size of `_tat` triggering removal of full buckets.
+        self._prune_at = 1024
+        self._wakeup = asyncio.Event()
+        self._scheduler: tp.Optional[asyncio.Task] = None
+
+    def stats(self) -> dict[str, int]:
+        """
+        Returns counters: sent, retried, amount of waiting requests and of requests in flight (sent or being retried).
+        """
+        return {
+            "sent": self.sent,
+            "retried": self.retried,
+            "waiting": sum(map(len, self._queues.values())) - self._granted,
+            "in_flight": self._granted,
+        }
+
+    @override
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is None:
+            return await make_request(bot, method)
+
+        request = await self._acquire(chat_id, PRIORITY.get())
+        try:
+            attempt = 0
+            while True:
+                try:
+                    return await make_request(bot, method)
+                except TelegramRetryAfter as error:
+                    if attempt >= self.max_retries:
+                        raise
+                    attempt += 1
+                    self.retried += 1
+                    logger.warning("Flood control in chat %s, retrying in %s s", chat_id, error.retry_after)
+                    self._pause(chat_id, error.retry_after)
+                    await self._wait_turn(chat_id, request)
+        finally:
+            self._release(chat_id, request)
+
+    def _rate(self, chat_id: tp.Hashable) -> Rate:
+        """
+        Returns the limit of a chat: group and channel chats have negative ids.
+        """
+        return self.group_rate if isinstance(chat_id, int) and chat_id < 0 else self.chat_rate
+
+    def _delay(self, chat_id: tp.Hashable, now: float) -> float:
+        """
+        Returns seconds until the chat's bucket allows a request.
+        """
+        return self._tat.get(chat_id, now) - self._rate(chat_id).tolerance - now
+
+    def _pause(self, chat_id: tp.Hashable, seconds: float):
+        """
+        Stops sending to a chat for `seconds` (after a 429 response).
+        """
+        self._tat[chat_id] = time.monotonic() + seconds + self._rate(chat_id).tolerance
+
+    async def _acquire(self, chat_id: tp.Hashable, priority: int) -> _Request:
+        """
+        Waits until a request to `chat_id` may be sent. The granted request holds the chat's slot
+        until it is passed to `_release`.
+
+        Args:
+            chat_id: chat the request is addressed to.
+            priority: HIGH or LOW.
+
+        Returns:
+            _Request: the granted request.
+        Time complexity: O(log(n)) where n is amount of chats with waiting requests.
+        """
+        if self._scheduler is None:
+            self._scheduler = asyncio.get_running_loop().create_task(self._schedule_loop())
+
+        request = _Request(priority, next(self._seq), asyncio.get_running_loop().create_future())
+        queue = self._queues.setdefault(chat_id, deque())
+        queue.append(request)
+        if queue[0] is request:
+            self._schedule(chat_id, time.monotonic())
+        try:
+            await request.future
+        except asyncio.CancelledError:
+            if request.granted:  # Cancelled right after the grant: the slot must not stay held.
+                self._release(chat_id, request)
+            raise  # Otherwise the scheduler drops the request when its turn comes.
+        return request
+
+    async def _wait_turn(self, chat_id: tp.Hashable, request: _Request):
+        """
+        Waits until a granted request may be sent again (after a 429 response). It keeps its chat's slot meanwhile.
+        """
+        request.future = asyncio.get_running_loop().create_future()
+        self._schedule(chat_id, time.monotonic())
+        await request.future
+
+    def _release(self, chat_id: tp.Hashable, request: _Request):
+        """
+        Frees the slot of a chat after its granted request has completed, letting the next request of the chat go.
+        Time complexity: O(log(n)) where n is amount of chats with waiting requests.
+        """
+        queue = self._queues[chat_id]
+        assert queue[0] is request, "outbound: invariant failed: released request does not hold the slot"
+        queue.popleft()
+        self._granted -= 1
+        if queue:
+            self._schedule(chat_id, time.monotonic())
+        else:
+            del self._queues[chat_id]
+
+    def _schedule(self, chat_id: tp.Hashable, now: float):
+        """
+        Puts the first request of a chat into the ready or the delayed heap.
+        Entries of requests that are no longer first in their chat are skipped when popped.
+        """
+        request = self._queues[chat_id][0]
+        delay = self._delay(chat_id, now)
+        if delay <= 0:
+            heapq.heappush(self._ready, (request.priority, request.seq, chat_id, request))
+        else:
+            heapq.heappush(self._delayed, (now + delay, request.seq, chat_id, request))
+        self._wakeup.set()
+
+    def _is_first(self, chat_id: tp.Hashable, request: _Request) -> bool:
+        queue = self._queues.get(chat_id)
+        return queue is not None and queue[0] is request
+
+    async def _schedule_loop(self):
+        """
+        Grants waiting requests, one at a time, at the allowed rate. Runs until `close`.
+        """
+        while True:
+            now = time.monotonic()
+            # Chats whose buckets have refilled become ready.
+            while self._delayed and self._delayed[0][0] <= now:
+                _, _, chat_id, request = heapq.heappop(self._delayed)
+                if self._is_first(chat_id, request):
+                    self._schedule(chat_id, now)
+
+            if not self._ready:
+                timeout = self._delayed[0][0] - now if self._delayed else None
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except TimeoutError:
+                    pass
+                continue
+
+            # Global bucket. After the sleep, a request of higher priority may be ready, so start over.
+            delay = self._global_tat - self.global_rate.tolerance - now
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+
+            _, _, chat_id, request = heapq.heappop(self._ready)
+            if not self._is_first(chat_id, request):
+                continue  # Outdated entry.
+            if self._delay(chat_id, now) > 0:
+                self._schedule(chat_id, now)  # Chat was paused after the entry was made.
+                continue
+
+            if not request.future.done():  # Not cancelled.
+                self._global_tat = max(self._global_tat, now) + self.global_rate.interval
+                self._tat[chat_id] = max(self._tat.get(chat_id, now), now) + self._rate(chat_id).interval
+                if not request.granted:  # Retries already hold the slot.
+                    request.granted = True
+                    self._granted += 1
+                request.future.set_result(None)
+                self.sent += 1
+            elif not request.granted:  # Cancelled while waiting for the grant: the next request of the chat goes.
+                # A retry cancelled while waiting is released by its caller instead.
+                queue = self._queues[chat_id]
+                queue.popleft()
+                if queue:
+                    self._schedule(chat_id, now)
+                else:
+                    del self._queues[chat_id]
+            self._prune(now)
+
+    def _prune(self, now: float):
+        """
+        Forgets buckets that are full again, so that memory is proportional to recently active chats.
+        Time complexity: amortized O(1).
+        """
+        if len(self._tat) < self._prune_at:
+            return
+        self._tat = {chat_id: tat for chat_id, tat in self._tat.items() if tat > now}
+        self._prune_at = max(1024, 2 * len(self._tat))
+
+    def close(self):
+        """
+        Stops the scheduler. Requests waiting at this moment are never sent.
+        """
+        if self._scheduler is not None:
+            self._scheduler.cancel()
+            self._scheduler = None
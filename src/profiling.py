@@ -0,0 +1,201 @@
+"""
+               GLWT(Good Luck With That) Public License
+                 Copyright (c) Everyone, except Author
+
+Everyone is permitted to copy, distribute, modify, merge, sell, publish,
+sublicense or whatever they want with this software but at their OWN RISK.
+
+                            Preamble
+
+The author has absolutely no clue what the code in this project does.
+It might just work or not, there is no third option.
+
+
+                GOOD LUCK WITH THAT PUBLIC LICENSE
+   TERMS AND CONDITIONS FOR COPYING, DISTRIBUTION, AND MODIFICATION
+
+  0. You just DO WHATEVER YOU WANT TO as long as you NEVER LEAVE A
+TRACE TO TRACK THE AUTHOR of the original product to blame for or hold
+responsible.
+
+IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+
+Good luck and Godspeed.
+"""
+
+"""
+Module `src/profiling.py` captures CPU profiles of a running bot on demand.
+---
+When a game or a handler gets slow in production, a profile of the live process shows where the time goes,
+without a restart or a redeploy with ad hoc timers.
+Link: https://docs.python.org/3/library/profile.html
+
+`Profiler` runs `cProfile` on the event loop thread for a limited capture:
+    1. For `seconds` seconds, or until `updates` message and callback handlers have finished, whatever comes first.
+        Only handlers started after the capture are counted, so `/profile 10 1` waits for the next update.
+    2. Everything running on the loop is profiled: handlers (`play_game`, `choose_game`, ...),
+        inline engine calls and all `Game` methods called by the bot, aiogram and aiohttp internals.
+        Engine calls running in thread or process executors are not seen (see `src/engine.py`),
+        their duration is exported by `bot_engine_call_seconds` metric instead.
+    3. When the capture ends, the profile is dumped to a `.pstats` file (open it with `python -m pstats`
+        or snakeviz) and a summary of the top functions by cumulative time is returned.
+        Link: https://docs.python.org/3/library/profile.html#pstats.Stats
+
+Profiling slows the profiled code down several times, so captures are short and only one runs at a time.
+Captures are started by admins with the `/profile` bot command, or locally with `POST /profile` on the metrics port
+(`add_routes`), e.g. `curl -X POST "http://127.0.0.1:9100/profile?seconds=10"`.
+
+Typical usage example:
+```
+profiler = Profiler(directory="/tmp")
+dp.message.middleware(profiler)
+...
+path, summary = await profiler.start(seconds=10, updates=100)
+```
+"""
+
+import asyncio
+import cProfile
+import io
+import logging
+import os
+import pstats
+import time
+import typing as tp
+
+from aiohttp import web
+from typing_extensions import override
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+logger = logging.getLogger(__name__)
+
+# Longest capture in seconds.
+MAX_SECONDS = 600.0
+
+
+# On demand CPU profiler of the event loop thread.
+class Profiler(BaseMiddleware):
+    """
+    On demand CPU profiler of the event loop thread, see module documentation.
+    Registered as an inner middleware of message and callback query handlers to count finished updates.
+
+    Attributes:
+        directory: directory of profile dumps.
+        top: amount of functions in summaries.
+    """
+
+    def __init__(self, directory: str, top: int = 25):
+        self.directory = directory
+        self.top = top
+        self._profile: tp.Optional[cProfile.Profile] = None  # Profile of the running capture.
+        self._updates_left = 0
+        self._done: tp.Optional[asyncio.Future] = None
+        self._timer: tp.Optional[asyncio.TimerHandle] = None
+        self._captures = 0  # Amount of captures started, keeps dump names unique.
+
+    @property
+    def running(self) -> bool:
+        """
+        Whether a capture is running.
+        """
+        return self._profile is not None
+
+    def start(self, seconds: float, updates: tp.Optional[int] = None) -> asyncio.Future[tuple[str, str]]:
+        """
+        Starts profiling the event loop thread for `seconds` seconds or `updates` handled updates, whatever comes first.
+
+        Raises:
+            RuntimeError: if a capture is already running, or another profiler is active.
+            ValueError: if `seconds` or `updates` is out of range.
+
+        Returns:
+            asyncio.Future[tuple[str, str]]: resolved with path of the profile dump (empty if it could not be saved)
+                and summary of top functions when the capture ends.
+        """
+        if self.running:
+            raise RuntimeError("A profile is already being captured")
+        if not 0 < seconds <= MAX_SECONDS or (updates is not None and updates < 1):
+            raise ValueError(f"seconds must be in (0, {MAX_SECONDS:g}] and updates must be positive")
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as error:  # Another profiler (e.g. a debugger) is active.
+            raise RuntimeError(str(error)) from error
+        loop = asyncio.get_running_loop()
+        self._profile = profile
+        self._updates_left = updates or 0
+        self._done = loop.create_future()
+        self._timer = loop.call_later(seconds, self._finish)
+        self._captures += 1
+        logger.info("Profiling for %g s or %s updates", seconds, updates or "any amount of")
+        return self._done
+
+    @override
+    async def __call__(
+        self,
+        handler: tp.Callable[[TelegramObject, dict[str, tp.Any]], tp.Awaitable[tp.Any]],
+        event: TelegramObject,
+        data: dict[str, tp.Any],
+    ) -> tp.Any:
+        # Only updates handled entirely within a capture count, not the `/profile` command starting it
+        # or handlers that were already running.
+        capture = self._captures if self.running else None
+        try:
+            return await handler(event, data)
+        finally:
+            if capture == self._captures and self.running and self._updates_left:
+                self._updates_left -= 1
+                if not self._updates_left:
+                    self._finish()
+
+    def _finish(self):
+        """
+        Ends the capture: dumps the profile and resolves the future returned by `start`.
+        """
+        profile, done = self._profile, self._done
+        if profile is None or done is None:
+            return
+        profile.disable()
+        self._profile = self._done = None
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        path = os.path.join(self.directory, f"profile-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self._captures}.pstats")
+        try:
+            profile.dump_stats(path)
+        except OSError as error:
+            logger.warning("Failed to save profile to %s: %s", path, error)
+            path = ""
+        summary = io.StringIO()
+        pstats.Stats(profile, stream=summary).strip_dirs().sort_stats("cumulative").print_stats(self.top)
+        logger.info("Profile saved to %s", path or "nowhere")
+        if not done.done():
+            done.set_result((path, summary.getvalue()))
+
+
+def add_routes(app: web.Application, profiler: Profiler):
+    """
+    Adds `POST /profile?seconds=S&updates=N` endpoint to `app`.
+    The request waits for the capture to finish and returns its summary, the dump path is in `X-Profile-Path` header.
+    """
+
+    async def profile(request: web.Request) -> web.Response:
+        try:
+            seconds = float(request.query.get("seconds", "10"))
+            updates = int(request.query["updates"]) if "updates" in request.query else None
+            done = profiler.start(seconds, updates)
+        except ValueError as error:
+            return web.Response(status=400, text=f"{error}\n")
+        except RuntimeError as error:
+            return web.Response(status=409, text=f"{error}\n")
+        path, summary = await done
+        return web.Response(text=summary, headers={"X-Profile-Path": path})
+
+    app.router.add_post("/profile", profile)
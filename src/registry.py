@@ -0,0 +1,211 @@
+"""
+               GLWT(Good Luck With That) Public License
+                 Copyright (c) Everyone, except Author
+
+Everyone is permitted to copy, distribute, modify, merge, sell, publish,
+sublicense or whatever they want with this software but at their OWN RISK.
+
+                            Preamble
+
+The author has absolutely no clue what the code in this project does.
+It might just work or not, there is no third option.
+
+
+                GOOD LUCK WITH THAT PUBLIC LICENSE
+   TERMS AND CONDITIONS FOR COPYING, DISTRIBUTION, AND MODIFICATION
+
+  0. You just DO WHATEVER YOU WANT TO as long as you NEVER LEAVE A
+TRACE TO TRACK THE AUTHOR of the original product to blame for or hold
+responsible.
+
+IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+
+Good luck and Godspeed.
+"""
+
+"""
+Module `src/registry.py` provides the catalogue of games offered by the bot.
+---
+Games are declared as `GameSpec` entries: display name and an import path ("module:Class") of the `Game`
+implementation. A game class is instantiated only when the game is first requested, so startup cost does not grow
+with the size of the catalogue. Descriptions are not declared twice: `GameSpec.description` is read from
+the `DESCRIPTION` attribute of the game class, which imports its module but creates no game.
+
+`GameRegistry` maps normalized game names to specs in a dict built once,
+so finding a game by user input is a single dictionary lookup.
+
+Typical usage example:
+```
+registry = GameRegistry([
+    GameSpec("tictactoe", "games.tictactoe:TicTacToe"),
+])
+game = await registry.get("TicTacToe")  # Imports games.tictactoe and creates the game on first call.
+```
+
+Tools working with every game (benchmarks, tournaments) find them with `discover`, which imports all modules
+of the `games` package and declares every concrete `Game` class with default constructor arguments,
+and pick games from the command line with `select`.
+"""
+
+import functools
+import importlib
+import inspect
+import pkgutil
+import typing as tp
+from dataclasses import dataclass, field
+
+from games.game import Game
+
+
+def normalize(name: str) -> str:
+    """
+    Returns the lookup key of a game name: surrounding whitespace removed, case folded.
+    """
+    return name.strip().casefold()
+
+
+# Declaration of a single game.
+@dataclass(frozen=True)
+class GameSpec:
+    """
+    Declaration of a single game.
+
+    Attributes:
+        name: name shown to users. Must be equal to `Game.name()` of the created instance.
+        target: import path of the `Game` class in "module:Class" format, e.g. "games.nim:Nim".
+        options: keyword arguments passed to the class when the game is created.
+    """
+
+    name: str
+    target: str
+    options: tp.Mapping[str, tp.Any] = field(default_factory=dict)
+
+    def game_class(self) -> type[Game]:
+        """
+        Imports the game module and returns the game class.
+        """
+        module_name, _, class_name = self.target.partition(":")
+        return getattr(importlib.import_module(module_name), class_name)
+
+    @functools.cached_property
+    def description(self) -> str:
+        """
+        Description shown to users: `DESCRIPTION` of the game class, formatted with the arguments the game is created
+        with (`options` over defaults of the constructor), e.g. "{rows}x{cols}". Imports the game module on first
+        access, but creates no game.
+        """
+        game_class = self.game_class()
+        arguments = {
+            name: parameter.default
+            for name, parameter in inspect.signature(game_class).parameters.items()
+            if parameter.default is not inspect.Parameter.empty
+        }
+        return game_class.DESCRIPTION.format(**{**arguments, **self.options})
+
+    def create(self) -> Game:
+        """
+        Imports the game module and creates a game instance.
+        """
+        return self.game_class()(**self.options)
+
+
+# Catalogue of games with constant time lookup by name and lazy game creation.
+class GameRegistry:
+    """
+    Catalogue of games with constant time lookup by name and lazy game creation.
+    Each game is created at most once, the instance is shared by all users.
+    """
+
+    def __init__(
+        self,
+        specs: tp.Iterable[GameSpec],
+        wrap: tp.Optional[tp.Callable[[Game], tp.Awaitable[Game]]] = None,
+    ):
+        """
+        Args:
+            specs: declared games, in the order they are shown to users.
+            wrap: applied to every created game, the registry returns its result instead of the game
+                (e.g. `metrics.instrument_game`).
+
+        Raises:
+            ValueError: if two games have the same normalized name.
+        """
+        self.specs: tuple[GameSpec, ...] = tuple(specs)
+        self._by_name: dict[str, GameSpec] = {}
+        for spec in self.specs:
+            key = normalize(spec.name)
+            if key in self._by_name:
+                raise ValueError(f"Duplicate game name {spec.name!r}")
+            self._by_name[key] = spec
+        self._games: dict[str, Game] = {}  # Created games, keyed by normalized name.
+        self._wrap = wrap
+
+    def find(self, name: str) -> tp.Optional[GameSpec]:
+        """
+        Returns spec of the game with given name (case insensitive) or None.
+        Time complexity: O(1)
+        """
+        return self._by_name.get(normalize(name))
+
+    async def get(self, name: str) -> tp.Optional[Game]:
+        """
+        Returns the game with given name (case insensitive) or None, creating it on first request.
+
+        Raises:
+            ValueError: if the created game reports a name or a description different from its spec.
+        Time complexity: O(1), except for the first request of each game.
+        """
+        spec = self.find(name)
+        if spec is None:
+            return None
+
+        key = normalize(spec.name)
+        if (game := self._games.get(key)) is None:
+            game = spec.create()
+            if await game.name() != spec.name:
+                raise ValueError(f"Game {spec.target} reports name {await game.name()!r}, declared as {spec.name!r}")
+            if await game.description() != spec.description:
+                raise ValueError(
+                    f"Game {spec.target} reports description {await game.description()!r}, "
+                    f"while its class describes it as {spec.description!r}"
+                )
+            if self._wrap is not None:
+                game = await self._wrap(game)
+            self._games[key] = game
+        return game
+
+    async def all(self) -> list[Game]:
+        """
+        Returns all games in declaration order, creating the ones not created yet.
+        """
+        return [tp.cast(Game, await self.get(spec.name)) for spec in self.specs]
+
+
+def select(specs: tp.Iterable[GameSpec], names: tp.Iterable[str]) -> list[GameSpec]:
+    """
+    Returns specs matching any of `names` (case insensitive): by game name, class name or "module:Class" target.
+    Time complexity: O(s + n) where s is amount of specs and n is amount of names.
+    """
+    wanted = {normalize(name) for name in names}
+    return [
+        spec for spec in specs
+        if {normalize(spec.name), normalize(spec.target), normalize(spec.target.partition(":")[2])} & wanted
+    ]
+
+
+async def discover(package: str = "games") -> list[GameSpec]:
+    """
+    Returns specs of all concrete `Game` classes defined in modules of `package`, ordered by module and class name.
+    Each class is created once with default arguments to read its name.
+    """
+    specs = []
+    for module_info in sorted(pkgutil.iter_modules(importlib.import_module(package).__path__), key=lambda m: m.name):
+        module = importlib.import_module(f"{package}.{module_info.name}")
+        for class_name, game_class in sorted(inspect.getmembers(module, inspect.isclass)):
+            if issubclass(game_class, Game) and not inspect.isabstract(game_class) and game_class.__module__ == module.__name__:
+                game = game_class()
+                specs.append(GameSpec(await game.name(), f"{module.__name__}:{class_name}"))
+    return specs
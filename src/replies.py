@@ -0,0 +1,232 @@
+"""
+               GLWT(Good Luck With That) Public License
+                 Copyright (c) Everyone, except Author
+
+Everyone is permitted to copy, distribute, modify, merge, sell, publish,
+sublicense or whatever they want with this software but at their OWN RISK.
+
+                            Preamble
+
+The author has absolutely no clue what the code in this project does.
+It might just work or not, there is no third option.
+
+
+                GOOD LUCK WITH THAT PUBLIC LICENSE
+   TERMS AND CONDITIONS FOR COPYING, DISTRIBUTION, AND MODIFICATION
+
+  0. You just DO WHATEVER YOU WANT TO as long as you NEVER LEAVE A
+TRACE TO TRACK THE AUTHOR of the original product to blame for or hold
+responsible.
+
+IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+
+Good luck and Godspeed.
+"""
+
+"""
+Module `src/replies.py` collects replies of a handler and sends them as few messages as possible.
+---
+A single user action often produces several replies: when a move ends the game, the bot shows
+the final board, then the result, then the game menu. Sent one by one, that is three Bot API requests,
+three round trips before the user sees the menu, and three messages counted against rate limits (see `src/outbound.py`).
+
+`Reply` gathers everything a handler wants to say and sends it in one message when the handler returns:
+    1. Texts are joined with an empty line between them.
+    2. The keyboard of the last reply that has one is attached ("last keyboard wins"),
+        earlier keyboards would be replaced by it anyway.
+    3. If joined text exceeds Telegram's limit of MESSAGE_LIMIT characters, it is split into several messages
+        at reply boundaries, the keyboard goes with the last one. Texts are HTML (see `ParseMode.HTML`), so a single
+        reply longer than the limit is split at line ends, never inside a tag or an entity, and tags open at a split
+        are closed in one message and reopened in the next one: every message is valid HTML on its own.
+        Link: https://core.telegram.org/bots/api#sendmessage
+        Link: https://core.telegram.org/bots/api#html-style
+    4. The message has the highest priority among its parts (see `outbound.low_priority`).
+
+`ReplyMiddleware` gives every message handler a `reply` argument and flushes it after the handler.
+Link: https://docs.aiogram.dev/en/v3.22.0/dispatcher/middlewares.html
+
+Typical usage example:
+```
+dp.message.middleware(ReplyMiddleware())
+
+@dp.message()
+async def handler(message: Message, reply: Reply):
+    reply.add("Bot played: 4")
+    reply.add("You lost.")
+    reply.add("Choose a game:", reply_markup=menu)
+    # One message is sent after the handler returns.
+```
+"""
+
+import re
+import typing as tp
+
+from typing_extensions import override
+
+from aiogram import BaseMiddleware
+from aiogram.types import InlineKeyboardMarkup, Message, ReplyKeyboardMarkup, TelegramObject
+
+from outbound import LOW, PRIORITY
+
+# Maximum length of a message text.
+MESSAGE_LIMIT = 4096
+
+# Separator of joined replies.
+SEPARATOR = "\n\n"
+
+Markup = ReplyKeyboardMarkup | InlineKeyboardMarkup
+
+# Opening or closing HTML tag: group 1 is "/" for closing tags, group 2 is the tag name.
+_TAG = re.compile(r"<(/?)([a-zA-Z][\w-]*)[^>]*>")
+
+
+# Replies of a handler to a single message, sent together.
+class Reply:
+    """
+    Replies of a handler to a single message, sent together by `flush`.
+    """
+
+    def __init__(self, message: Message):
+        self.message = message
+        self._texts: list[str] = []
+        self._markup: tp.Optional[Markup] = None
+        self._priority = LOW
+
+    def add(self, text: str, reply_markup: tp.Optional[Markup] = None):
+        """
+        Adds a reply. Keyboard replaces keyboards of earlier replies.
+        Time complexity: O(1)
+        """
+        self._priority = min(self._priority, PRIORITY.get())
+        self._texts.append(text)
+        if reply_markup is not None:
+            self._markup = reply_markup
+
+    async def flush(self) -> tp.Optional[Message]:
+        """
+        Sends collected replies and forgets them.
+
+        Returns:
+            tp.Optional[Message]: last sent message, or None if there was nothing to send.
+        Time complexity: O(n) where n is total length of texts.
+        """
+        if not self._texts:
+            return None
+        chunks = _join(self._texts)
+        markup, priority = self._markup, self._priority
+        self._texts, self._markup = [], None
+
+        token = PRIORITY.set(priority)
+        try:
+            for chunk in chunks[:-1]:
+                await self.message.answer(chunk)
+            return await self.message.answer(chunks[-1], reply_markup=markup)
+        finally:
+            PRIORITY.reset(token)
+
+
+def _join(texts: list[str]) -> list[str]:
+    """
+    Joins texts with SEPARATOR into as few chunks of at most MESSAGE_LIMIT characters as possible.
+    Texts are never cut, except a single text longer than the limit, which is split by `_split`.
+    """
+    chunks: list[str] = []
+    current = ""
+    for text in texts:
+        for piece in _split(text):
+            if current and len(current) + len(SEPARATOR) + len(piece) <= MESSAGE_LIMIT:
+                current += SEPARATOR + piece
+            else:
+                if current:
+                    chunks.append(current)
+                current = piece
+    chunks.append(current)
+    return chunks
+
+
+def _split(text: str) -> list[str]:
+    """
+    Splits an HTML text into pieces of at most MESSAGE_LIMIT characters, each of them valid HTML on its own.
+    Pieces end at line ends where possible (the line end itself is dropped), and never inside a tag or an entity.
+    Tags open at the end of a piece are closed there and reopened at the start of the next piece.
+    Time complexity: O(n * p) where n is length of the text and p is amount of pieces.
+    """
+    pieces: list[str] = []
+    opened: list[tuple[str, str]] = []  # Tags open at the start of `text`: (name, opening tag).
+    while True:
+        prefix = "".join(tag for _, tag in opened)
+        if len(prefix) + len(text) <= MESSAGE_LIMIT:
+            pieces.append(prefix + text)
+            return pieces
+        room = MESSAGE_LIMIT - len(prefix)
+        while True:  # Closing tags take room too: cut earlier until they fit.
+            end, start = _cut(text, max(room, 1))
+            still_open = _open_tags(opened, text[:end])
+            suffix = "".join(f"</{name}>" for name, _ in reversed(still_open))
+            overflow = len(prefix) + end + len(suffix) - MESSAGE_LIMIT
+            if overflow <= 0 or room <= 1:
+                break
+            room -= overflow
+        pieces.append(prefix + text[:end] + suffix)
+        opened, text = still_open, text[start:]
+
+
+def _cut(text: str, room: int) -> tuple[int, int]:
+    """
+    Returns where to split `text` so that the first piece takes at most `room` characters:
+    end of the first piece and start of the rest. The last line end that fits is preferred.
+    """
+    line = text.rfind("\n", 0, room + 1)
+    while line > 0 and not _outside_markup(text, line):
+        line = text.rfind("\n", 0, line)
+    if line > 0:
+        return line, line + 1
+    cut = room
+    while cut > 1 and not _outside_markup(text, cut):
+        cut -= 1
+    return cut, cut
+
+
+def _outside_markup(text: str, i: int) -> bool:
+    """
+    Returns whether position `i` of an HTML text lies outside of any tag and entity (e.g. "&lt;").
+    """
+    amp = text.rfind("&", 0, i)
+    return text.rfind("<", 0, i) <= text.rfind(">", 0, i) and (amp == -1 or text.find(";", amp, i) != -1)
+
+
+def _open_tags(opened: list[tuple[str, str]], text: str) -> list[tuple[str, str]]:
+    """
+    Returns tags open at the end of `text`, given tags open at its start: (name, opening tag), outermost first.
+    """
+    stack = list(opened)
+    for match in _TAG.finditer(text):
+        if not match.group(1):
+            stack.append((match.group(2).lower(), match.group(0)))
+        elif stack and stack[-1][0] == match.group(2).lower():
+            stack.pop()
+    return stack
+
+
+# Middleware providing `reply` to message handlers.
+class ReplyMiddleware(BaseMiddleware):
+    """
+    Passes a `Reply` for the incoming message to the handler as `reply`, and flushes it after the handler,
+    also when the handler fails, so that replies collected so far are not lost.
+    """
+
+    @override
+    async def __call__(
+        self,
+        handler: tp.Callable[[TelegramObject, dict[str, tp.Any]], tp.Awaitable[tp.Any]],
+        event: TelegramObject,
+        data: dict[str, tp.Any],
+    ) -> tp.Any:
+        reply = data["reply"] = Reply(tp.cast(Message, event))
+        try:
+            return await handler(event, data)
+        finally:
+            await reply.flush()
@@ -0,0 +1,148 @@
+"""
+               GLWT(Good Luck With That) Public License
+                 Copyright (c) Everyone, except Author
+
+Everyone is permitted to copy, distribute, modify, merge, sell, publish,
+sublicense or whatever they want with this software but at their OWN RISK.
+
+                            Preamble
+
+The author has absolutely no clue what the code in this project does.
+It might just work or not, there is no third option.
+
+
+                GOOD LUCK WITH THAT PUBLIC LICENSE
+   TERMS AND CONDITIONS FOR COPYING, DISTRIBUTION, AND MODIFICATION
+
+  0. You just DO WHATEVER YOU WANT TO as long as you NEVER LEAVE A
+TRACE TO TRACK THE AUTHOR of the original product to blame for or hold
+responsible.
+
+IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+
+Good luck and Godspeed.
+"""
+
+"""
+Module `src/sequencer.py` handles updates of a chat one at a time.
+---
+aiogram handles every update in its own task, so two quick taps of the same user run concurrently:
+both handlers read the same game from FSM data, both run the engine, and the second write overwrites the first.
+
+`ChatSequencer` is an update middleware holding a lock per chat (and user) around the handlers:
+    1. Updates of one chat are handled one after another, in the order they arrived. Updates of different chats
+        still run concurrently. Every handler sees the game as left by the previous one.
+        Locks exist only while a chat has updates in flight, so memory does not grow with the amount of users.
+    2. Stale duplicates are dropped: an update equal to one that is still waiting or being handled
+        (same text, or same button of the same message) was sent before the user saw the reply to the first one.
+        Handling it would play the same move twice or answer "Invalid move", and would cost another engine call.
+        Dropped button presses are answered with an empty notification, to stop the loading indicator.
+Link: https://docs.aiogram.dev/en/v3.22.0/dispatcher/middlewares.html
+
+Typical usage example:
+```
+dp.update.outer_middleware(ChatSequencer())
+```
+"""
+
+import asyncio
+import typing as tp
+from collections import Counter
+from dataclasses import dataclass, field
+
+from typing_extensions import override
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.types import Chat, TelegramObject, Update, User
+
+
+# Updates of a single chat being handled.
+@dataclass
+class _Chat:
+    """
+    Attributes:
+        lock: held by the update being handled.
+        updates: amount of updates waiting or being handled.
+        fingerprints: fingerprints of these updates, see `_fingerprint`.
+    """
+
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    updates: int = 0
+    fingerprints: Counter[tp.Hashable] = field(default_factory=Counter)
+
+
+def _fingerprint(update: Update) -> tp.Optional[tp.Hashable]:
+    """
+    Returns what makes an update a duplicate: text of a message, or a button of a message.
+    None for other updates, they are never dropped.
+    """
+    if update.message is not None and update.message.text is not None:
+        return ("message", update.message.text)
+    callback = update.callback_query
+    if callback is not None and callback.data is not None:
+        message_id = callback.message.message_id if callback.message is not None else None
+        return ("callback", message_id, callback.data)
+    return None
+
+
+# Update middleware handling updates of a chat one at a time.
+class ChatSequencer(BaseMiddleware):
+    """
+    Update middleware handling updates of a chat one at a time and dropping stale duplicates.
+    Must be registered as an outer middleware of `Dispatcher.update`, after aiogram's own middlewares,
+    which resolve the chat and the user of an update.
+
+    Attributes:
+        dropped: amount of dropped duplicate updates.
+    """
+
+    def __init__(self):
+        self.dropped = 0
+        self._chats: dict[tuple[int, int], _Chat] = {}
+
+    def stats(self) -> dict[str, int]:
+        """
+        Returns counters: dropped duplicates, chats with updates in flight, and updates waiting for their turn.
+        """
+        return {
+            "dropped": self.dropped,
+            "chats": len(self._chats),
+            "waiting": sum(chat.updates - 1 for chat in self._chats.values()),
+        }
+
+    @override
+    async def __call__(
+        self,
+        handler: tp.Callable[[TelegramObject, dict[str, tp.Any]], tp.Awaitable[tp.Any]],
+        event: TelegramObject,
+        data: dict[str, tp.Any],
+    ) -> tp.Any:
+        chat: tp.Optional[Chat] = data.get("event_chat")
+        user: tp.Optional[User] = data.get("event_from_user")
+        if chat is None or user is None or not isinstance(event, Update):
+            return await handler(event, data)
+        key = (chat.id, user.id)
+
+        entry = self._chats.get(key)
+        if entry is None:
+            entry = self._chats[key] = _Chat()
+        fingerprint = _fingerprint(event)
+        if fingerprint is not None and entry.fingerprints[fingerprint]:
+            self.dropped += 1
+            if event.callback_query is not None:
+                await tp.cast(Bot, data["bot"]).answer_callback_query(event.callback_query.id)
+            return None
+
+        entry.updates += 1
+        entry.fingerprints[fingerprint] += 1
+        try:
+            async with entry.lock:
+                return await handler(event, data)
+        finally:
+            entry.updates -= 1
+            entry.fingerprints[fingerprint] -= 1
+            if entry.updates == 0:
+                del self._chats[key]
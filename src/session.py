@@ -0,0 +1,91 @@
+"""
+               GLWT(Good Luck With That) Public License
+                 Copyright (c) Everyone, except Author
+
+Everyone is permitted to copy, distribute, modify, merge, sell, publish,
+sublicense or whatever they want with this software but at their OWN RISK.
+
+                            Preamble
+
+The author has absolutely no clue what the code in this project does.
+It might just work or not, there is no third option.
+
+
+                GOOD LUCK WITH THAT PUBLIC LICENSE
+   TERMS AND CONDITIONS FOR COPYING, DISTRIBUTION, AND MODIFICATION
+
+  0. You just DO WHATEVER YOU WANT TO as long as you NEVER LEAVE A
+TRACE TO TRACK THE AUTHOR of the original product to blame for or hold
+responsible.
+
+IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+
+Good luck and Godspeed.
+"""
+
+"""
+Module `src/session.py` stores games in user sessions (FSM data).
+---
+A session keeps only plain JSON values, so that any aiogram storage backend can hold it:
+    - "game": name of the game (as declared in `GAMES_TO_PLAY`), the instance is taken from the registry.
+    - "game_state": game state encoded with `Game.encode_state` and then with base64.
+      Link: https://docs.python.org/3/library/base64.html
+      For example, a Tic Tac Toe state takes 2 bytes, that is 4 base64 characters.
+
+Typical usage example:
+```
+await state.update_data(**await pack_game(game, game_state))
+...
+game, game_state = await unpack_game(registry, await state.get_data())
+```
+"""
+
+import base64
+import binascii
+import typing as tp
+
+from games.game import Game
+from registry import GameRegistry
+
+# Keys of session data.
+GAME_KEY = "game"
+STATE_KEY = "game_state"
+
+
+async def pack_state(game: Game, game_state: tp.Any) -> str:
+    """
+    Returns session representation of a game state.
+    """
+    return base64.b64encode(await game.encode_state(game_state)).decode("ascii")
+
+
+async def pack_game(game: Game, game_state: tp.Any) -> dict[str, str]:
+    """
+    Returns session data describing a game in progress, to be passed to `FSMContext.update_data`.
+    """
+    return {GAME_KEY: await game.name(), STATE_KEY: await pack_state(game, game_state)}
+
+
+async def unpack_game(registry: GameRegistry, data: dict[str, tp.Any]) -> tp.Optional[tuple[Game, tp.Any]]:
+    """
+    Restores game and state stored by `pack_game`.
+
+    Returns:
+        tp.Optional[tuple[Game, tp.Any]]: game instance and decoded state,
+            or None if session holds no game or the stored game no longer exists or can not be decoded.
+    """
+    name, packed = data.get(GAME_KEY), data.get(STATE_KEY)
+    if not isinstance(name, str) or not isinstance(packed, str):
+        return None
+
+    game = await registry.get(name)
+    if game is None:
+        return None
+
+    try:
+        return game, await game.decode_state(base64.b64decode(packed, validate=True))
+    except (ValueError, binascii.Error):
+        return None
@@ -0,0 +1,547 @@
+"""
+               GLWT(Good Luck With That) Public License
+                 Copyright (c) Everyone, except Author
+
+Everyone is permitted to copy, distribute, modify, merge, sell, publish,
+sublicense or whatever they want with this software but at their OWN RISK.
+
+                            Preamble
+
+The author has absolutely no clue what the code in this project does.
+It might just work or not, there is no third option.
+
+
+                GOOD LUCK WITH THAT PUBLIC LICENSE
+   TERMS AND CONDITIONS FOR COPYING, DISTRIBUTION, AND MODIFICATION
+
+  0. You just DO WHATEVER YOU WANT TO as long as you NEVER LEAVE A
+TRACE TO TRACK THE AUTHOR of the original product to blame for or hold
+responsible.
+
+IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+
+Good luck and Godspeed.
+"""
+
+"""
+Module `src/storage.py` provides a persistent FSM storage for aiogram, backed by SQLite.
+---
+aiogram's default `MemoryStorage` keeps every session in a dict forever: a restart wipes all games
+in progress, and memory grows with every user who ever pressed /start.
+`SQLiteStorage` keeps sessions in a local SQLite database instead.
+Link: https://docs.python.org/3/library/sqlite3.html
+
+    1. The database runs in WAL mode (write-ahead log), so readers never wait for a writer.
+        Link: https://www.sqlite.org/wal.html
+
+    2. Recently used sessions are kept in a bounded in-memory LRU cache ("hot cache"),
+        so a user in the middle of a game is served without touching the disk.
+        Link: https://en.wikipedia.org/wiki/Cache_replacement_policies#LRU
+        Cold sessions are dropped from memory and loaded back from the database on their next update.
+
+    3. Writes (`set_state`, `set_data`, `update_data`) only change the cached session and mark it dirty.
+        A background task flushes all dirty sessions every `flush_interval` seconds
+        in a single transaction ("write-behind"), in a worker thread, so a turn costs no disk write
+        and many turns cost one commit. Dirty sessions stay in memory until they are flushed.
+        Link: https://en.wikipedia.org/wiki/Cache_(computing)#Writing_policies
+
+A crash may lose writes of the last `flush_interval` seconds. A normal shutdown flushes everything:
+the `Dispatcher` closes its storage on shutdown, see `SQLiteStorage.close`.
+
+Session data is stored as JSON, so it must hold plain JSON values only (see `src/session.py`).
+Sessions without a state and without data are deleted from the database.
+
+Idle sessions expire: users often start a game and never come back.
+With `ttl` set, a session not written for `ttl` seconds is deleted, so storage size is proportional
+to active players instead of lifetime users. Expiry is both lazy (an expired session is dropped when it is read)
+and periodic (`expire_idle` deletes all expired sessions, it should be called every now and then).
+A session that had a state is replaced by a marker: a session without a state, whose data holds
+the state of the expired session under `EXPIRED_STATE`. So the bot can tell a user returning to an expired game
+from a new user. The marker is dropped when the session gets a state again, or expires after another `ttl`.
+Expiry counters (`expired`) count expired sessions only, dropping an idle marker is not counted.
+`ExpiringMemoryStorage` does the same for sessions kept in memory only.
+
+Typical usage example:
+```
+storage = SQLiteStorage("sessions.sqlite3", ttl=24 * 60 * 60)
+dp = Dispatcher(storage=storage)
+...
+await storage.expire_idle()  # Periodically.
+```
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+import typing as tp
+from collections import OrderedDict
+from copy import copy
+from dataclasses import dataclass, field
+
+from typing_extensions import override
+
+from aiogram.exceptions import DataNotDictLikeError
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage, MemoryStorageRecord
+
+logger = logging.getLogger(__name__)
+
+# Data key of the marker replacing an expired session, holds the state of the expired session.
+EXPIRED_STATE = "expired_state"
+
+# Schema of the sessions table. `key` is built from `StorageKey` by the key builder.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    key TEXT PRIMARY KEY,
+    state TEXT,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at);
+"""
+
+# Counts sessions without a state which are not markers, see EXPIRED_STATE.
+_COUNT_STATELESS = f"""
+SELECT COUNT(*) FROM sessions
+WHERE updated_at < ? AND state IS NULL AND json_type(data, '$.{EXPIRED_STATE}') IS NULL
+"""
+
+# Turns sessions with a state into markers, see EXPIRED_STATE.
+_MARK_EXPIRED = f"""
+UPDATE sessions SET state = NULL, data = json_object('{EXPIRED_STATE}', state), updated_at = ?
+WHERE updated_at < ? AND state IS NOT NULL
+"""
+
+_UPSERT = """
+INSERT INTO sessions (key, state, data, updated_at) VALUES (?, ?, ?, ?)
+ON CONFLICT (key) DO UPDATE SET state = excluded.state, data = excluded.data, updated_at = excluded.updated_at
+"""
+
+
+# Session of a single user (chat) as kept in memory.
+@dataclass(slots=True)
+class _Record:
+    """
+    Attributes:
+        state: FSM state name, or None.
+        data: FSM data.
+        updated_at: UNIX time of the last write.
+    """
+
+    state: tp.Optional[str] = None
+    data: dict[str, tp.Any] = field(default_factory=dict)
+    updated_at: float = 0.0
+
+
+def _is_marker(state: tp.Optional[str], data: tp.Mapping[str, tp.Any]) -> bool:
+    """
+    Returns whether a session is a marker left by an expired session (see EXPIRED_STATE).
+    """
+    return state is None and EXPIRED_STATE in data
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    """
+    Opens the database in WAL mode and creates the sessions table.
+    """
+    # Autocommit mode, transactions are opened explicitly by the flush.
+    # The connection is used from worker threads, one at a time.
+    connection = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    # In WAL mode NORMAL is safe against application crashes, only a power loss may drop the last commits.
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(_SCHEMA)
+    return connection
+
+
+# FSM storage keeping sessions in SQLite, with a hot cache and write-behind batching.
+class SQLiteStorage(BaseStorage):
+    """
+    FSM storage keeping sessions in SQLite, with a hot cache and write-behind batching.
+    See module documentation.
+
+    Attributes:
+        cache_size: maximum amount of clean sessions kept in memory.
+        flush_interval: seconds between flushes of dirty sessions.
+        hits: amount of session lookups answered from memory.
+        misses: amount of session lookups that read the database.
+        flushed: amount of session writes committed to the database.
+        ttl: seconds after the last write when a session expires. None means sessions never expire.
+        expired: amount of expired sessions, markers (see EXPIRED_STATE) are not counted.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        cache_size: int = 10_000,
+        flush_interval: float = 1.0,
+        key_builder: tp.Optional[KeyBuilder] = None,
+        ttl: tp.Optional[float] = None,
+    ):
+        if cache_size < 1:
+            raise ValueError("Session cache size must be positive")
+        if flush_interval <= 0:
+            raise ValueError("Session flush interval must be positive")
+        if ttl is not None and ttl <= 0:
+            raise ValueError("Session TTL must be positive")
+        self.cache_size = cache_size
+        self.flush_interval = flush_interval
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.flushed = 0
+        self.expired = 0
+        self._key_builder = key_builder or DefaultKeyBuilder(
+            with_bot_id=True, with_business_connection_id=True, with_destiny=True
+        )
+
+        # Separate connections: reads of cold sessions do not wait for a flush in progress (WAL).
+        self._reader = _connect(path)
+        self._writer = _connect(path)
+
+        # Hot cache, least recently used first.
+        self._cache: OrderedDict[str, _Record] = OrderedDict()
+        # Sessions written since the last flush. Also kept in `_cache` unless evicted from it.
+        self._dirty: dict[str, _Record] = {}
+        # Only one flush runs at a time.
+        self._flush_lock = asyncio.Lock()
+        # Periodic flush, started on the first write.
+        self._flush_task: tp.Optional[asyncio.Task] = None
+
+    def stats(self) -> dict[str, int]:
+        """
+        Returns counters of the storage: hits, misses, flushed, expired, and amount of cached and dirty sessions.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "flushed": self.flushed,
+            "expired": self.expired,
+            "cached": len(self._cache),
+            "dirty": len(self._dirty),
+        }
+
+    async def _load(self, key: str) -> _Record:
+        """
+        Returns the session for `key`, from memory or from the database.
+
+        Time complexity: O(1) on a hit. A miss reads one row in a worker thread.
+        """
+        record = self._dirty.get(key) or self._cache.get(key)
+        if record is not None:
+            self.hits += 1
+            if key in self._cache:
+                self._cache.move_to_end(key)  # Mark as most recently used.
+            else:  # Dirty session evicted from the cache before its flush.
+                self._cache[key] = record
+                self._evict()
+            return self._expire(key, record)
+
+        self.misses += 1
+        row = await asyncio.to_thread(self._read_row, key)
+
+        # The session may have been loaded or written by another update while the row was being read.
+        record = self._dirty.get(key) or self._cache.get(key)
+        if record is None:
+            record = _Record(row[0], json.loads(row[1]), row[2]) if row is not None else _Record()
+        self._cache[key] = record
+        self._cache.move_to_end(key)
+        self._evict()
+        return self._expire(key, record)
+
+    def _expire(self, key: str, record: _Record) -> _Record:
+        """
+        Returns `record`, or a marker (see EXPIRED_STATE) replacing it if `record` has expired (lazy expiry).
+        Sessions without a state are replaced by an empty session, the next flush deletes it from the database.
+        """
+        if self.ttl is None or (record.state is None and not record.data) or record.updated_at >= time.time() - self.ttl:
+            return record
+        if not _is_marker(record.state, record.data):
+            self.expired += 1
+        record = _Record(data={EXPIRED_STATE: record.state}) if record.state is not None else _Record()
+        self._cache[key] = record
+        self._touch(key, record)
+        return record
+
+    def _read_row(self, key: str) -> tp.Optional[tuple[tp.Optional[str], str, float]]:
+        """
+        Reads a session row. Runs in a worker thread.
+        """
+        return self._reader.execute("SELECT state, data, updated_at FROM sessions WHERE key = ?", (key,)).fetchone()
+
+    def _evict(self):
+        """
+        Drops least recently used sessions beyond `cache_size` from the hot cache.
+        Dirty sessions are still referenced by `_dirty` until they are flushed.
+        """
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _touch(self, key: str, record: _Record):
+        """
+        Marks a session as written, to be saved by the next flush.
+        """
+        record.updated_at = time.time()
+        self._dirty[key] = record
+        if self._flush_task is None:
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_periodically())
+
+    async def _flush_periodically(self):
+        """
+        Flushes dirty sessions every `flush_interval` seconds, until cancelled by `close`.
+        """
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self):
+        """
+        Saves all dirty sessions to the database in a single transaction.
+
+        Sessions written while the flush is in progress are saved by the next flush.
+        If the database fails, sessions stay dirty and the flush is retried next time.
+
+        Time complexity: O(n) where n is amount of dirty sessions.
+        """
+        async with self._flush_lock:
+            await self._flush_dirty()
+
+    async def _flush_dirty(self):
+        """
+        Body of `flush`, called with the flush lock held.
+        """
+        if not self._dirty:
+            return
+        batch, self._dirty = self._dirty, {}
+
+        # Serialize on the loop: records may change as soon as the loop continues.
+        upserts: list[tuple[str, tp.Optional[str], str, float]] = []
+        deletes: list[tuple[str]] = []
+        for key, record in batch.items():
+            if record.state is None and not record.data:
+                deletes.append((key,))
+            else:
+                upserts.append((key, record.state, json.dumps(record.data), record.updated_at))
+
+        try:
+            await asyncio.to_thread(self._write_rows, upserts, deletes)
+        except sqlite3.Error:
+            logger.exception("Failed to flush %d sessions, retrying later", len(batch))
+            for key, record in batch.items():
+                self._dirty.setdefault(key, record)
+            return
+        self.flushed += len(batch)
+
+    def _write_rows(self, upserts: list[tuple[str, tp.Optional[str], str, float]], deletes: list[tuple[str]]):
+        """
+        Writes a batch of sessions in one transaction. Runs in a worker thread.
+        """
+        with self._writer:  # Commits on success, rolls back on error.
+            self._writer.execute("BEGIN")
+            self._writer.executemany(_UPSERT, upserts)
+            self._writer.executemany("DELETE FROM sessions WHERE key = ?", deletes)
+
+    async def expire_idle(self) -> int:
+        """
+        Expires all sessions not written for `ttl` seconds, in memory and in the database:
+        sessions with a state are replaced by markers (see EXPIRED_STATE), the rest are deleted.
+        Does nothing if `ttl` is None.
+
+        Returns:
+            int: amount of expired sessions, markers are not counted.
+        Time complexity: O(c + log(n) + e) where c is amount of cached sessions, n is amount of stored sessions
+            and e is amount of expired ones.
+        """
+        if self.ttl is None:
+            return 0
+        cutoff = time.time() - self.ttl
+
+        # Holding the flush lock keeps the database consistent with dirty sessions.
+        async with self._flush_lock:
+            # Flush first: sessions replaced by lazy expiry must not be counted twice.
+            await self._flush_dirty()
+            # Dirty sessions were written recently, only clean ones can be expired.
+            for key in [key for key, record in self._cache.items() if record.updated_at < cutoff and key not in self._dirty]:
+                del self._cache[key]
+            try:
+                expired = await asyncio.to_thread(self._expire_idle_rows, cutoff)
+            except sqlite3.Error:
+                logger.exception("Failed to delete expired sessions")
+                return 0
+        self.expired += expired
+        return expired
+
+    def _expire_idle_rows(self, cutoff: float) -> int:
+        """
+        Replaces sessions written before `cutoff` by markers, or deletes them if they have no state.
+        Returns amount of expired sessions, deleted markers are not counted. Runs in a worker thread.
+        """
+        with self._writer:
+            self._writer.execute("BEGIN")
+            (stateless,) = self._writer.execute(_COUNT_STATELESS, (cutoff,)).fetchone()
+            self._writer.execute("DELETE FROM sessions WHERE updated_at < ? AND state IS NULL", (cutoff,))
+            marked = self._writer.execute(_MARK_EXPIRED, (time.time(), cutoff))
+            return stateless + marked.rowcount
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        storage_key = self._key_builder.build(key)
+        record = await self._load(storage_key)
+        record.state = state.state if isinstance(state, State) else state
+        if record.state is not None:
+            record.data.pop(EXPIRED_STATE, None)  # The user is back, the marker has served its purpose.
+        self._touch(storage_key, record)
+
+    async def get_state(self, key: StorageKey) -> tp.Optional[str]:
+        return (await self._load(self._key_builder.build(key))).state
+
+    async def set_data(self, key: StorageKey, data: tp.Mapping[str, tp.Any]) -> None:
+        if not isinstance(data, dict):
+            raise DataNotDictLikeError(f"Data must be a dict or dict-like object, got {type(data).__name__}")
+        storage_key = self._key_builder.build(key)
+        record = await self._load(storage_key)
+        record.data = data.copy()
+        self._touch(storage_key, record)
+
+    async def get_data(self, key: StorageKey) -> dict[str, tp.Any]:
+        return (await self._load(self._key_builder.build(key))).data.copy()
+
+    async def get_value(self, storage_key: StorageKey, dict_key: str, default: tp.Optional[tp.Any] = None) -> tp.Optional[tp.Any]:
+        # Avoids copying the whole session data, unlike the default implementation.
+        data = (await self._load(self._key_builder.build(storage_key))).data
+        return copy(data.get(dict_key, default))
+
+    async def close(self) -> None:
+        """
+        Stops the periodic flush, saves all dirty sessions and closes the database.
+        """
+        if self._flush_task is not None:
+            async with self._flush_lock:  # Do not interrupt a flush in progress.
+                self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self.flush()
+        self._reader.close()
+        self._writer.close()
+
+
+# In-memory FSM storage where idle sessions expire.
+class ExpiringMemoryStorage(MemoryStorage):
+    """
+    aiogram's `MemoryStorage` where sessions not written for `ttl` seconds expire.
+    Unlike `MemoryStorage`, reading a session of an unknown user does not create an empty session.
+    Sessions are lost on restart, see `SQLiteStorage` for a persistent storage.
+
+    Attributes:
+        ttl: seconds after the last write when a session expires. None means sessions never expire.
+        expired: amount of expired sessions, markers (see EXPIRED_STATE) are not counted.
+    """
+
+    def __init__(self, ttl: tp.Optional[float] = None) -> None:
+        super().__init__()
+        if ttl is not None and ttl <= 0:
+            raise ValueError("Session TTL must be positive")
+        self.ttl = ttl
+        self.expired = 0
+        # Time of the last write of every session, least recently written first.
+        self._written: OrderedDict[StorageKey, float] = OrderedDict()
+
+    def _touch(self, key: StorageKey):
+        """
+        Records a write of a session.
+        """
+        self._written[key] = time.monotonic()
+        self._written.move_to_end(key)
+
+    def _alive(self, key: StorageKey) -> bool:
+        """
+        Returns whether `key` has a session, replacing it by a marker (see EXPIRED_STATE)
+        or deleting it if it has expired (lazy expiry).
+        """
+        written = self._written.get(key)
+        if written is None:
+            return False
+        if self.ttl is not None and written < time.monotonic() - self.ttl:
+            if not _is_marker(self.storage[key].state, self.storage[key].data):
+                self.expired += 1
+            return self._expire(key)
+        return True
+
+    def _expire(self, key: StorageKey) -> bool:
+        """
+        Replaces an expired session by a marker, or deletes it if it has no state.
+        Returns whether a marker was left.
+        """
+        state = self.storage[key].state
+        if state is None:
+            del self._written[key]
+            del self.storage[key]
+            return False
+        self.storage[key] = MemoryStorageRecord(data={EXPIRED_STATE: state})
+        self._touch(key)
+        return True
+
+    async def expire_idle(self) -> int:
+        """
+        Expires all sessions not written for `ttl` seconds: sessions with a state are replaced by markers
+        (see EXPIRED_STATE), the rest are deleted. Does nothing if `ttl` is None.
+
+        Returns:
+            int: amount of expired sessions, markers are not counted.
+        Time complexity: O(e) where e is amount of expired sessions, as sessions are ordered by time of the last write.
+        """
+        if self.ttl is None:
+            return 0
+        cutoff = time.monotonic() - self.ttl
+        expired = 0
+        while self._written:
+            key, written = next(iter(self._written.items()))
+            if written >= cutoff:
+                break
+            if not _is_marker(self.storage[key].state, self.storage[key].data):
+                expired += 1
+            self._expire(key)  # A marker is written now, it moves to the end.
+        self.expired += expired
+        return expired
+
+    def stats(self) -> dict[str, int]:
+        """
+        Returns counters of the storage: expired, and amount of stored sessions.
+        """
+        return {"expired": self.expired, "cached": len(self.storage)}
+
+    @override
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        self._alive(key)  # An expired session must not keep its data.
+        await super().set_state(key, state)
+        if state is not None:
+            self.storage[key].data.pop(EXPIRED_STATE, None)  # The user is back, the marker has served its purpose.
+        self._touch(key)
+
+    @override
+    async def get_state(self, key: StorageKey) -> tp.Optional[str]:
+        return self.storage[key].state if self._alive(key) else None
+
+    @override
+    async def set_data(self, key: StorageKey, data: tp.Mapping[str, tp.Any]) -> None:
+        self._alive(key)  # An expired session must not keep its state.
+        await super().set_data(key, data)
+        self._touch(key)
+
+    @override
+    async def get_data(self, key: StorageKey) -> dict[str, tp.Any]:
+        return self.storage[key].data.copy() if self._alive(key) else {}
+
+    @override
+    async def get_value(self, storage_key: StorageKey, dict_key: str, default: tp.Optional[tp.Any] = None) -> tp.Optional[tp.Any]:
+        if not self._alive(storage_key):
+            return default
+        return copy(self.storage[storage_key].data.get(dict_key, default))
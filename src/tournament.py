@@ -0,0 +1,428 @@
+"""
+               GLWT(Good Luck With That) Public License
+                 Copyright (c) Everyone, except Author
+
+Everyone is permitted to copy, distribute, modify, merge, sell, publish,
+sublicense or whatever they want with this software but at their OWN RISK.
+
+                            Preamble
+
+The author has absolutely no clue what the code in this project does.
+It might just work or not, there is no third option.
+
+
+                GOOD LUCK WITH THAT PUBLIC LICENSE
+   TERMS AND CONDITIONS FOR COPYING, DISTRIBUTION, AND MODIFICATION
+
+  0. You just DO WHATEVER YOU WANT TO as long as you NEVER LEAVE A
+TRACE TO TRACK THE AUTHOR of the original product to blame for or hold
+responsible.
+
+IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+
+Good luck and Godspeed.
+"""
+
+"""
+Module `src/tournament.py` plays the engines of all games against opponents, offline, to verify they never lose.
+---
+The promise of the bot is that it never loses. This tool checks it by playing, directly through the `Game` interface
+(no Telegram involved), exactly as the bot does: the user moves, and unless the game is over, the engine replies
+(see `play_turn` in `src/main.py`). Opponents:
+
+    1. "exhaustive" - tries every user move in every position the engine lets the game reach,
+        a depth-first search over the game tree with engine replies. Positions seen once are not searched again.
+        Where the engine chooses randomly between equally good moves, only the moves it actually chose are covered.
+        Stops after `--limit` positions per job (the report says so) for games too large to enumerate.
+    2. "random" - plays uniformly random legal moves, `--games` games.
+    3. "adversarial" - plays the move with the best minimax value over the next `--depth` plies,
+        assuming the engine replies optimally, ties broken randomly, `--games` games.
+        Link: https://en.wikipedia.org/wiki/Minimax
+
+Games whose engine searches for a time budget (their class accepts `time_budget`, e.g. 4x4 Tic Tac Toe)
+can not be enumerated, and at the bot's budget of 1 s per move even sampling takes hours. By default they
+search for SEARCH_TIME_BUDGET seconds per move, and play `--search-games` games and `--search-limit` positions
+per job instead. `--option time_budget=1.0` plays them at the production budget.
+
+With default settings a run takes about a minute of CPU time (62 s on a single core),
+most of it spent on 4x4 Tic Tac Toe, so it fits a CI job.
+
+Work is split into jobs (by the first user move for exhaustive search, by chunks of games otherwise)
+run by a process pool, one worker per CPU by default. Every worker creates and warms up its own games.
+Link: https://docs.python.org/3/library/concurrent.futures.html#processpoolexecutor
+
+Reported per game and opponent: games played, engine wins, draws, losses, errors (illegal or failing engine moves),
+games per second of worker time, and percentiles of engine move latency. Every loss and error is printed with
+its move sequence. The tool exits with code 1 if any was found.
+
+Usage example:
+```
+python3 src/tournament.py
+python3 src/tournament.py --only tictactoe4x4 --search-games 10000 --option time_budget=1.0
+```
+Expected time complexity: O(jobs * games per job * moves per game * engine move time) / workers.
+"""
+
+import argparse
+import ast
+import asyncio
+import inspect
+import os
+import random
+import sys
+import time
+import typing as tp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field, replace
+
+from bench import format_duration, summarize
+from games.game import Game
+from registry import GameSpec, discover, select
+
+# Opponent kinds, see module documentation.
+OPPONENTS = ("exhaustive", "random", "adversarial")
+
+# Default seconds per move of searching engines, see module documentation.
+SEARCH_TIME_BUDGET = 0.02
+
+# Amount of engine latencies kept by every job, sampled uniformly (reservoir sampling).
+# Link: https://en.wikipedia.org/wiki/Reservoir_sampling
+LATENCY_SAMPLES = 10_000
+
+
+# Unit of work run by a worker process.
+@dataclass(frozen=True)
+class Job:
+    """
+    Unit of work run by a worker process.
+
+    Attributes:
+        spec: game to play.
+        opponent: one of OPPONENTS.
+        seed: seed of random choices of the opponent.
+        games: amount of games to play (random and adversarial opponents).
+        first_move: index of the first user move among legal moves of the initial state (exhaustive opponent).
+        limit: maximum amount of positions to search (exhaustive opponent).
+        depth: search depth in plies (adversarial opponent).
+    """
+
+    spec: GameSpec
+    opponent: str
+    seed: int = 0
+    games: int = 0
+    first_move: int = 0
+    limit: int = 0
+    depth: int = 0
+
+
+# Results of jobs, merged per game and opponent.
+@dataclass
+class Outcome:
+    """
+    Results of jobs, merged per game and opponent.
+
+    Attributes:
+        games: amount of finished games (lines of play for exhaustive search).
+        wins: games won by the engine.
+        draws: drawn games.
+        losses: move sequences of games lost by the engine.
+        errors: descriptions of engine failures, with move sequences.
+        latencies: sampled durations of engine moves in seconds.
+        seconds: worker time spent.
+        complete: whether exhaustive search covered all positions within its limit.
+    """
+
+    games: int = 0
+    wins: int = 0
+    draws: int = 0
+    losses: list[list[str]] = field(default_factory=list)
+    errors: list[str] = field(default_factory=list)
+    latencies: list[float] = field(default_factory=list)
+    seconds: float = 0.0
+    complete: bool = True
+
+    def merge(self, other: "Outcome"):
+        """
+        Adds results of another job.
+        """
+        self.games += other.games
+        self.wins += other.wins
+        self.draws += other.draws
+        self.losses.extend(other.losses)
+        self.errors.extend(other.errors)
+        self.latencies.extend(other.latencies)
+        self.seconds += other.seconds
+        self.complete = self.complete and other.complete
+
+
+# Plays games of one job and records their results.
+class Player:
+    """
+    Plays games of one job against the engine and records their results into `outcome`.
+    """
+
+    def __init__(self, game: Game, job: Job):
+        self.game = game
+        self.job = job
+        self.rng = random.Random(job.seed)
+        self.outcome = Outcome()
+        self._moves_timed = 0
+
+    async def engine_move(self, state: tp.Any, line: list[str]) -> tp.Any:
+        """
+        Returns the engine's move, timed. Raises ValueError if the engine returns an illegal move.
+        """
+        started = time.perf_counter()
+        move = await self.game.generate_best_move(state)
+        latency = time.perf_counter() - started
+
+        self._moves_timed += 1
+        if len(self.outcome.latencies) < LATENCY_SAMPLES:
+            self.outcome.latencies.append(latency)
+        elif (slot := self.rng.randrange(self._moves_timed)) < LATENCY_SAMPLES:
+            self.outcome.latencies[slot] = latency
+
+        if move not in await self.game.get_legal_moves(state):
+            raise ValueError(f"engine returned illegal move {move!r} after {' '.join(line) or 'no moves'}")
+        return move
+
+    async def finish(self, state: tp.Any, line: list[str]):
+        """
+        Records the result of a terminal state.
+        """
+        winner = await self.game.get_winner(state)
+        self.outcome.games += 1
+        if winner == -1:
+            self.outcome.wins += 1
+        elif winner == 0:
+            self.outcome.draws += 1
+        else:
+            self.outcome.losses.append(line)
+
+    async def play(self, choose: tp.Callable[[tp.Any], tp.Awaitable[tp.Any]]):
+        """
+        Plays one game with user moves chosen by `choose(state)`.
+        """
+        state = await self.game.initial_state()
+        line: list[str] = []
+        while not await self.game.is_terminal(state):
+            move = await choose(state)
+            line.append(str(move))
+            state = await self.game.add_move(state, move)
+            if await self.game.is_terminal(state):
+                break
+            move = await self.engine_move(state, line)
+            line.append(str(move))
+            state = await self.game.add_move(state, move)
+        await self.finish(state, line)
+
+    async def random_move(self, state: tp.Any) -> tp.Any:
+        """
+        Returns a uniformly random legal move.
+        """
+        return self.rng.choice(await self.game.get_legal_moves(state))
+
+    async def adversarial_move(self, state: tp.Any) -> tp.Any:
+        """
+        Returns a move with the best minimax value for the user over `job.depth` plies, ties broken randomly.
+        """
+        best_value, best_moves = -2, []
+        for move in await self.game.get_legal_moves(state):
+            value = await self.minimax(await self.game.add_move(state, move), self.job.depth - 1, user_to_move=False)
+            if value > best_value:
+                best_value, best_moves = value, [move]
+            elif value == best_value:
+                best_moves.append(move)
+        return self.rng.choice(best_moves)
+
+    async def minimax(self, state: tp.Any, depth: int, user_to_move: bool) -> int:
+        """
+        Returns value of a state for the user: 1 for a user win, -1 for an engine win, 0 for a draw or an unknown result.
+        Time complexity: O(b^depth) where b is the amount of legal moves.
+        """
+        if await self.game.is_terminal(state):
+            winner = await self.game.get_winner(state)
+            return 1 if winner == 1 else -1 if winner == -1 else 0
+        if depth <= 0:
+            return 0
+        values = [
+            await self.minimax(await self.game.add_move(state, move), depth - 1, not user_to_move)
+            for move in await self.game.get_legal_moves(state)
+        ]
+        return max(values) if user_to_move else min(values)
+
+    async def exhaustive(self):
+        """
+        Searches all user moves from positions reached after `job.first_move`, see module documentation.
+        """
+        seen: set[bytes] = set()
+        initial = await self.game.initial_state()
+        first = (await self.game.get_legal_moves(initial))[self.job.first_move]
+        stack = [(initial, [first], [])]  # Position with the user to move, user moves to try, line so far.
+        while stack:
+            state, moves, line = stack.pop()
+            for move in moves:
+                if len(seen) >= self.job.limit:
+                    self.outcome.complete = False
+                    return
+                after_user = await self.game.add_move(state, move)
+                user_line = [*line, str(move)]
+                if await self.game.is_terminal(after_user):
+                    await self.finish(after_user, user_line)
+                    continue
+                try:
+                    reply = await self.engine_move(after_user, user_line)
+                except Exception as error:
+                    self.outcome.errors.append(f"{error!r}, moves: {' '.join(user_line)}")
+                    continue
+                after_engine = await self.game.add_move(after_user, reply)
+                engine_line = [*user_line, str(reply)]
+                if await self.game.is_terminal(after_engine):
+                    await self.finish(after_engine, engine_line)
+                    continue
+                if (key := await self.game.encode_state(after_engine)) in seen:
+                    continue
+                seen.add(key)
+                stack.append((after_engine, await self.game.get_legal_moves(after_engine), engine_line))
+
+    async def run(self) -> Outcome:
+        """
+        Plays all games of the job.
+        """
+        started = time.perf_counter()
+        if self.job.opponent == "exhaustive":
+            await self.exhaustive()
+        else:
+            choose = self.random_move if self.job.opponent == "random" else self.adversarial_move
+            for _ in range(self.job.games):
+                try:
+                    await self.play(choose)
+                except Exception as error:
+                    self.outcome.errors.append(repr(error))
+        self.outcome.seconds = time.perf_counter() - started
+        return self.outcome
+
+
+async def _run_job(job: Job) -> Outcome:
+    game = job.spec.create()
+    await game.warm_up()
+    return await Player(game, job).run()
+
+
+def run_job(job: Job) -> Outcome:
+    """
+    Entry point of worker processes: plays a job.
+    """
+    return asyncio.run(_run_job(job))
+
+
+async def plan(specs: list[GameSpec], args: argparse.Namespace) -> list[Job]:
+    """
+    Returns jobs of the tournament: per game and opponent, one per first user move for exhaustive search,
+    chunks of `--chunk` games otherwise.
+    """
+    jobs = []
+    seeds = random.Random(args.seed)
+    for spec in specs:
+        game = spec.create()
+        first_moves = len(await game.get_legal_moves(await game.initial_state()))
+        searching = "time_budget" in inspect.signature(type(game)).parameters
+        games = args.search_games if searching else args.games
+        base = Job(spec, "", limit=args.search_limit if searching else args.limit, depth=args.depth)
+        for opponent in args.opponents:
+            if opponent == "exhaustive":
+                jobs.extend(replace(base, opponent=opponent, first_move=index) for index in range(first_moves))
+                continue
+            for start in range(0, games, args.chunk):
+                jobs.append(replace(
+                    base, opponent=opponent, seed=seeds.getrandbits(64), games=min(args.chunk, games - start)
+                ))
+    return jobs
+
+
+def with_options(spec: GameSpec, options: dict[str, tp.Any]) -> GameSpec:
+    """
+    Returns `spec` with those of `options` its game class accepts as constructor arguments.
+    """
+    game_class = type(spec.create())
+    accepted = inspect.signature(game_class).parameters
+    return replace(spec, options={**spec.options, **{key: value for key, value in options.items() if key in accepted}})
+
+
+async def run(args: argparse.Namespace) -> int:
+    """
+    Runs the tournament as configured by command line arguments, prints the report.
+
+    Returns:
+        int: exit code, 1 if the engine lost a game or failed, 0 otherwise.
+    """
+    options: dict[str, tp.Any] = {"time_budget": SEARCH_TIME_BUDGET}
+    for option in args.option:
+        key, _, value = option.partition("=")
+        options[key] = ast.literal_eval(value)
+
+    specs = [with_options(spec, options) for spec in await discover()]
+    if args.only:
+        specs = select(specs, args.only)
+
+    jobs = await plan(specs, args)
+    outcomes: dict[tuple[str, str], Outcome] = {(spec.name, opponent): Outcome() for spec in specs for opponent in args.opponents}
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(run_job, job): job for job in jobs}
+        for future in as_completed(futures):
+            job = futures[future]
+            outcomes[job.spec.name, job.opponent].merge(future.result())
+    elapsed = time.perf_counter() - started
+
+    print(f"{'game':<14} {'opponent':<12} {'games':>9} {'wins':>9} {'draws':>9} {'losses':>7} {'errors':>7} "
+          f"{'games/s':>9} {'move p50':>9} {'move p99':>9}")
+    failed = False
+    for (name, opponent), outcome in outcomes.items():
+        latency = summarize(outcome.latencies) if outcome.latencies else None
+        rate = outcome.games / outcome.seconds if outcome.seconds else 0.0
+        print(
+            f"{name:<14} {opponent:<12} {outcome.games:>9} {outcome.wins:>9} {outcome.draws:>9} "
+            f"{len(outcome.losses):>7} {len(outcome.errors):>7} {rate:>9.1f} "
+            f"{format_duration(latency.p50) if latency else '-':>9} {format_duration(latency.p99) if latency else '-':>9}"
+            + ("" if outcome.complete else "  (position limit reached)")
+        )
+        for line in outcome.losses[: args.show]:
+            print(f"  LOSS: {' '.join(line)}")
+        for error in outcome.errors[: args.show]:
+            print(f"  ERROR: {error}")
+        failed = failed or bool(outcome.losses or outcome.errors)
+    print(f"{len(jobs)} jobs in {elapsed:.1f} s")
+    return 1 if failed else 0
+
+
+def parse_args(argv: tp.Optional[list[str]] = None) -> argparse.Namespace:
+    """
+    Parses command line arguments, see `python3 src/tournament.py --help`.
+    """
+    parser = argparse.ArgumentParser(description="Play game engines against opponents to verify they never lose.")
+    parser.add_argument("--only", nargs="*", help="names or classes of games to play, all by default")
+    parser.add_argument("--opponents", nargs="*", choices=OPPONENTS, default=list(OPPONENTS), help="opponents to play")
+    parser.add_argument("--games", type=int, default=1000, help="games per game and sampling opponent")
+    parser.add_argument("--chunk", type=int, default=100, help="games per job")
+    parser.add_argument("--limit", type=int, default=100_000, help="positions per exhaustive search job")
+    parser.add_argument("--search-games", type=int, default=100,
+                        help="games per sampling opponent of games with a searching engine")
+    parser.add_argument("--search-limit", type=int, default=100,
+                        help="positions per exhaustive search job of games with a searching engine")
+    parser.add_argument("--depth", type=int, default=3, help="search depth of the adversarial opponent in plies")
+    parser.add_argument("--seed", type=int, default=0, help="seed of opponents' choices")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes, one per CPU by default")
+    parser.add_argument("--option", action="append", default=[],
+                        help="constructor argument of games accepting it, e.g. time_budget=0.05")
+    parser.add_argument("--show", type=int, default=10, help="losses and errors printed per game and opponent")
+    return parser.parse_args(argv)
+
+
+# Standard Python technique to check if script is run directly.
+# Link: https://docs.python.org/3/library/__main__.html
+if __name__ == "__main__":
+    sys.exit(asyncio.run(run(parse_args())))
@@ -0,0 +1,220 @@
+"""
+               GLWT(Good Luck With That) Public License
+                 Copyright (c) Everyone, except Author
+
+Everyone is permitted to copy, distribute, modify, merge, sell, publish,
+sublicense or whatever they want with this software but at their OWN RISK.
+
+                            Preamble
+
+The author has absolutely no clue what the code in this project does.
+It might just work or not, there is no third option.
+
+
+                GOOD LUCK WITH THAT PUBLIC LICENSE
+   TERMS AND CONDITIONS FOR COPYING, DISTRIBUTION, AND MODIFICATION
+
+  0. You just DO WHATEVER YOU WANT TO as long as you NEVER LEAVE A
+TRACE TO TRACK THE AUTHOR of the original product to blame for or hold
+responsible.
+
+IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+
+Good luck and Godspeed.
+"""
+
+"""
+Module `src/webhook.py` serves Telegram updates through a webhook, optionally in several worker processes.
+---
+Polling (`Dispatcher.start_polling`) receives all updates through one long-poll loop in one process,
+so the bot never uses more than a single core. With a webhook Telegram sends every update as an HTTPS POST request.
+Link: https://core.telegram.org/bots/api#setwebhook
+
+It utilizes `aiohttp` web server and aiogram's webhook integration:
+Link: https://docs.aiohttp.org/en/stable/web.html
+Link: https://docs.aiogram.dev/en/v3.22.0/dispatcher/webhook.html
+
+    1. With a single worker, the bot itself listens on the public port (`build_worker_app`).
+
+    2. With several workers, the public port is served by a router process (`build_router_app`),
+        and every worker process runs its own bot and dispatcher behind a Unix socket.
+        The router reads the chat id of every update (`chat_id_of`) and forwards the update
+        to worker number `chat_id % workers`. So all updates of a chat are handled by the same worker,
+        and the worker's in-memory state (hot session cache, engine caches, per-chat locks) stays valid.
+        Link: https://en.wikipedia.org/wiki/Consistent_hashing
+        Until a worker has started (and warmed up its games), its updates are answered with 503 and Telegram retries them.
+        Workers do not share memory: each one keeps its own sessions (`SQLiteStorage` sessions may share one database file,
+        as chats never move between workers while the amount of workers stays the same).
+        Each one also paces its own messages, so the global rate limit must be split between workers
+        (see `src/outbound.py`, `src/main.py` does it).
+
+Typical usage example (see `src/main.py`):
+```
+app = build_worker_app(dp, bot, path="/webhook", secret="...")
+web.run_app(app, host="0.0.0.0", port=8080)
+```
+"""
+
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import typing as tp
+
+from aiohttp import ClientError, ClientSession, UnixConnector, web
+
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+
+logger = logging.getLogger(__name__)
+
+# Header with the secret token given to `setWebhook`, sent by Telegram with every update.
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+def chat_id_of(update: dict[str, tp.Any]) -> int:
+    """
+    Returns id of the chat an update belongs to, as used by aiogram's FSM.
+
+    Update holds `update_id` and exactly one event (message, callback_query, ...).
+    The chat is taken from the event, or from the message of a callback query.
+    Events without a chat (e.g. inline queries) use the id of the user instead.
+
+    Args:
+        update: update as sent by Telegram, decoded from JSON.
+
+    Returns:
+        int: chat id, or 0 if the update has neither chat nor user.
+    Time complexity: O(1)
+    """
+    for name, event in update.items():
+        if name == "update_id" or not isinstance(event, dict):
+            continue
+        chat = event.get("chat") or (event.get("message") or {}).get("chat")
+        if chat is not None:
+            return chat["id"]
+        user = event.get("from") or event.get("user")
+        if user is not None:
+            return user["id"]
+    return 0
+
+
+def socket_paths(workers: int, directory: tp.Optional[str] = None) -> list[str]:
+    """
+    Returns paths of Unix sockets of worker processes, unique for this router process.
+    """
+    directory = directory or tempfile.gettempdir()
+    return [os.path.join(directory, f"neverlose-{os.getpid()}-{i}.sock") for i in range(workers)]
+
+
+def build_worker_app(dp: Dispatcher, bot: Bot, path: str, secret: tp.Optional[str] = None) -> web.Application:
+    """
+    Returns aiohttp application feeding updates posted to `path` into the dispatcher.
+
+    Updates are answered immediately and handled in background tasks.
+    Dispatcher startup and shutdown handlers run on application startup and shutdown.
+
+    Args:
+        dp: dispatcher with all handlers.
+        bot: bot receiving the updates.
+        path: URL path of the webhook.
+        secret: expected secret token of requests, None when requests come from the router.
+
+    Returns:
+        web.Application: application to be run with `web.run_app`.
+    """
+    app = web.Application()
+    SimpleRequestHandler(dispatcher=dp, bot=bot, secret_token=secret).register(app, path=path)
+    setup_application(app, dp, bot=bot)
+    return app
+
+
+def build_router_app(sockets: list[str], path: str, secret: tp.Optional[str] = None) -> web.Application:
+    """
+    Returns aiohttp application forwarding every update posted to `path` to the worker handling its chat.
+
+    Args:
+        sockets: Unix socket paths of workers, see `socket_paths`.
+        path: URL path of the webhook, same for the router and the workers.
+        secret: expected secret token of requests (see `setWebhook`), None to accept any request.
+
+    Returns:
+        web.Application: application to be run with `web.run_app`.
+    Time complexity: O(n) per update where n is size of the update, to decode it.
+    """
+    # One client session (pool of keep-alive connections) per worker.
+    clients: list[ClientSession] = []
+
+    async def open_clients(app: web.Application):
+        clients.extend(ClientSession(connector=UnixConnector(path=socket)) for socket in sockets)
+
+    async def close_clients(app: web.Application):
+        for client in clients:
+            await client.close()
+
+    async def route(request: web.Request) -> web.Response:
+        if secret is not None and request.headers.get(SECRET_HEADER) != secret:
+            return web.Response(status=401)
+        body = await request.read()
+        try:
+            worker = chat_id_of(json.loads(body)) % len(clients)
+        except (ValueError, TypeError, KeyError):
+            return web.Response(status=400)
+
+        # Host part of the URL is ignored, the connection goes to the worker's socket.
+        try:
+            async with clients[worker].post(
+                f"http://worker{path}", data=body, headers={"Content-Type": "application/json"}
+            ) as response:
+                return web.Response(status=response.status, body=await response.read(), content_type=response.content_type)
+        except ClientError:
+            # Worker is not running (yet). Telegram retries updates answered with an error.
+            logger.exception("Worker %d is unavailable", worker)
+            return web.Response(status=503)
+
+    app = web.Application()
+    app.router.add_post(path, route)
+    app.on_startup.append(open_clients)
+    app.on_cleanup.append(close_clients)
+    return app
+
+
+def start_workers(target: tp.Callable[[int, str], None], sockets: list[str]) -> list[multiprocessing.Process]:
+    """
+    Starts one worker process per socket, calling `target(index, socket)` in each of them.
+    `index` is the worker's position in `sockets`, e.g. to give every worker its own metrics port.
+
+    `target` must be a module level function, as processes are started with "spawn",
+    which imports the module anew in every worker. Link: https://docs.python.org/3/library/multiprocessing.html#contexts-and-start-methods
+
+    Returns:
+        list[multiprocessing.Process]: started processes, to be passed to `stop_workers`.
+    """
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=target, args=(i, socket), name=f"worker-{i}") for i, socket in enumerate(sockets)]
+    for process in processes:
+        process.start()
+    return processes
+
+
+def stop_workers(processes: list[multiprocessing.Process], sockets: list[str], timeout: float = 30.0):
+    """
+    Asks worker processes to shut down gracefully (SIGTERM), waits for them and removes their sockets.
+    Workers flush their sessions on shutdown, workers still running after `timeout` seconds are killed.
+    """
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        process.join(timeout)
+        if process.is_alive():
+            logger.warning("Worker %s did not stop in time, killing it", process.name)
+            process.kill()
+    for socket in sockets:
+        try:
+            os.unlink(socket)
+        except FileNotFoundError:
+            pass
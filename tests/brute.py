@@ -0,0 +1,102 @@
+"""
+               GLWT(Good Luck With That) Public License
+                 Copyright (c) Everyone, except Author
+
+Everyone is permitted to copy, distribute, modify, merge, sell, publish,
+sublicense or whatever they want with this software but at their OWN RISK.
+
+                            Preamble
+
+The author has absolutely no clue what the code in this project does.
+It might just work or not, there is no third option.
+
+
+                GOOD LUCK WITH THAT PUBLIC LICENSE
+   TERMS AND CONDITIONS FOR COPYING, DISTRIBUTION, AND MODIFICATION
+
+  0. You just DO WHATEVER YOU WANT TO as long as you NEVER LEAVE A
+TRACE TO TRACK THE AUTHOR of the original product to blame for or hold
+responsible.
+
+IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+
+Good luck and Godspeed.
+"""
+
+"""
+Brute force solver of m,n,k-games (Tic Tac Toe included), the reference the engines are tested against.
+It shares nothing with the engines but the board layout: cell `r * cols + c` is bit number `r * cols + c`.
+"""
+
+import functools
+
+
+# Exact minimax values of m,n,k-game positions, computed by plain exhaustive search.
+class Solver:
+    """
+    Exact minimax values of m,n,k-game positions, computed by plain exhaustive search.
+    X moves first, so X is to move when both players placed the same amount of symbols.
+    """
+
+    def __init__(self, rows: int, cols: int, k: int):
+        self.cells = rows * cols
+        self.lines = []
+        for r in range(rows):
+            for c in range(cols):
+                for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    segment = [(r + dr * i, c + dc * i) for i in range(k)]
+                    if all(0 <= sr < rows and 0 <= sc < cols for sr, sc in segment):
+                        self.lines.append(sum(1 << sr * cols + sc for sr, sc in segment))
+        self.value = functools.cache(self._value)
+
+    def won(self, board: int) -> bool:
+        return any(board & line == line for line in self.lines)
+
+    def empty(self, x: int, o: int) -> list[int]:
+        return [cell for cell in range(self.cells) if not (x | o) >> cell & 1]
+
+    def terminal(self, x: int, o: int) -> bool:
+        return self.won(x) or self.won(o) or not self.empty(x, o)
+
+    def play(self, x: int, o: int, cell: int) -> tuple[int, int]:
+        """
+        Returns the position after the player to move takes `cell`.
+        """
+        if x.bit_count() == o.bit_count():
+            return x | 1 << cell, o
+        return x, o | 1 << cell
+
+    def _value(self, x: int, o: int) -> int:
+        """
+        Returns the value for the player to move: 1 - win, 0 - draw, -1 - loss.
+        """
+        if self.won(o if x.bit_count() == o.bit_count() else x):  # The previous move won.
+            return -1
+        moves = self.empty(x, o)
+        if not moves:
+            return 0
+        return max(-self.value(*self.play(x, o, cell)) for cell in moves)
+
+    def best_moves(self, x: int, o: int) -> set[int]:
+        """
+        Returns all moves keeping the value of a non-terminal position.
+        """
+        best = self.value(x, o)
+        return {cell for cell in self.empty(x, o) if -self.value(*self.play(x, o, cell)) == best}
+
+    def reachable(self) -> list[tuple[int, int]]:
+        """
+        Returns all non-terminal positions reachable from the empty board, in order of discovery.
+        """
+        seen = {(0, 0)}
+        order = [(0, 0)]
+        for x, o in order:
+            for cell in self.empty(x, o):
+                after = self.play(x, o, cell)
+                if after not in seen and not self.terminal(*after):
+                    seen.add(after)
+                    order.append(after)
+        return order
@@ -0,0 +1,65 @@
+"""
+               GLWT(Good Luck With That) Public License
+                 Copyright (c) Everyone, except Author
+
+Everyone is permitted to copy, distribute, modify, merge, sell, publish,
+sublicense or whatever they want with this software but at their OWN RISK.
+
+                            Preamble
+
+The author has absolutely no clue what the code in this project does.
+It might just work or not, there is no third option.
+
+
+                GOOD LUCK WITH THAT PUBLIC LICENSE
+   TERMS AND CONDITIONS FOR COPYING, DISTRIBUTION, AND MODIFICATION
+
+  0. You just DO WHATEVER YOU WANT TO as long as you NEVER LEAVE A
+TRACE TO TRACK THE AUTHOR of the original product to blame for or hold
+responsible.
+
+IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+
+Good luck and Godspeed.
+"""
+
+"""
+Shared fixtures of the test suite.
+---
+Modules of the bot live in `src/` and import each other by plain names, as when the bot is started
+with `python3 src/main.py`, so `src/` is put on the import path here.
+
+Run from the repository root:
+```
+python -m pytest -q
+```
+"""
+
+import os
+import sys
+
+import pytest
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+sys.path.insert(0, SRC)
+
+# User id given admin rights by the `main` fixture.
+ADMIN_ID = 900
+
+
+@pytest.fixture(scope="session")
+def main():
+    """
+    The bot module itself, imported with a dummy token and without engine warm-up. Nothing is sent to Telegram.
+    User ADMIN_ID is an admin.
+    """
+    os.environ.setdefault("TOKEN", "123456:TEST")
+    os.environ.setdefault("WARM_UP", "0")
+    os.environ.setdefault("ADMIN_IDS", str(ADMIN_ID))
+    import main
+
+    yield main
+    main.engine.shutdown()
@@ -0,0 +1,110 @@
+"""
+               GLWT(Good Luck With That) Public License
+                 Copyright (c) Everyone, except Author
+
+Everyone is permitted to copy, distribute, modify, merge, sell, publish,
+sublicense or whatever they want with this software but at their OWN RISK.
+
+                            Preamble
+
+The author has absolutely no clue what the code in this project does.
+It might just work or not, there is no third option.
+
+
+                GOOD LUCK WITH THAT PUBLIC LICENSE
+   TERMS AND CONDITIONS FOR COPYING, DISTRIBUTION, AND MODIFICATION
+
+  0. You just DO WHATEVER YOU WANT TO as long as you NEVER LEAVE A
+TRACE TO TRACK THE AUTHOR of the original product to blame for or hold
+responsible.
+
+IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+
+Good luck and Godspeed.
+"""
+
+"""
+Fake Telegram objects for the tests: a bot session answering every request without network, and update factories.
+"""
+
+import datetime
+import itertools
+import typing as tp
+
+from typing_extensions import override
+
+from aiogram import Bot
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import EditMessageText, SendMessage, TelegramMethod
+from aiogram.types import CallbackQuery, Chat, Message, Update, User
+
+_ids = itertools.count(1000)
+
+
+# Bot session recording requests instead of sending them.
+class FakeSession(BaseSession):
+    """
+    Bot session recording requests instead of sending them.
+    Sent and edited messages are answered with a new message, everything else with True.
+
+    Attributes:
+        calls: requests made through the session, in order.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.calls: list[TelegramMethod] = []
+
+    @override
+    async def make_request(self, bot: Bot, method: TelegramMethod, timeout: tp.Optional[int] = None) -> tp.Any:
+        self.calls.append(method)
+        if isinstance(method, (SendMessage, EditMessageText)):
+            chat = Chat(id=tp.cast(int, method.chat_id or 1), type="private")
+            return Message(message_id=next(_ids), date=datetime.datetime.now(), chat=chat, text=method.text)
+        return True
+
+    @override
+    async def stream_content(self, *args, **kwargs):
+        raise NotImplementedError
+
+    @override
+    async def close(self):
+        pass
+
+    def texts(self, chat_id: int) -> list[str]:
+        """
+        Returns texts of messages sent to the chat.
+        """
+        return [call.text for call in self.calls if isinstance(call, SendMessage) and call.chat_id == chat_id]
+
+
+def fake_bot() -> tuple[Bot, FakeSession]:
+    """
+    Returns a bot with a dummy token talking to a FakeSession, and the session.
+    """
+    session = FakeSession()
+    return Bot("123456:TEST", session=session), session
+
+
+def message_update(chat_id: int, text: str) -> Update:
+    """
+    Returns an update with a text message from a private chat, the user id equals the chat id.
+    """
+    user = User(id=chat_id, is_bot=False, first_name=f"User{chat_id}")
+    chat = Chat(id=chat_id, type="private")
+    message = Message(message_id=next(_ids), date=datetime.datetime.now(), chat=chat, from_user=user, text=text)
+    return Update(update_id=next(_ids), message=message)
+
+
+def callback_update(chat_id: int, data: str, message_id: int = 1) -> Update:
+    """
+    Returns an update with a button press on the message of a private chat, the user id equals the chat id.
+    """
+    user = User(id=chat_id, is_bot=False, first_name=f"User{chat_id}")
+    chat = Chat(id=chat_id, type="private")
+    message = Message(message_id=message_id, date=datetime.datetime.now(), chat=chat, from_user=user, text="")
+    query = CallbackQuery(id=str(next(_ids)), from_user=user, chat_instance="chat", message=message, data=data)
+    return Update(update_id=next(_ids), callback_query=query)
@@ -0,0 +1,75 @@
+"""
+               GLWT(Good Luck With That) Public License
+                 Copyright (c) Everyone, except Author
+
+Everyone is permitted to copy, distribute, modify, merge, sell, publish,
+sublicense or whatever they want with this software but at their OWN RISK.
+
+                            Preamble
+
+The author has absolutely no clue what the code in this project does.
+It might just work or not, there is no third option.
+
+
+                GOOD LUCK WITH THAT PUBLIC LICENSE
+   TERMS AND CONDITIONS FOR COPYING, DISTRIBUTION, AND MODIFICATION
+
+  0. You just DO WHATEVER YOU WANT TO as long as you NEVER LEAVE A
+TRACE TO TRACK THE AUTHOR of the original product to blame for or hold
+responsible.
+
+IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+
+Good luck and Godspeed.
+"""
+
+"""
+Tests of `src/admission.py` together with `src/sequencer.py`: a chat flooding the bot must not starve other chats.
+"""
+
+import asyncio
+
+from aiogram import Dispatcher
+from aiogram.types import Message
+
+from admission import AdmissionController, BUSY_TEXT
+from fakes import fake_bot, message_update
+from sequencer import ChatSequencer
+
+
+def test_main_registers_sequencer_outside_admission(main):
+    middlewares = list(main.dp.update.outer_middleware)
+    assert middlewares.index(main.sequencer) < middlewares.index(main.admission)
+
+
+def test_flooding_chat_does_not_starve_other_chats():
+    async def scenario():
+        bot, session = fake_bot()
+        dp = Dispatcher()
+        dp.update.outer_middleware(ChatSequencer())
+        admission = AdmissionController(max_in_flight=2, max_pending=0)
+        dp.update.outer_middleware(admission)
+        release = asyncio.Event()
+        handled: list[tuple[int, str]] = []
+
+        @dp.message()
+        async def slow_handler(message: Message):
+            handled.append((message.chat.id, message.text or ""))
+            if message.chat.id == 1:
+                await release.wait()
+
+        flood = [asyncio.create_task(dp.feed_update(bot, message_update(1, f"spam {i}"))) for i in range(20)]
+        await asyncio.sleep(0.01)
+        await asyncio.wait_for(dp.feed_update(bot, message_update(2, "move")), timeout=1)
+        assert (2, "move") in handled
+        assert BUSY_TEXT not in session.texts(2)
+
+        release.set()
+        await asyncio.gather(*flood)
+        assert admission.shed == 0
+        assert [text for chat_id, text in handled if chat_id == 1] == [f"spam {i}" for i in range(20)]
+
+    asyncio.run(scenario())
@@ -0,0 +1,60 @@
+"""
+               GLWT(Good Luck With That) Public License
+                 Copyright (c) Everyone, except Author
+
+Everyone is permitted to copy, distribute, modify, merge, sell, publish,
+sublicense or whatever they want with this software but at their OWN RISK.
+
+                            Preamble
+
+The author has absolutely no clue what the code in this project does.
+It might just work or not, there is no third option.
+
+
+                GOOD LUCK WITH THAT PUBLIC LICENSE
+   TERMS AND CONDITIONS FOR COPYING, DISTRIBUTION, AND MODIFICATION
+
+  0. You just DO WHATEVER YOU WANT TO as long as you NEVER LEAVE A
+TRACE TO TRACK THE AUTHOR of the original product to blame for or hold
+responsible.
+
+IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+
+Good luck and Godspeed.
+"""
+
+"""
+Tests of `src/bench.py`: extra corpora are valid states of discovered games and are measured separately.
+"""
+
+import asyncio
+
+from bench import EXTRA_CORPORA, bench_game
+from registry import discover
+
+
+def test_extra_corpora_decode():
+    async def scenario():
+        specs = {spec.name: spec for spec in await discover()}
+        for name, corpora in EXTRA_CORPORA.items():
+            game = specs[name].create()
+            for corpus in corpora.values():
+                for data in corpus:
+                    state = await game.decode_state(data)
+                    assert await game.encode_state(state) == data
+                    assert not await game.is_terminal(state)
+
+    asyncio.run(scenario())
+
+
+def test_nim_is_measured_on_large_piles():
+    async def scenario():
+        nim = next(spec for spec in await discover() if spec.name == "Nim")
+        results = await bench_game(nim, seed=0, corpus_size=20, min_time=0, min_calls=1)
+        assert "get_legal_moves" in results
+        assert "get_legal_moves[large piles]" in results
+
+    asyncio.run(scenario())
@@ -0,0 +1,128 @@
+"""
+               GLWT(Good Luck With That) Public License
+                 Copyright (c) Everyone, except Author
+
+Everyone is permitted to copy, distribute, modify, merge, sell, publish,
+sublicense or whatever they want with this software but at their OWN RISK.
+
+                            Preamble
+
+The author has absolutely no clue what the code in this project does.
+It might just work or not, there is no third option.
+
+
+                GOOD LUCK WITH THAT PUBLIC LICENSE
+   TERMS AND CONDITIONS FOR COPYING, DISTRIBUTION, AND MODIFICATION
+
+  0. You just DO WHATEVER YOU WANT TO as long as you NEVER LEAVE A
+TRACE TO TRACK THE AUTHOR of the original product to blame for or hold
+responsible.
+
+IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+
+Good luck and Godspeed.
+"""
+
+"""
+Tests of `src/engine.py`: engine calls running concurrently on a shared game instance.
+"""
+
+import asyncio
+import time
+
+from brute import Solver
+from engine import STATS_INTERVAL, EngineRunner, EngineSettings
+from games.mnk import MNKGame, MNKState
+from games.tictactoe import XO
+
+
+def opening(game: MNKGame, cells: list[int]) -> MNKState:
+    """
+    Returns the position after `cells` were played in turn, X first.
+    """
+    x = sum(1 << cell for cell in cells[::2])
+    o = sum(1 << cell for cell in cells[1::2])
+    return MNKState(x=x, o=o, turn=XO.X if len(cells) % 2 == 0 else XO.O)
+
+
+OPENINGS = [[], [0], [4], [0, 4], [1, 5], [5, 6, 9], [0, 5, 10], [3, 6, 12, 9]]
+
+
+def test_thread_searches_keep_their_own_deadline():
+    budget = 0.2
+    game = MNKGame(time_budget=budget, table_bits=12)
+    runner = EngineRunner(default=EngineSettings(executor="thread", workers=4))
+
+    async def scenario():
+        states = [opening(game, cells) for cells in OPENINGS]
+        started = time.perf_counter()
+        moves = await asyncio.gather(*(runner.generate_best_move(game, state) for state in states))
+        elapsed = time.perf_counter() - started
+        for state, move in zip(states, moves):
+            assert move in await game.get_legal_moves(state)
+        # Two rounds of four searches, each bounded by its own budget (plus one depth 1 iteration).
+        assert elapsed < 2 * budget + 1.0
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        runner.shutdown()
+
+
+SOLVER = Solver(3, 3, 3)
+
+
+def test_thread_searches_play_optimal_moves():
+    async def scenario():
+        runner = EngineRunner(default=EngineSettings(executor="thread", workers=4))
+        game = MNKGame(rows=3, cols=3, k=3, time_budget=30.0, table_bits=12)
+        states = [opening(game, cells) for cells in ([], [4], [0], [0, 4], [1, 4], [0, 4, 8], [4, 0, 8], [1, 0, 3])]
+        try:
+            moves = await asyncio.gather(*(runner.generate_best_move(game, state) for state in states))
+        finally:
+            runner.shutdown()
+        for state, move in zip(states, moves):
+            assert move in SOLVER.best_moves(state.x, state.o)
+
+    asyncio.run(scenario())
+
+
+def test_process_engine_stats_are_summed_without_calls():
+    async def scenario():
+        game = MNKGame(time_budget=0.05, table_bits=10)
+        runner = EngineRunner(default=EngineSettings(executor="process", workers=2))
+        try:
+            await runner.warm_up(game)
+            warm = await runner.engine_stats(game)
+            # A worker done warming up may answer the pings of both, the other one reports later.
+            copies = warm["copies"]
+            assert copies in (1, 2)
+            assert warm["table_slots"] == copies * 1024
+            assert warm["searches"] == copies  # Every worker searched the empty board while warming up.
+
+            await asyncio.sleep(STATS_INTERVAL)
+            await runner.generate_best_move(game, await game.initial_state())
+            assert (await runner.engine_stats(game))["searches"] > warm["searches"]  # Reported along with the move.
+        finally:
+            runner.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_shared_engine_stats_are_read_directly():
+    async def scenario():
+        game = MNKGame(time_budget=0.05, table_bits=10)
+        runner = EngineRunner(default=EngineSettings(executor="thread", workers=2))
+        try:
+            await runner.generate_best_move(game, await game.initial_state())
+            stats = await runner.engine_stats(game)
+        finally:
+            runner.shutdown()
+        assert stats["copies"] == 1
+        assert stats["searches"] == 1
+        assert stats["search_nodes"] > 0
+
+    asyncio.run(scenario())
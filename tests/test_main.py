@@ -0,0 +1,78 @@
+"""
+               GLWT(Good Luck With That) Public License
+                 Copyright (c) Everyone, except Author
+
+Everyone is permitted to copy, distribute, modify, merge, sell, publish,
+sublicense or whatever they want with this software but at their OWN RISK.
+
+                            Preamble
+
+The author has absolutely no clue what the code in this project does.
+It might just work or not, there is no third option.
+
+
+                GOOD LUCK WITH THAT PUBLIC LICENSE
+   TERMS AND CONDITIONS FOR COPYING, DISTRIBUTION, AND MODIFICATION
+
+  0. You just DO WHATEVER YOU WANT TO as long as you NEVER LEAVE A
+TRACE TO TRACK THE AUTHOR of the original product to blame for or hold
+responsible.
+
+IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+
+Good luck and Godspeed.
+"""
+
+"""
+Tests of the bot's handlers in `src/main.py`, fed with fake updates.
+"""
+
+import asyncio
+
+from fakes import fake_bot, message_update
+
+EXPIRED_TEXT = "Your game has expired."
+
+
+def test_new_user_without_start_is_not_answered(main):
+    async def scenario():
+        bot, session = fake_bot()
+        await main.dp.feed_update(bot, message_update(501, "hello"))
+        assert session.texts(501) == []
+
+    asyncio.run(scenario())
+
+
+def test_expired_game_is_reported_once(main, monkeypatch):
+    async def scenario():
+        bot, session = fake_bot()
+        await main.dp.feed_update(bot, message_update(502, "/start"))
+        await main.dp.feed_update(bot, message_update(502, "Nim"))
+        monkeypatch.setattr(main.storage, "ttl", 0.05)
+        await asyncio.sleep(0.1)
+
+        await main.dp.feed_update(bot, message_update(502, "1 1"))
+        assert EXPIRED_TEXT in session.texts(502)[-1]
+        monkeypatch.undo()
+
+        await main.dp.feed_update(bot, message_update(502, "/start"))
+        await main.dp.feed_update(bot, message_update(502, "no such game"))
+        assert all(EXPIRED_TEXT not in text for text in session.texts(502)[-2:])
+
+    asyncio.run(scenario())
+
+
+def test_expired_menu_is_not_reported_as_game(main, monkeypatch):
+    async def scenario():
+        bot, session = fake_bot()
+        await main.dp.feed_update(bot, message_update(503, "/start"))
+        monkeypatch.setattr(main.storage, "ttl", 0.05)
+        await asyncio.sleep(0.1)
+
+        await main.dp.feed_update(bot, message_update(503, "Nim"))
+        assert EXPIRED_TEXT not in session.texts(503)[-1]
+
+    asyncio.run(scenario())
@@ -0,0 +1,77 @@
+"""
+               GLWT(Good Luck With That) Public License
+                 Copyright (c) Everyone, except Author
+
+Everyone is permitted to copy, distribute, modify, merge, sell, publish,
+sublicense or whatever they want with this software but at their OWN RISK.
+
+                            Preamble
+
+The author has absolutely no clue what the code in this project does.
+It might just work or not, there is no third option.
+
+
+                GOOD LUCK WITH THAT PUBLIC LICENSE
+   TERMS AND CONDITIONS FOR COPYING, DISTRIBUTION, AND MODIFICATION
+
+  0. You just DO WHATEVER YOU WANT TO as long as you NEVER LEAVE A
+TRACE TO TRACK THE AUTHOR of the original product to blame for or hold
+responsible.
+
+IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+
+Good luck and Godspeed.
+"""
+
+"""
+Tests of `src/metrics.py`: counters and histograms updated by several threads at once.
+"""
+
+import sys
+import threading
+
+from metrics import Counter, Histogram
+
+THREADS = 8
+UPDATES = 20_000
+
+
+def run_threads(target) -> None:
+    """
+    Calls `target` UPDATES times in each of THREADS threads, switching threads as often as the interpreter can.
+    """
+    barrier = threading.Barrier(THREADS)
+
+    def run():
+        barrier.wait()
+        for _ in range(UPDATES):
+            target()
+
+    threads = [threading.Thread(target=run) for _ in range(THREADS)]
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+
+def test_counter_keeps_increments_of_all_threads():
+    counter = Counter("test_total", "Test.", labels=("kind",))
+    run_threads(lambda: counter.inc("a"))
+    assert counter.render()[-1] == f'test_total{{kind="a"}} {THREADS * UPDATES}'
+
+
+def test_histogram_series_stay_consistent_across_threads():
+    histogram = Histogram("test_seconds", "Test.", buckets=(0.5,))
+    run_threads(lambda: histogram.observe(0.25))
+    lines = histogram.render()
+    assert f'test_seconds_bucket{{le="+Inf"}} {THREADS * UPDATES}' in lines
+    assert f"test_seconds_count {THREADS * UPDATES}" in lines
+    assert f"test_seconds_sum {THREADS * UPDATES * 0.25:g}" in lines
@@ -0,0 +1,84 @@
+"""
+               GLWT(Good Luck With That) Public License
+                 Copyright (c) Everyone, except Author
+
+Everyone is permitted to copy, distribute, modify, merge, sell, publish,
+sublicense or whatever they want with this software but at their OWN RISK.
+
+                            Preamble
+
+The author has absolutely no clue what the code in this project does.
+It might just work or not, there is no third option.
+
+
+                GOOD LUCK WITH THAT PUBLIC LICENSE
+   TERMS AND CONDITIONS FOR COPYING, DISTRIBUTION, AND MODIFICATION
+
+  0. You just DO WHATEVER YOU WANT TO as long as you NEVER LEAVE A
+TRACE TO TRACK THE AUTHOR of the original product to blame for or hold
+responsible.
+
+IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+
+Good luck and Godspeed.
+"""
+
+"""
+Tests of `src/games/mnk.py`: moves of the engine against brute force.
+The time budget is large enough for every search to reach the end of the game, so every move must be optimal.
+"""
+
+import asyncio
+import random
+
+from brute import Solver
+from games.mnk import MNKGame, MNKState
+from games.tictactoe import XO
+
+# Seconds per move, never reached: searches of these boards finish long before.
+TIME_BUDGET = 60.0
+
+
+def state_of(x: int, o: int) -> MNKState:
+    return MNKState(x=x, o=o, turn=XO.X if x.bit_count() == o.bit_count() else XO.O)
+
+
+def check_moves(game: MNKGame, solver: Solver, positions: list[tuple[int, int]]) -> None:
+    async def scenario():
+        for x, o in positions:
+            move = await game.generate_best_move(state_of(x, o))
+            assert move in solver.best_moves(x, o), (x, o)
+
+    asyncio.run(scenario())
+
+
+def test_square_board_every_position():
+    # Square board: the transposition table shares entries between symmetric positions.
+    solver = Solver(3, 3, 3)
+    check_moves(MNKGame(3, 3, 3, time_budget=TIME_BUDGET, table_bits=14), solver, solver.reachable())
+
+
+def test_rectangular_board_sampled_positions():
+    # Rectangular board: no symmetries, X wins from the empty board.
+    solver = Solver(3, 4, 3)
+    assert solver.value(0, 0) == 1
+    check_moves(MNKGame(3, 4, 3, time_budget=TIME_BUDGET, table_bits=14), solver, solver.reachable()[::400])
+
+
+def test_default_board_late_positions():
+    # The board the bot plays: positions after random openings, few enough empty cells for brute force.
+    solver = Solver(4, 4, 4)
+    rng = random.Random(0)
+    positions = []
+    while len(positions) < 30:
+        x = o = 0
+        for _ in range(rng.randint(8, 10)):
+            x, o = solver.play(x, o, rng.choice(solver.empty(x, o)))
+            if solver.terminal(x, o):
+                break
+        else:
+            positions.append((x, o))
+    check_moves(MNKGame(time_budget=TIME_BUDGET, table_bits=14), solver, positions)
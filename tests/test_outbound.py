@@ -0,0 +1,105 @@
+"""
+               GLWT(Good Luck With That) Public License
+                 Copyright (c) Everyone, except Author
+
+Everyone is permitted to copy, distribute, modify, merge, sell, publish,
+sublicense or whatever they want with this software but at their OWN RISK.
+
+                            Preamble
+
+The author has absolutely no clue what the code in this project does.
+It might just work or not, there is no third option.
+
+
+                GOOD LUCK WITH THAT PUBLIC LICENSE
+   TERMS AND CONDITIONS FOR COPYING, DISTRIBUTION, AND MODIFICATION
+
+  0. You just DO WHATEVER YOU WANT TO as long as you NEVER LEAVE A
+TRACE TO TRACK THE AUTHOR of the original product to blame for or hold
+responsible.
+
+IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+
+Good luck and Godspeed.
+"""
+
+"""
+Tests of `src/outbound.py`: splitting the global rate limit between processes, and the order of a chat's requests.
+"""
+
+import asyncio
+import time
+import typing as tp
+
+from typing_extensions import override
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import TelegramMethod
+
+from fakes import FakeSession, fake_bot
+from outbound import OutboundLimiter, Rate
+
+
+# Bot session answering the first request with "429 Too Many Requests".
+class FloodSession(FakeSession):
+    @override
+    async def make_request(self, bot: Bot, method: TelegramMethod, timeout: tp.Optional[int] = None) -> tp.Any:
+        if not self.calls:
+            self.calls.append(method)
+            raise TelegramRetryAfter(method=method, message="Too Many Requests", retry_after=1)
+        return await super().make_request(bot, method, timeout)
+
+
+def test_share_splits_rate_and_burst():
+    assert Rate(30, burst=8).share(4) == Rate(7.5, burst=2)
+    assert Rate(30).share(3) == Rate(10)
+
+
+def test_limiter_paces_to_its_share_of_the_global_rate():
+    async def scenario():
+        bot, session = fake_bot()
+        limiter = OutboundLimiter(global_rate=Rate(40).share(2))
+        bot.session.middleware(limiter)
+        started = time.perf_counter()
+        await asyncio.gather(*(bot.send_message(chat_id, "hi") for chat_id in range(1, 7)))
+        elapsed = time.perf_counter() - started
+        limiter.close()
+        assert len(session.calls) == 6
+        assert elapsed >= 5 / 20 * 0.9  # 6 requests at 20 per second, the first one goes right away.
+
+    asyncio.run(scenario())
+
+
+def test_chat_requests_wait_for_a_retry_of_the_previous_one():
+    async def scenario():
+        session = FloodSession()
+        bot = Bot("123456:TEST", session=session)
+        limiter = OutboundLimiter(chat_rate=Rate(100, burst=10))
+        bot.session.middleware(limiter)
+        await asyncio.gather(bot.send_message(1, "first"), bot.send_message(1, "second"))
+        assert [call.text for call in session.calls] == ["first", "first", "second"]
+        assert limiter.stats() == {"sent": 3, "retried": 1, "waiting": 0, "in_flight": 0}
+        limiter.close()
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_request_frees_the_chat():
+    async def scenario():
+        bot, session = fake_bot()
+        limiter = OutboundLimiter(chat_rate=Rate(1, burst=1))
+        bot.session.middleware(limiter)
+        await bot.send_message(1, "first")
+        waiting = asyncio.create_task(bot.send_message(1, "cancelled"))
+        await asyncio.sleep(0.1)
+        waiting.cancel()
+        await bot.send_message(1, "last")
+        assert session.texts(1) == ["first", "last"]
+        assert limiter.stats()["in_flight"] == 0
+        limiter.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,80 @@
+"""
+               GLWT(Good Luck With That) Public License
+                 Copyright (c) Everyone, except Author
+
+Everyone is permitted to copy, distribute, modify, merge, sell, publish,
+sublicense or whatever they want with this software but at their OWN RISK.
+
+                            Preamble
+
+The author has absolutely no clue what the code in this project does.
+It might just work or not, there is no third option.
+
+
+                GOOD LUCK WITH THAT PUBLIC LICENSE
+   TERMS AND CONDITIONS FOR COPYING, DISTRIBUTION, AND MODIFICATION
+
+  0. You just DO WHATEVER YOU WANT TO as long as you NEVER LEAVE A
+TRACE TO TRACK THE AUTHOR of the original product to blame for or hold
+responsible.
+
+IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+
+Good luck and Godspeed.
+"""
+
+"""
+Tests of `src/profiling.py`: which handled updates end a capture limited by an amount of updates.
+"""
+
+import asyncio
+
+from conftest import ADMIN_ID
+from fakes import fake_bot, message_update
+from profiling import Profiler
+
+
+def test_profile_command_waits_for_a_later_update(main, monkeypatch, tmp_path):
+    async def scenario():
+        bot, session = fake_bot()
+        monkeypatch.setattr(main, "bot", bot)  # Summaries are sent by the module's bot.
+        monkeypatch.setattr(main.profiler, "directory", str(tmp_path))
+
+        await main.dp.feed_update(bot, message_update(ADMIN_ID, "/profile 10 1"))
+        assert main.profiler.running  # The command itself is not counted.
+
+        await main.dp.feed_update(bot, message_update(ADMIN_ID, "/start"))
+        assert not main.profiler.running
+        await asyncio.gather(*main.profile_tasks)
+        assert session.texts(ADMIN_ID)[-1].startswith("Profile saved to")
+
+    asyncio.run(scenario())
+
+
+def test_handlers_running_before_the_capture_are_not_counted(tmp_path):
+    async def scenario():
+        profiler = Profiler(directory=str(tmp_path))
+        release = asyncio.Event()
+
+        async def slow(event, data):
+            await release.wait()
+
+        async def fast(event, data):
+            pass
+
+        in_flight = asyncio.create_task(profiler(slow, None, {}))
+        await asyncio.sleep(0)
+        done = profiler.start(10, updates=1)
+        release.set()
+        await in_flight
+        assert profiler.running
+
+        await profiler(fast, None, {})
+        assert not profiler.running
+        path, summary = await done
+        assert path.startswith(str(tmp_path)) and summary
+
+    asyncio.run(scenario())
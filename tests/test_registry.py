@@ -0,0 +1,73 @@
+"""
+               GLWT(Good Luck With That) Public License
+                 Copyright (c) Everyone, except Author
+
+Everyone is permitted to copy, distribute, modify, merge, sell, publish,
+sublicense or whatever they want with this software but at their OWN RISK.
+
+                            Preamble
+
+The author has absolutely no clue what the code in this project does.
+It might just work or not, there is no third option.
+
+
+                GOOD LUCK WITH THAT PUBLIC LICENSE
+   TERMS AND CONDITIONS FOR COPYING, DISTRIBUTION, AND MODIFICATION
+
+  0. You just DO WHATEVER YOU WANT TO as long as you NEVER LEAVE A
+TRACE TO TRACK THE AUTHOR of the original product to blame for or hold
+responsible.
+
+IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+
+Good luck and Godspeed.
+"""
+
+"""
+Tests of `src/registry.py`: declared games must match the games they create.
+"""
+
+import asyncio
+import functools
+from dataclasses import replace
+
+import pytest
+
+from games.mnk import MNKGame
+from registry import GameRegistry, GameSpec
+
+
+def test_declared_games_match_their_specs(main):
+    async def scenario():
+        registry = GameRegistry(main.GAMES_TO_PLAY)
+        for spec, game in zip(main.GAMES_TO_PLAY, await registry.all()):
+            assert await game.name() == spec.name
+            assert await game.description() == spec.description
+
+    asyncio.run(scenario())
+
+
+def test_mismatched_name_is_rejected(main):
+    spec = replace(main.GAMES_TO_PLAY[0], name="Something else")
+    with pytest.raises(ValueError, match="name"):
+        asyncio.run(GameRegistry([spec]).get(spec.name))
+
+
+def test_description_is_filled_in_with_options_without_creating_the_game(monkeypatch):
+    created = []
+    original = MNKGame.__init__
+
+    @functools.wraps(original)
+    def init(self, *args, **kwargs):
+        created.append(self)
+        original(self, *args, **kwargs)
+
+    monkeypatch.setattr(MNKGame, "__init__", init)
+    spec = GameSpec("mnk3x4x3", "games.mnk:MNKGame", options={"rows": 3, "cols": 4, "k": 3})
+    assert spec.description == "Tic Tac Toe on a 3x4 board. First to place 3 in a line wins."
+    assert GameSpec("tictactoe4x4", "games.mnk:MNKGame").description.startswith("Tic Tac Toe on a 4x4 board.")
+    assert not created
+    assert asyncio.run(spec.create().description()) == spec.description
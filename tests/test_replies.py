@@ -0,0 +1,89 @@
+"""
+               GLWT(Good Luck With That) Public License
+                 Copyright (c) Everyone, except Author
+
+Everyone is permitted to copy, distribute, modify, merge, sell, publish,
+sublicense or whatever they want with this software but at their OWN RISK.
+
+                            Preamble
+
+The author has absolutely no clue what the code in this project does.
+It might just work or not, there is no third option.
+
+
+                GOOD LUCK WITH THAT PUBLIC LICENSE
+   TERMS AND CONDITIONS FOR COPYING, DISTRIBUTION, AND MODIFICATION
+
+  0. You just DO WHATEVER YOU WANT TO as long as you NEVER LEAVE A
+TRACE TO TRACK THE AUTHOR of the original product to blame for or hold
+responsible.
+
+IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+
+Good luck and Godspeed.
+"""
+
+"""
+Tests of `src/replies.py`: splitting joined replies into messages that fit the limit and are valid HTML.
+"""
+
+import html
+import re
+from html.parser import HTMLParser
+
+from replies import MESSAGE_LIMIT, SEPARATOR, _join
+
+
+# Checks that tags of an HTML text are balanced.
+class TagChecker(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.stack: list[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        self.stack.append(tag)
+
+    def handle_endtag(self, tag):
+        assert self.stack and self.stack.pop() == tag, f"unbalanced </{tag}>"
+
+
+def assert_valid(chunk: str) -> None:
+    assert 0 < len(chunk) <= MESSAGE_LIMIT
+    assert "&" not in re.sub(r"&#?\w+;", "", chunk), "entity cut"
+    assert "<" not in re.sub(r"<[^<>]*>", "", chunk), "tag cut"
+    checker = TagChecker()
+    checker.feed(chunk)
+    checker.close()
+    assert not checker.stack, f"unclosed {checker.stack}"
+
+
+def test_short_replies_are_joined():
+    assert _join(["Bot played: 4", "You lost."]) == ["Bot played: 4" + SEPARATOR + "You lost."]
+
+
+def test_replies_are_split_at_reply_boundaries():
+    texts = ["<b>" + "a" * 3000 + "</b>", "<i>" + "b" * 3000 + "</i>", "c"]
+    assert _join(texts) == [texts[0], texts[1] + SEPARATOR + texts[2]]
+
+
+def test_long_preformatted_reply_is_split_at_line_ends():
+    lines = [html.escape(f"{i:5d} <module> 'games/mnk.py' & more") for i in range(400)]
+    text = "Profile:\n<pre>" + "\n".join(lines) + "</pre>"
+    chunks = _join([text])
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert_valid(chunk)
+        assert "<pre>" in chunk
+    body = "\n".join(chunk.replace("<pre>", "").replace("</pre>", "") for chunk in chunks)
+    assert body == "Profile:\n" + "\n".join(lines)
+
+
+def test_long_line_is_never_cut_inside_markup():
+    text = "<code>" + "&lt;&gt;x" * 1000 + "</code>" + ' <a href="https://example.com/x">link</a>' * 200
+    chunks = _join([text])
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert_valid(chunk)
@@ -0,0 +1,100 @@
+"""
+               GLWT(Good Luck With That) Public License
+                 Copyright (c) Everyone, except Author
+
+Everyone is permitted to copy, distribute, modify, merge, sell, publish,
+sublicense or whatever they want with this software but at their OWN RISK.
+
+                            Preamble
+
+The author has absolutely no clue what the code in this project does.
+It might just work or not, there is no third option.
+
+
+                GOOD LUCK WITH THAT PUBLIC LICENSE
+   TERMS AND CONDITIONS FOR COPYING, DISTRIBUTION, AND MODIFICATION
+
+  0. You just DO WHATEVER YOU WANT TO as long as you NEVER LEAVE A
+TRACE TO TRACK THE AUTHOR of the original product to blame for or hold
+responsible.
+
+IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+
+Good luck and Godspeed.
+"""
+
+"""
+Tests of `src/session.py` and of `encode_state`/`decode_state` of every declared game:
+states reached by random playouts survive a round trip, data of no state is rejected.
+"""
+
+import asyncio
+import base64
+import random
+
+import pytest
+
+from registry import GameRegistry
+from session import GAME_KEY, STATE_KEY, pack_game, unpack_game
+
+# Random playouts per game, every state along a playout is checked.
+PLAYOUTS = 50
+
+
+async def playout_states(game, rng: random.Random) -> list:
+    """
+    Returns the states of a game played with random legal moves, from the initial state to the end.
+    """
+    states = [await game.initial_state()]
+    while not await game.is_terminal(states[-1]):
+        states.append(await game.add_move(states[-1], rng.choice(await game.get_legal_moves(states[-1]))))
+    return states
+
+
+def test_states_survive_round_trips(main):
+    async def scenario():
+        registry = GameRegistry(main.GAMES_TO_PLAY)
+        rng = random.Random(0)
+        for game in await registry.all():
+            for _ in range(PLAYOUTS):
+                for state in await playout_states(game, rng):
+                    assert await game.decode_state(await game.encode_state(state)) == state
+                    assert await unpack_game(registry, await pack_game(game, state)) == (game, state)
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize(
+    "name, data",
+    [
+        ("tictactoe", b""),
+        ("tictactoe", b"\xff\xff"),  # Index past the outcome table.
+        ("Nim", b"\x00\x01\x03\x05"),  # A pile is missing.
+        ("Nim", b"\x02\x01\x03\x05\x07"),  # Turn flag is neither 0 nor 1.
+        ("tictactoe4x4", b"\x00\x00\x00\x00"),  # A byte is missing.
+        ("tictactoe4x4", b"\x00\x00\x01\x00\x01"),  # Cell 0 holds both symbols.
+        ("tictactoe4x4", b"\x02\x00\x00\x00\x00"),  # Bits past the turn bit.
+    ],
+)
+def test_invalid_data_is_rejected(main, name, data):
+    async def scenario():
+        registry = GameRegistry(main.GAMES_TO_PLAY)
+        game = await registry.get(name)
+        with pytest.raises(ValueError):
+            await game.decode_state(data)
+        assert await unpack_game(registry, {GAME_KEY: name, STATE_KEY: base64.b64encode(data).decode("ascii")}) is None
+
+    asyncio.run(scenario())
+
+
+def test_sessions_without_a_valid_game_unpack_to_none(main):
+    async def scenario():
+        registry = GameRegistry(main.GAMES_TO_PLAY)
+        assert await unpack_game(registry, {}) is None
+        assert await unpack_game(registry, {GAME_KEY: "chess", STATE_KEY: "AAA="}) is None
+        assert await unpack_game(registry, {GAME_KEY: "tictactoe", STATE_KEY: "not base64!"}) is None
+
+    asyncio.run(scenario())
@@ -0,0 +1,201 @@
+"""
+               GLWT(Good Luck With That) Public License
+                 Copyright (c) Everyone, except Author
+
+Everyone is permitted to copy, distribute, modify, merge, sell, publish,
+sublicense or whatever they want with this software but at their OWN RISK.
+
+                            Preamble
+
+The author has absolutely no clue what the code in this project does.
+It might just work or not, there is no third option.
+
+
+                GOOD LUCK WITH THAT PUBLIC LICENSE
+   TERMS AND CONDITIONS FOR COPYING, DISTRIBUTION, AND MODIFICATION
+
+  0. You just DO WHATEVER YOU WANT TO as long as you NEVER LEAVE A
+TRACE TO TRACK THE AUTHOR of the original product to blame for or hold
+responsible.
+
+IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+
+Good luck and Godspeed.
+"""
+
+"""
+Tests of `src/storage.py`: session expiry and markers of expired sessions, write-behind flushes and the hot cache.
+"""
+
+import asyncio
+import typing as tp
+
+import pytest
+
+from aiogram.fsm.storage.base import StorageKey
+
+from storage import EXPIRED_STATE, ExpiringMemoryStorage, SQLiteStorage
+
+KEY = StorageKey(bot_id=1, chat_id=2, user_id=2)
+
+
+def sqlite_storage(tmp_path, **kwargs) -> SQLiteStorage:
+    return SQLiteStorage(str(tmp_path / "sessions.sqlite3"), **kwargs)
+
+
+@pytest.fixture(params=["sqlite", "memory"])
+def make_storage(request, tmp_path) -> tp.Callable[[float], SQLiteStorage | ExpiringMemoryStorage]:
+    """
+    Factory of expiring storages of both kinds, taking the TTL.
+    """
+    if request.param == "sqlite":
+        return lambda ttl: sqlite_storage(tmp_path, ttl=ttl)
+    return lambda ttl: ExpiringMemoryStorage(ttl=ttl)
+
+
+def test_lazy_expiry_leaves_marker_of_a_session_with_state(make_storage):
+    async def scenario():
+        storage = make_storage(0.05)
+        await storage.set_state(KEY, "Form:play_game")
+        await storage.set_data(KEY, {"game": "Nim"})
+        await asyncio.sleep(0.1)
+
+        assert await storage.get_state(KEY) is None
+        assert await storage.get_data(KEY) == {EXPIRED_STATE: "Form:play_game"}
+        assert storage.expired == 1
+
+        await storage.set_state(KEY, "Form:choose_game")  # Marker is dropped once the user is back.
+        assert await storage.get_data(KEY) == {}
+        await storage.close()
+
+    asyncio.run(scenario())
+
+
+def test_lazy_expiry_deletes_session_without_state(make_storage):
+    async def scenario():
+        storage = make_storage(0.05)
+        await storage.set_data(KEY, {"note": 1})
+        await asyncio.sleep(0.1)
+
+        assert await storage.get_state(KEY) is None
+        assert await storage.get_data(KEY) == {}
+        await storage.close()
+
+    asyncio.run(scenario())
+
+
+def test_lazy_expiry_of_a_marker_is_not_counted(make_storage):
+    async def scenario():
+        storage = make_storage(0.05)
+        await storage.set_state(KEY, "Form:play_game")
+        await asyncio.sleep(0.1)
+        assert await storage.get_data(KEY) == {EXPIRED_STATE: "Form:play_game"}
+
+        await asyncio.sleep(0.1)
+        assert await storage.get_data(KEY) == {}
+        assert storage.expired == 1
+        await storage.close()
+
+    asyncio.run(scenario())
+
+
+def test_expire_idle_marks_then_deletes(make_storage):
+    async def scenario():
+        storage = make_storage(0.05)
+        other = StorageKey(bot_id=1, chat_id=3, user_id=3)
+        await storage.set_state(KEY, "Form:play_game")
+        await storage.set_data(other, {"note": 1})
+        await asyncio.sleep(0.1)
+
+        assert await storage.expire_idle() == 2
+        assert await storage.get_data(KEY) == {EXPIRED_STATE: "Form:play_game"}
+        assert await storage.get_data(other) == {}
+
+        await asyncio.sleep(0.1)  # Markers expire after another TTL, without being counted as expired sessions.
+        assert await storage.expire_idle() == 0
+        assert await storage.get_data(KEY) == {}
+        assert storage.expired == 2
+        await storage.close()
+
+    asyncio.run(scenario())
+
+
+def test_sqlite_marker_survives_restart(tmp_path):
+    async def scenario():
+        storage = sqlite_storage(tmp_path, ttl=0.05)
+        await storage.set_state(KEY, "Form:play_game")
+        await storage.close()
+        await asyncio.sleep(0.1)
+
+        storage = sqlite_storage(tmp_path, ttl=0.05)
+        assert await storage.expire_idle() == 1
+        await storage.close()
+
+        storage = sqlite_storage(tmp_path, ttl=60)
+        assert await storage.get_state(KEY) is None
+        assert await storage.get_data(KEY) == {EXPIRED_STATE: "Form:play_game"}
+        await storage.close()
+
+    asyncio.run(scenario())
+
+
+def key_of(chat_id: int) -> StorageKey:
+    return StorageKey(bot_id=1, chat_id=chat_id, user_id=chat_id)
+
+
+def test_flush_writes_sessions_in_one_batch(tmp_path):
+    async def scenario():
+        storage = sqlite_storage(tmp_path, flush_interval=3600)
+        for chat_id in range(5):
+            await storage.set_state(key_of(chat_id), "Form:play_game")
+            await storage.set_data(key_of(chat_id), {"game": "Nim", "chat": chat_id})
+        assert storage.stats()["dirty"] == 5
+        await storage.flush()
+        assert storage.stats()["dirty"] == 0
+        assert storage.flushed == 5
+
+        reader = sqlite_storage(tmp_path)  # Reads the database, not the cache of the writer.
+        assert await reader.get_data(key_of(3)) == {"game": "Nim", "chat": 3}
+        assert await reader.get_state(key_of(3)) == "Form:play_game"
+        await reader.close()
+        await storage.close()
+
+    asyncio.run(scenario())
+
+
+def test_close_flushes_pending_writes(tmp_path):
+    async def scenario():
+        storage = sqlite_storage(tmp_path, flush_interval=3600)
+        await storage.set_data(KEY, {"game": "Nim"})
+        await storage.close()
+
+        storage = sqlite_storage(tmp_path)
+        assert await storage.get_data(KEY) == {"game": "Nim"}
+        await storage.set_data(KEY, {})  # Empty sessions are deleted.
+        await storage.close()
+
+        storage = sqlite_storage(tmp_path)
+        assert await storage.get_data(KEY) == {}
+        assert storage.misses == 1
+        await storage.close()
+
+    asyncio.run(scenario())
+
+
+def test_cache_stays_bounded_and_ordered(tmp_path):
+    async def scenario():
+        storage = sqlite_storage(tmp_path, cache_size=2, flush_interval=3600)
+        for chat_id in range(3):  # Session 0 is evicted from the cache, but is still dirty.
+            await storage.set_data(key_of(chat_id), {"chat": chat_id})
+        assert list(storage._cache) == [storage._key_builder.build(key_of(chat_id)) for chat_id in (1, 2)]
+
+        assert await storage.get_data(key_of(0)) == {"chat": 0}  # A hit from dirty sessions.
+        assert await storage.get_data(key_of(2)) == {"chat": 2}
+        assert storage.stats()["cached"] == 2
+        assert list(storage._cache) == [storage._key_builder.build(key_of(chat_id)) for chat_id in (0, 2)]
+        await storage.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,95 @@
+"""
+               GLWT(Good Luck With That) Public License
+                 Copyright (c) Everyone, except Author
+
+Everyone is permitted to copy, distribute, modify, merge, sell, publish,
+sublicense or whatever they want with this software but at their OWN RISK.
+
+                            Preamble
+
+The author has absolutely no clue what the code in this project does.
+It might just work or not, there is no third option.
+
+
+                GOOD LUCK WITH THAT PUBLIC LICENSE
+   TERMS AND CONDITIONS FOR COPYING, DISTRIBUTION, AND MODIFICATION
+
+  0. You just DO WHATEVER YOU WANT TO as long as you NEVER LEAVE A
+TRACE TO TRACK THE AUTHOR of the original product to blame for or hold
+responsible.
+
+IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+
+Good luck and Godspeed.
+"""
+
+"""
+Tests of `src/games/symmetry.py` for every square board size the games use (3x3 and 4x4),
+plus 5x5, whose bitboards span more than two 8 bit chunks.
+"""
+
+import random
+
+import pytest
+
+from games.symmetry import TRANSFORMS, square_symmetry
+
+SIZES = (3, 4, 5)
+
+# Random positions per board size.
+POSITIONS = 200
+
+
+def positions(size: int) -> list[tuple[int, int]]:
+    """
+    Returns random positions (crosses, circles) of a board, the empty board included.
+    """
+    rng = random.Random(size)
+    res = [(0, 0)]
+    for _ in range(POSITIONS):
+        cells = rng.sample(range(size * size), rng.randint(1, size * size))
+        half = rng.randint(0, len(cells))
+        res.append((sum(1 << i for i in cells[:half]), sum(1 << i for i in cells[half:])))
+    return res
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_transforms_move_cells_by_their_permutations(size):
+    sym = square_symmetry(size)
+    assert sym.permutations[0] == tuple(range(size * size))
+    assert len(set(sym.permutations)) == TRANSFORMS
+    for t in range(TRANSFORMS):
+        for cell in range(size * size):
+            assert sym.transform(1 << cell, t) == 1 << sym.permutations[t][cell]
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_restore_undoes_canonical(size):
+    sym = square_symmetry(size)
+    for position in positions(size):
+        canonical, t = sym.canonical(*position)
+        assert canonical == tuple(sym.transform(mask, t) for mask in position)
+        assert tuple(sym.restore(mask, t) for mask in canonical) == position
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_canonical_is_shared_by_symmetric_positions(size):
+    sym = square_symmetry(size)
+    for position in positions(size):
+        canonical, _ = sym.canonical(*position)
+        for t in range(TRANSFORMS):
+            image = tuple(sym.transform(mask, t) for mask in position)
+            assert sym.canonical(*image)[0] == canonical
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_restore_move_maps_cells_back(size):
+    sym = square_symmetry(size)
+    for t in range(TRANSFORMS):
+        for cell in range(size * size):
+            original = sym.restore_move(cell, t)
+            assert sym.permutations[t][original] == cell
+            assert sym.restore(1 << cell, t) == 1 << original
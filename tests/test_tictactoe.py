@@ -0,0 +1,105 @@
+"""
+               GLWT(Good Luck With That) Public License
+                 Copyright (c) Everyone, except Author
+
+Everyone is permitted to copy, distribute, modify, merge, sell, publish,
+sublicense or whatever they want with this software but at their OWN RISK.
+
+                            Preamble
+
+The author has absolutely no clue what the code in this project does.
+It might just work or not, there is no third option.
+
+
+                GOOD LUCK WITH THAT PUBLIC LICENSE
+   TERMS AND CONDITIONS FOR COPYING, DISTRIBUTION, AND MODIFICATION
+
+  0. You just DO WHATEVER YOU WANT TO as long as you NEVER LEAVE A
+TRACE TO TRACK THE AUTHOR of the original product to blame for or hold
+responsible.
+
+IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+
+Good luck and Godspeed.
+"""
+
+"""
+Tests of `src/games/tictactoe.py`: the outcome table against brute force, over every reachable position,
+and its lazy construction by concurrent threads.
+"""
+
+import asyncio
+import threading
+from array import array
+
+from brute import Solver
+from games import tictactoe
+from games.tictactoe import XO, TicTacToe, TicTacToeState, _CODES, _index, _MOVES_MASK, _moves_by_empty, _table
+
+SOLVER = Solver(3, 3, 3)
+
+
+def state_of(x: int, o: int) -> TicTacToeState:
+    return TicTacToeState(x=x, o=o, turn=XO.X if x.bit_count() == o.bit_count() else XO.O)
+
+
+def test_table_holds_exactly_the_optimal_moves():
+    table = _table()
+    for x, o in SOLVER.reachable():
+        state = state_of(x, o)
+        entry = table[_index(state.x, state.o, state.turn)]
+        assert set(_moves_by_empty[entry & _MOVES_MASK]) == SOLVER.best_moves(x, o), (x, o)
+
+
+def test_best_move_is_optimal():
+    async def scenario():
+        game = TicTacToe()
+        for x, o in SOLVER.reachable():
+            move = await game.generate_best_move(state_of(x, o))
+            assert move in SOLVER.best_moves(x, o), (x, o)
+
+    asyncio.run(scenario())
+
+
+def test_engine_never_loses_from_the_start():
+    assert SOLVER.value(0, 0) == 0  # Sanity check of the reference: Tic Tac Toe is a draw.
+
+    async def scenario():
+        game = TicTacToe()
+        state = await game.initial_state()
+        # The user may try every move, the engine answers: the engine must keep at least a draw.
+        positions = [state]
+        while positions:
+            state = positions.pop()
+            for move in await game.get_legal_moves(state):
+                after_user = await game.add_move(state, move)
+                if await game.is_terminal(after_user):
+                    assert await game.get_winner(after_user) != 1
+                    continue
+                after_engine = await game.add_move(after_user, await game.generate_best_move(after_user))
+                if await game.is_terminal(after_engine):
+                    assert await game.get_winner(after_engine) != 1
+                    continue
+                positions.append(after_engine)
+
+    asyncio.run(scenario())
+
+
+def test_table_is_built_once_by_concurrent_threads(monkeypatch):
+    monkeypatch.setattr(tictactoe, "_outcome_table", array("H"))  # Not built yet.
+    barrier = threading.Barrier(4)
+
+    def build():
+        barrier.wait()
+        _table()
+
+    threads = [threading.Thread(target=build) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(tictactoe._outcome_table) == 2 * _CODES
+    assert asyncio.run(TicTacToe().engine_stats())["table_entries"] == 2 * _CODES
@@ -0,0 +1,52 @@
+"""
+               GLWT(Good Luck With That) Public License
+                 Copyright (c) Everyone, except Author
+
+Everyone is permitted to copy, distribute, modify, merge, sell, publish,
+sublicense or whatever they want with this software but at their OWN RISK.
+
+                            Preamble
+
+The author has absolutely no clue what the code in this project does.
+It might just work or not, there is no third option.
+
+
+                GOOD LUCK WITH THAT PUBLIC LICENSE
+   TERMS AND CONDITIONS FOR COPYING, DISTRIBUTION, AND MODIFICATION
+
+  0. You just DO WHATEVER YOU WANT TO as long as you NEVER LEAVE A
+TRACE TO TRACK THE AUTHOR of the original product to blame for or hold
+responsible.
+
+IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+
+Good luck and Godspeed.
+"""
+
+"""
+Tests of `src/tournament.py`: game selection and a short tournament of the 4x4 game.
+"""
+
+import asyncio
+
+from registry import discover, select
+from tournament import parse_args, run
+
+
+def test_games_are_selected_by_bot_name_or_class():
+    specs = asyncio.run(discover())
+    assert [spec.name for spec in select(specs, ["TicTacToe4x4"])] == ["tictactoe4x4"]
+    assert [spec.name for spec in select(specs, ["MNKGame"])] == ["tictactoe4x4"]
+    assert [spec.name for spec in select(specs, ["games.nim:Nim"])] == ["Nim"]
+
+
+def test_searching_engine_plays_reduced_tournament(capsys):
+    args = parse_args(["--only", "tictactoe4x4", "--search-games", "4", "--search-limit", "3", "--chunk", "2",
+                       "--depth", "2", "--workers", "1"])
+    assert asyncio.run(run(args)) == 0
+    report = capsys.readouterr().out
+    assert "tictactoe4x4   random               4" in report
+    assert "tictactoe4x4   adversarial          4" in report